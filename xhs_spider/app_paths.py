@@ -0,0 +1,17 @@
+import os
+import sys
+
+
+def get_executable_path():
+    """获取可执行文件路径"""
+    if getattr(sys, 'frozen', False):
+        # 如果是打包后的exe运行
+        return os.path.dirname(sys.executable)
+    else:
+        # 如果是python脚本运行
+        return os.path.dirname(os.path.abspath(__file__))
+
+
+def data_path(filename):
+    """程序目录下的数据文件路径（索引、缓存等）"""
+    return os.path.join(get_executable_path(), filename)
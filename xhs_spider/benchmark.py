@@ -0,0 +1,573 @@
+"""采集性能基准测试
+
+用法：
+    python benchmark.py harvest --notes 1200
+    python benchmark.py capture --notes 600
+    python benchmark.py excel --rows 50000
+    python benchmark.py gui-log --rate 10000 --seconds 5
+    python benchmark.py startup --budget 1.5
+    python benchmark.py throughput --notes 400 --pages 20
+    python benchmark.py stream --rows 100000
+    python benchmark.py counts --rows 1000000
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# 合成笔记页面：window.__appendNotes(n) 在列表末尾追加 n 张笔记卡片
+SYNTHETIC_FEED_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>synthetic feed</title></head>
+<body>
+<div class="feeds-page"></div>
+<script>
+let __noteSeq = 0;
+window.__appendNotes = function (n) {
+    const feed = document.querySelector('.feeds-page');
+    const frag = document.createDocumentFragment();
+    for (let i = 0; i < n; i++) {
+        const seq = __noteSeq++;
+        const id = seq.toString(16).padStart(24, '0');
+        const item = document.createElement('section');
+        item.className = 'note-item';
+        item.innerHTML =
+            '<a href="/explore/' + id + '?xsec_token=bench">' +
+            (seq % 5 === 0 ? '<span class="play-icon"></span>' : '') + '</a>' +
+            '<div class="footer"><a class="title"><span>合成笔记 ' + seq + '</span></a>' +
+            '<span class="like-wrapper"><span class="count">' + (seq % 3 === 0 ? '1.2万' : seq) + '</span></span></div>';
+        frag.appendChild(item);
+    }
+    feed.appendChild(frag);
+    return __noteSeq;
+};
+</script>
+</body></html>
+"""
+
+
+def open_headless_page(url):
+    """打开无头浏览器并访问指定地址"""
+    from DrissionPage import ChromiumPage, ChromiumOptions
+
+    co = ChromiumOptions().headless().auto_port()
+    page = ChromiumPage(co)
+    page.get(url)
+    return page
+
+
+def write_synthetic_feed():
+    """把合成页面写入临时文件，返回文件URL"""
+    fd, path = tempfile.mkstemp(suffix='.html')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(SYNTHETIC_FEED_HTML)
+    return path, 'file:///' + path.replace(os.sep, '/').lstrip('/')
+
+
+def bench_harvest(total_notes=1200, page_size=20):
+    """对比全量扫描与增量采集每页耗时随笔记数增长的变化"""
+    from extract_author import FULL_SCAN_SCRIPT
+    from note_harvest import NoteHarvester
+
+    path, url = write_synthetic_feed()
+    page = open_headless_page(url)
+    try:
+        harvester = NoteHarvester()
+        full_rows = []
+        full_times, incr_times = [], []
+        rounds = total_notes // page_size
+        for _ in range(rounds):
+            page.run_js(f'return window.__appendNotes({page_size});')
+
+            # 旧模式：每页重新扫描全部笔记并全部追加
+            start = time.perf_counter()
+            items = page.run_js(FULL_SCAN_SCRIPT)
+            full_rows.extend(dict(item) for item in items if item['href'])
+            full_times.append(time.perf_counter() - start)
+
+            # 增量模式：只取新出现的笔记
+            start = time.perf_counter()
+            harvester.harvest(page)
+            incr_times.append(time.perf_counter() - start)
+
+        print(f"{'笔记数':>8} {'全量扫描(ms/页)':>16} {'增量采集(ms/页)':>16}")
+        step = max(1, rounds // 10)
+        for i in range(0, rounds, step):
+            print(f"{(i + 1) * page_size:>8} {full_times[i] * 1000:>16.2f} {incr_times[i] * 1000:>16.2f}")
+
+        head, tail = slice(0, 5), slice(-5, None)
+        for name, times in (('全量扫描', full_times), ('增量采集', incr_times)):
+            growth = statistics.mean(times[tail]) / statistics.mean(times[head])
+            print(f"{name}: 末尾5页/开头5页耗时比 {growth:.2f}")
+        print(f"全量模式Python侧累计行数 {len(full_rows)}，增量模式 {len(harvester)}（无重复）")
+    finally:
+        page.quit()
+        os.remove(path)
+
+
+def bench_capture(total_notes=600, pages=30):
+    """对比页面DOM采集与接口监听解析的耗时和字段完整度"""
+    from feed_api import FeedListener, USER_POSTED_API
+    from note_harvest import NoteBuffer, step_scroll
+    from simulator import FeedSimulator
+
+    with FeedSimulator(total_notes=total_notes) as simulator:
+        url = f'{simulator.base_url}/user/profile/5c56f621000000001a01f759'
+        for mode in ('dom', 'api'):
+            page = open_headless_page('about:blank')
+            try:
+                harvester = FeedListener(USER_POSTED_API) if mode == 'api' else NoteBuffer()
+                if mode == 'api':
+                    harvester.start(page)
+                page.get(url)
+                extract_seconds = 0.0
+                fields = set()
+                for _ in range(pages):
+                    start = time.perf_counter()
+                    items = harvester.harvest(page)
+                    extract_seconds += time.perf_counter() - start
+                    for item in items:
+                        fields.update(key for key, value in item.items() if value)
+                    if len(harvester) >= total_notes:
+                        break
+                    step_scroll(page, pause=0.05)
+                extra = f"，其中JSON解析 {harvester.parse_seconds * 1000:.1f}ms" if mode == 'api' else ''
+                print(f"{mode}: {len(harvester)} 条笔记，采集耗时 {extract_seconds * 1000:.1f}ms{extra}，"
+                      f"字段 {sorted(fields)}")
+            finally:
+                page.quit()
+
+
+def synthetic_rows(count, duplicate_ratio=0.1):
+    """生成作者笔记格式的合成记录，按比例混入重复记录"""
+    unique = int(count * (1 - duplicate_ratio))
+    rows = []
+    for i in range(count):
+        seq = i if i < unique else i % max(unique, 1)
+        rows.append({
+            '作者': '基准作者',
+            '笔记类型': '视频' if seq % 5 == 0 else '图文',
+            '标题': f'基准笔记标题 {seq}',
+            '点赞数': f'{seq / 1000:.1f}万' if seq % 7 == 0 else str(seq % 9999),
+            '笔记链接': f'https://www.xiaohongshu.com/explore/{seq:024x}',
+        })
+    return rows
+
+
+def bench_excel(row_count=50000):
+    """对比旧的多次读写Excel流程与单次写出的记录器"""
+    import pandas as pd
+    from extract_author import new_note_writer
+    from likes import normalize_counts
+    from openpyxl import load_workbook
+
+    rows = synthetic_rows(row_count)
+    workdir = tempfile.mkdtemp()
+
+    # 旧流程：临时文件 → read_excel → 去重排序 → to_excel → openpyxl 调列宽 → 删除临时文件
+    start = time.perf_counter()
+    init_path = os.path.join(workdir, 'init.xlsx')
+    final_path = os.path.join(workdir, 'legacy.xlsx')
+    pd.DataFrame(rows).to_excel(init_path, index=False)
+    df = pd.read_excel(init_path)
+    normalize_counts(df)
+    df = df.drop_duplicates().sort_values(by='点赞数', ascending=False)
+    df.to_excel(final_path, index=False)
+    wb = load_workbook(final_path)
+    ws = wb.active
+    for col in ws.iter_cols(min_col=1, max_col=5):
+        ws.column_dimensions[col[0].column_letter].width = max(len(str(c.value)) for c in col) + 5
+    wb.save(final_path)
+    os.remove(init_path)
+    legacy_seconds = time.perf_counter() - start
+
+    # 新流程：边采集边去重、记录列宽，最后只写一次
+    start = time.perf_counter()
+    writer = new_note_writer()
+    for i in range(0, len(rows), 20):
+        writer.add_data(rows[i:i + 20])
+    writer.save(os.path.join(workdir, 'streaming.xlsx'))
+    streaming_seconds = time.perf_counter() - start
+
+    print(f"{row_count} 行（去重后 {len(writer)} 行）")
+    print(f"旧流程：{legacy_seconds:.2f}s")
+    print(f"单次写出：{streaming_seconds:.2f}s（{legacy_seconds / streaming_seconds:.1f}x）")
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+def synthetic_search_rows(count, page_size=20):
+    """按页生成搜索结果格式的合成记录，约 10% 为重复笔记"""
+    for start in range(0, count, page_size):
+        page = []
+        for i in range(start, min(start + page_size, count)):
+            seq = i if i % 10 else i // 2
+            page.append({
+                '标题': f'合成搜索结果标题 {seq}',
+                '作者': f'作者{seq % 997}',
+                '笔记类型': '视频' if seq % 5 == 0 else '图文',
+                '点赞数': f'{seq / 1000:.1f}万' if seq % 7 == 0 else str(seq % 9999),
+                '笔记链接': f'https://www.xiaohongshu.com/explore/{seq:024x}?xsec_token=bench',
+                '作者主页': f'https://www.xiaohongshu.com/user/profile/{seq % 997:024x}',
+            })
+        yield page
+
+
+def bench_stream(row_count=100000, top=None):
+    """对比内存累积与落盘流式两种方式的峰值内存（tracemalloc）和耗时"""
+    from excel_writer import StreamingExcelWriter
+    from likes import count_converters
+    from result_sink import DiskResultSink
+
+    workdir = tempfile.mkdtemp()
+
+    # 内存方式：全部结果累积在列表中，结束时去重排序写出
+    tracemalloc.start()
+    start = time.perf_counter()
+    all_results = []
+    for page in synthetic_search_rows(row_count):
+        all_results.extend(page)
+    writer = StreamingExcelWriter(key_columns=['笔记链接'], sort_by='点赞数', converters=count_converters())
+    writer.add_data(all_results)
+    writer.save(os.path.join(workdir, 'memory.xlsx'))
+    memory_seconds = time.perf_counter() - start
+    memory_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del all_results, writer
+
+    # 流式方式：逐页去重落盘，磁盘排序导出
+    tracemalloc.start()
+    start = time.perf_counter()
+    sink = DiskResultSink(converters=count_converters())
+    checkpoints = []
+    for page in synthetic_search_rows(row_count):
+        sink.add(page)
+        if sink.received % 10000 < 20:
+            checkpoints.append(tracemalloc.get_traced_memory()[0])
+    sink.save(os.path.join(workdir, 'stream.xlsx'), top=top)
+    stream_seconds = time.perf_counter() - start
+    stream_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{row_count} 行（去重后 {len(sink)} 行{f'，导出前 {top} 条' if top else ''}）")
+    print(f"内存累积：峰值 {memory_peak / 1e6:.1f}MB，耗时 {memory_seconds:.2f}s")
+    print(f"落盘流式：峰值 {stream_peak / 1e6:.1f}MB，耗时 {stream_seconds:.2f}s")
+    print("流式采集过程中的内存占用（每 1 万行）：" + ' '.join(f'{value / 1e6:.2f}MB' for value in checkpoints))
+    sink.close()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+# 合成互动数的显示形式，按顺序循环使用
+COUNT_FORMS = ('{n}', '{w:.1f}万', '{n}', '{w:.1f}w+', '{k:.1f}k', '{n:,}', '赞', '{y:.2f}亿', '{n}+', ' {n} ')
+
+
+def synthetic_counts(count):
+    """生成 count 个各种显示形式的互动数文本"""
+    values = []
+    for i in range(count):
+        n = (i * 7919) % 2000000
+        values.append(COUNT_FORMS[i % len(COUNT_FORMS)].format(n=n, w=n / 10000, k=n / 1000, y=n / 1000))
+    return values
+
+
+def legacy_convert_likes(like_str):
+    """旧的逐行转换（只认“万”，其余形式都变成 0），作为对比基线"""
+    try:
+        if isinstance(like_str, str):
+            if '万' in like_str:
+                return float(like_str.replace('万', '')) * 10000
+            return float(like_str)
+        return float(like_str)
+    except:
+        return 0
+
+
+def bench_counts(row_count=1000000):
+    """对比逐行 apply 与向量化的互动数解析和导出格式化"""
+    import pandas as pd
+    from likes import format_count, format_counts, parse_count, parse_counts
+
+    series = pd.Series(synthetic_counts(row_count), dtype=object)
+
+    def timed(func):
+        start = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - start
+
+    legacy, legacy_seconds = timed(lambda: series.apply(legacy_convert_likes))
+    scalar, scalar_seconds = timed(lambda: series.apply(parse_count))
+    vector, vector_seconds = timed(lambda: parse_counts(series))
+    _, format_scalar_seconds = timed(lambda: vector.apply(format_count))
+    _, format_vector_seconds = timed(lambda: format_counts(vector))
+
+    mismatches = int((scalar.to_numpy() != vector.to_numpy()).sum())
+    unparsed = int(((legacy == 0) & (vector != 0)).sum())
+    print(f"{row_count} 行，{len(COUNT_FORMS)} 种显示形式")
+    print(f"旧的逐行转换：{legacy_seconds:.2f}s（{unparsed} 行被误转为 0，结果为 {legacy.dtype}）")
+    print(f"逐行 parse_count：{scalar_seconds:.2f}s")
+    print(f"向量化 parse_counts：{vector_seconds:.2f}s（{scalar_seconds / vector_seconds:.1f}x，结果为 {vector.dtype}）")
+    print(f"导出格式化：逐行 {format_scalar_seconds:.2f}s，向量化 {format_vector_seconds:.2f}s")
+    print(f"逐行与向量化结果不一致：{mismatches} 行")
+
+
+def bench_gui_log(rate=10000, seconds=5, max_lines=5000):
+    """以每秒 rate 行的速度从后台线程写日志，测量界面刷新延迟和文本框行数"""
+    import tkinter as tk
+    from tkinter import scrolledtext
+    from xhs_crawler_gui import RedirectText
+
+    root = tk.Tk()
+    text = scrolledtext.ScrolledText(root, height=20)
+    text.pack()
+    redirect = RedirectText(text, max_lines=max_lines)
+
+    written = [0]
+    done = threading.Event()
+
+    def producer():
+        # 每 10ms 写一批，保持目标速率
+        batch = max(1, rate // 100)
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for _ in range(batch):
+                redirect.write(f"已获取笔记 {written[0]} | 作者: 基准作者 | 点赞: 1.2万\n")
+                written[0] += 1
+            time.sleep(0.01)
+        done.set()
+
+    # 主线程心跳：计划每 20ms 执行一次，记录实际延迟，衡量界面是否卡顿
+    lags = []
+    last = [time.perf_counter()]
+
+    def heartbeat():
+        now = time.perf_counter()
+        lags.append(now - last[0] - 0.02)
+        last[0] = now
+        if done.is_set() and redirect.queue.empty():
+            root.after(redirect.interval * 2, root.quit)
+        else:
+            root.after(20, heartbeat)
+
+    threading.Thread(target=producer, daemon=True).start()
+    start = time.perf_counter()
+    root.after(20, heartbeat)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+
+    shown = int(text.index('end-1c').split('.')[0]) - 1
+    lags.sort()
+    print(f"写入 {written[0]} 行，耗时 {elapsed:.2f}s（{written[0] / elapsed:.0f} 行/s）")
+    print(f"文本框保留 {shown} 行，缓冲区 {len(redirect.lines)} 行（上限 {max_lines}）")
+    print(f"界面心跳延迟：中位数 {lags[len(lags) // 2] * 1000:.1f}ms，"
+          f"P99 {lags[int(len(lags) * 0.99)] * 1000:.1f}ms，最大 {lags[-1] * 1000:.1f}ms")
+    redirect.stop()
+    root.destroy()
+
+
+# 启动阶段不应导入的重量级模块（应在第一次运行任务时才导入）
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'DrissionPage', 'DataRecorder', 'tqdm',
+                 'playwright', 'selenium', 'PIL')
+
+# 启动探针：导入GUI并创建窗口，窗口完成首次绘制后退出；没有图形界面时只测导入
+STARTUP_PROBE = """
+import sys
+import xhs_crawler_gui
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except Exception:
+    print('import-only')
+    sys.exit(0)
+app = xhs_crawler_gui.XHSDataAssistant(root)
+root.update()
+sys.__stdout__.write('window\\n')
+app.on_closing()
+"""
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 {模块名: 累计耗时(微秒)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def bench_startup(runs=5, budget=1.5):
+    """测量GUI从启动进程到首个窗口出现的耗时，超出预算或启动时导入了重量级模块时返回 False"""
+    gui_dir = os.path.dirname(os.path.abspath(__file__))
+    durations = []
+    modules = {}
+    mode = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE],
+                                cwd=gui_dir, capture_output=True, text=True)
+        durations.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            return False
+        mode = result.stdout.strip().splitlines()[-1]
+        modules = parse_importtime(result.stderr)
+
+    median = statistics.median(durations)
+    label = '首个窗口' if mode == 'window' else '导入GUI模块（无图形界面）'
+    print(f"{label}耗时：中位数 {median:.3f}s，最短 {min(durations):.3f}s（{runs} 次），预算 {budget:.3f}s")
+    print(f"xhs_crawler_gui 导入耗时 {modules.get('xhs_crawler_gui', 0) / 1e6:.3f}s，最慢的导入：")
+    top_level = {name: us for name, us in modules.items() if '.' not in name}
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {name:<24} {us / 1000:>8.1f}ms")
+
+    heavy = sorted(name for name in top_level if name in HEAVY_MODULES)
+    ok = median <= budget and not heavy
+    if heavy:
+        print(f"启动时导入了重量级模块：{', '.join(heavy)}")
+    print("通过" if ok else "未通过：超出启动预算")
+    return ok
+
+
+# 吞吐量测试的模拟服务配置：名称 → FeedSimulator 参数
+THROUGHPUT_SCENARIOS = {
+    '基础': {},
+    '虚拟列表': {'virtualize': 40},
+    '接口延迟300ms': {'latency': 0.3},
+    '加载更多按钮': {'load_more': True},
+}
+
+
+def run_search_pages(page, pages, total_notes):
+    """在搜索结果页上运行 get_search_results + page_scroll_down，返回笔记数和每页耗时"""
+    import extract_search
+
+    buffer = extract_search.new_search_buffer()
+    notes, page_times = 0, []
+    for _ in range(pages):
+        start = time.perf_counter()
+        notes += len(extract_search.get_search_results(page, buffer))
+        extract_search.page_scroll_down(page)
+        page_times.append(time.perf_counter() - start)
+        if notes >= total_notes:
+            break
+    return notes, page_times
+
+
+def run_author_pages(page, pages, total_notes):
+    """在作者主页上运行 crawler（get_note_info + page_scroll_down），返回笔记数和每页耗时"""
+    import extract_author
+
+    recorder = extract_author.new_note_writer()
+    page_times = []
+    last = [time.perf_counter()]
+
+    def progress(pages=None, total=None, notes=None, target=None):
+        now = time.perf_counter()
+        page_times.append(now - last[0])
+        last[0] = now
+
+    extract_author.crawler(page, '模拟作者', pages, recorder, target=total_notes, progress=progress)
+    return len(recorder), page_times
+
+
+def bench_throughput(total_notes=400, pages=20, scenarios=None):
+    """在离线模拟服务上无头运行搜索和作者主页的采集流程，报告各配置下的采集速度和每页耗时"""
+    from rate_limit import limiter
+    from simulator import FeedSimulator
+
+    # 模拟服务不会限流：放开令牌桶，只测采集流程本身的耗时
+    bucket = limiter()
+    bucket.rate = bucket.max_rate = bucket.burst = bucket.tokens = 1000.0
+    scenarios = scenarios or list(THROUGHPUT_SCENARIOS)
+    runners = (
+        ('搜索', run_search_pages, '/search_result?keyword=bench'),
+        ('作者', run_author_pages, '/user/profile/5c56f621000000001a01f759'),
+    )
+    print(f"{'配置':<12} {'页面':<4} {'笔记数':>6} {'覆盖率':>7} {'条/秒':>8} {'每页(ms)':>9} {'最慢页(ms)':>10}")
+    for name in scenarios:
+        with FeedSimulator(total_notes=total_notes, **THROUGHPUT_SCENARIOS[name]) as simulator:
+            for label, runner, path in runners:
+                page = open_headless_page(simulator.base_url + path)
+                try:
+                    start = time.perf_counter()
+                    # 采集函数会逐条打印笔记，测试时不输出
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        notes, page_times = runner(page, pages, total_notes)
+                    elapsed = time.perf_counter() - start
+                finally:
+                    page.quit()
+                per_page = statistics.mean(page_times) * 1000 if page_times else 0.0
+                slowest = max(page_times) * 1000 if page_times else 0.0
+                print(f"{name:<12} {label:<4} {notes:>6} {notes / total_notes:>7.0%} "
+                      f"{notes / elapsed:>8.1f} {per_page:>9.1f} {slowest:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='小红书采集性能基准测试')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    harvest = sub.add_parser('harvest', help='增量采集与全量扫描对比')
+    harvest.add_argument('--notes', type=int, default=1200, help='合成笔记总数')
+    harvest.add_argument('--page-size', type=int, default=20, help='每页新增笔记数')
+
+    capture = sub.add_parser('capture', help='DOM采集与接口监听对比')
+    capture.add_argument('--notes', type=int, default=600, help='模拟服务笔记总数')
+    capture.add_argument('--pages', type=int, default=30, help='最多滚动页数')
+
+    excel = sub.add_parser('excel', help='Excel写出流程对比')
+    excel.add_argument('--rows', type=int, default=50000, help='记录行数')
+
+    gui_log = sub.add_parser('gui-log', help='GUI日志刷新吞吐量')
+    gui_log.add_argument('--rate', type=int, default=10000, help='每秒写入行数')
+    gui_log.add_argument('--seconds', type=int, default=5, help='持续时间')
+    gui_log.add_argument('--max-lines', type=int, default=5000, help='保留行数上限')
+
+    startup = sub.add_parser('startup', help='GUI启动耗时（超出预算时退出码为1）')
+    startup.add_argument('--runs', type=int, default=5, help='重复次数')
+    startup.add_argument('--budget', type=float, default=1.5, help='启动预算（秒）')
+
+    stream = sub.add_parser('stream', help='内存累积与落盘流式的峰值内存对比')
+    stream.add_argument('--rows', type=int, default=100000, help='记录行数')
+    stream.add_argument('--top', type=int, help='只导出前几条')
+
+    counts = sub.add_parser('counts', help='互动数逐行解析与向量化解析对比')
+    counts.add_argument('--rows', type=int, default=1000000, help='记录行数')
+
+    throughput = sub.add_parser('throughput', help='模拟服务上的采集吞吐量')
+    throughput.add_argument('--notes', type=int, default=400, help='模拟服务笔记总数')
+    throughput.add_argument('--pages', type=int, default=20, help='最多翻页次数')
+    throughput.add_argument('--scenario', action='append', choices=list(THROUGHPUT_SCENARIOS),
+                            help='只运行指定配置（可重复），默认全部')
+
+    args = parser.parse_args()
+    if args.command == 'harvest':
+        bench_harvest(args.notes, args.page_size)
+    elif args.command == 'capture':
+        bench_capture(args.notes, args.pages)
+    elif args.command == 'excel':
+        bench_excel(args.rows)
+    elif args.command == 'gui-log':
+        bench_gui_log(args.rate, args.seconds, args.max_lines)
+    elif args.command == 'startup':
+        if not bench_startup(args.runs, args.budget):
+            sys.exit(1)
+    elif args.command == 'stream':
+        bench_stream(args.rows, args.top)
+    elif args.command == 'counts':
+        bench_counts(args.rows)
+    elif args.command == 'throughput':
+        bench_throughput(args.notes, args.pages, args.scenario)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from lean import block_resources
+from session import BrowserSession
+
+
+class BrowserManager:
+    """常驻浏览器服务：GUI 启动一次，多个任务之间复用同一个已登录浏览器
+
+    任务通过 lease() 租用独立标签页；浏览器崩溃或被关闭时自动重启并重新确认登录。
+    lean 为 True 时租出的标签页不加载图片、视频和字体，浏览器下次启动时以无界面模式运行
+    """
+
+    def __init__(self, account='default', login_check=None, health_interval=30, lean=False):
+        self.session = BrowserSession(account)
+        self.login_check = login_check
+        self.lean = lean
+        self.health_interval = health_interval
+        self.page = None
+        self.restarts = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._monitor = None
+
+    def healthy(self):
+        """浏览器是否仍可响应"""
+        if self.page is None:
+            return False
+        try:
+            return self.page.run_js('return 1;') == 1
+        except Exception:
+            return False
+
+    def _launch(self):
+        """启动（或重启）浏览器并确认登录"""
+        if self.page is not None:
+            self.restarts += 1
+            print(f"浏览器无响应，正在重启（第 {self.restarts} 次）...")
+            # 旧页面的续期线程先退出，ensure_login 再为新页面启动续期
+            self.session.stop_refresh()
+            try:
+                self.page.quit()
+            except Exception:
+                pass
+            self.page = None
+        page = self.session.open(self.lean)
+        if not self.session.ensure_login(page, self.login_check):
+            raise RuntimeError("登录失败")
+        self.page = page
+
+    def ensure(self):
+        """返回可用的已登录浏览器页面，必要时启动、重启或重新登录"""
+        with self._lock:
+            if not self.healthy():
+                self._launch()
+            elif not self.session.logged_in(self.page):
+                if not self.session.ensure_login(self.page, self.login_check):
+                    raise RuntimeError("登录失败")
+            return self.page
+
+    def start(self):
+        """启动浏览器和后台健康检查"""
+        with self._lock:
+            self.ensure()
+            if self._monitor is None or not self._monitor.is_alive():
+                self._stop.clear()
+                self._monitor = threading.Thread(target=self._watch, daemon=True)
+                self._monitor.start()
+        return self
+
+    def _watch(self):
+        """定期检查浏览器，崩溃后提前重启，下一个任务无需等待冷启动"""
+        while not self._stop.wait(self.health_interval):
+            with self._lock:
+                if self.page is not None and not self.healthy():
+                    try:
+                        self._launch()
+                    except Exception as e:
+                        print(f"浏览器重启失败: {str(e)}")
+
+    @contextmanager
+    def lease(self):
+        """with 语句中租用一个新标签页，结束后关闭该标签页，浏览器保持运行"""
+        start = time.perf_counter()
+        with self._lock:
+            tab = self.ensure().new_tab()
+        if self.lean:
+            block_resources(tab)
+        print(f"浏览器就绪，耗时 {time.perf_counter() - start:.2f}s")
+        try:
+            yield tab
+        finally:
+            try:
+                tab.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """停止健康检查并关闭浏览器"""
+        self._stop.set()
+        self.session.stop_refresh()
+        with self._lock:
+            if self.page is not None:
+                try:
+                    self.page.quit()
+                except Exception:
+                    pass
+                self.page = None
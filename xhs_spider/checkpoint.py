@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+import time
+
+from app_paths import data_path
+from note_harvest import extract_note_id, feed_exhausted
+import waits
+from run_context import current_run
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl_key TEXT PRIMARY KEY,
+    page INTEGER NOT NULL,
+    updated TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS crawl_rows (
+    crawl_key TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (crawl_key, note_id)
+);
+"""
+
+# 快进时每次滚动后等待新卡片的最长秒数
+FAST_FORWARD_TIMEOUT = 3
+
+
+class CrawlCheckpoint:
+    """采集检查点：每页结果和翻页进度在同一个事务中写入 SQLite（WAL 模式）
+
+    程序崩溃或机器重启后，resume 运行从检查点读回已采集的记录、已见笔记ID和已完成页数；
+    采集结果保存成功后调用 finish 删除检查点
+    """
+
+    def __init__(self, kind, target, path=None):
+        self.key = f'{kind}:{target}'
+        self.path = path or data_path('checkpoints.db')
+        self.page = 0
+        self._lock = threading.Lock()
+        # 批量采集时多个标签页线程各自持有检查点，写锁冲突时等待
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def start(self, resume=False):
+        """开始采集：resume 为 True 时读回上次的进度，否则清空旧检查点，返回已完成页数"""
+        with self._lock:
+            row = self._conn.execute('SELECT page, updated FROM crawls WHERE crawl_key = ?', (self.key,)).fetchone()
+            if resume and row:
+                self.page = row[0]
+                print(f"从检查点继续：{self.key} 已完成 {row[0]} 页（{row[1]}）")
+                return self.page
+            if resume:
+                print(f"没有找到 {self.key} 的检查点，从头开始采集")
+            self._clear()
+            self.page = 0
+            return 0
+
+    def rows(self, batch=1000):
+        """按写入顺序逐条返回检查点中已采集的记录（分批读取，不会一次载入全部记录）"""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT rowid, data FROM crawl_rows WHERE crawl_key = ? AND rowid > ? ORDER BY rowid LIMIT ?',
+                    (self.key, last, batch)
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, data in rows:
+                yield json.loads(data)
+
+    def seen_ids(self):
+        """检查点中已采集的笔记ID集合"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT note_id FROM crawl_rows WHERE crawl_key = ?', (self.key,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def save_page(self, page, records, link_column='笔记链接'):
+        """记录第 page 页（从1开始）采集到的记录，和进度一起提交"""
+        rows = []
+        for record in records:
+            note_id = extract_note_id(record.get(link_column, '')) or record.get(link_column, '')
+            if note_id:
+                rows.append((self.key, note_id, json.dumps(record, ensure_ascii=False)))
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO crawl_rows (crawl_key, note_id, data) VALUES (?, ?, ?)', rows
+                )
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO crawls (crawl_key, page, updated) VALUES (?, ?, ?)',
+                    (self.key, page, time.strftime('%Y-%m-%d %H:%M:%S'))
+                )
+            self.page = page
+
+    def finish(self):
+        """结果已保存，删除检查点"""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        with self._conn:
+            self._conn.execute('DELETE FROM crawl_rows WHERE crawl_key = ?', (self.key,))
+            self._conn.execute('DELETE FROM crawls WHERE crawl_key = ?', (self.key,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def fast_forward(page, pages, harvester=None):
+    """恢复时快速翻过已完成的 pages 页：只滚动到底并等待新卡片，不提取数据，返回实际滚动次数
+
+    信息流没有分页地址，只能重新滚动；已采集的笔记由 harvester 的已见集合过滤
+    """
+    for i in range(pages):
+        if feed_exhausted(page, harvester):
+            return i
+        baseline = waits.probe(page)
+        current_run().limiter().acquire()
+        page.run_js("window.scrollTo(0, document.documentElement.scrollHeight);")
+        waits.adaptive_wait(page, 'fast_forward', timeout=FAST_FORWARD_TIMEOUT, baseline=baseline)
+        if (i + 1) % 10 == 0:
+            print(f"快进中：已滚动 {i + 1}/{pages} 页")
+    return pages
@@ -0,0 +1,154 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+
+
+class ColumnLayout:
+    """StreamingExcelWriter 和 DiskResultSink 共用的列布局
+
+    按列名首次出现的顺序分配列序号，记录每列取值的最大宽度，
+    save() 时以 openpyxl 只写模式写出（只写模式下列宽必须在写入数据前设置）；
+    number_formats 为列名到 Excel 数字格式的映射，只改变单元格的显示，不改变写出的取值
+    """
+
+    def __init__(self, number_formats=None, width_padding=5):
+        self.number_formats = number_formats or {}
+        self.width_padding = width_padding
+        self.columns = []
+        self.widths = []
+
+    def index(self, name):
+        """列名对应的列序号，新列追加到末尾"""
+        try:
+            return self.columns.index(name)
+        except ValueError:
+            self.columns.append(name)
+            self.widths.append(len(str(name)))
+            return len(self.columns) - 1
+
+    def pack(self, record, converters=None):
+        """把记录字典转换为按列序号排列的值列表，converters 按列转换取值"""
+        values = [None] * len(self.columns)
+        for name, value in record.items():
+            if converters and name in converters:
+                value = converters[name](value)
+            index = self.index(name)
+            if index >= len(values):
+                values.extend([None] * (index + 1 - len(values)))
+            values[index] = value
+        return values
+
+    def measure(self, values):
+        """按一行取值更新列宽"""
+        for index, value in enumerate(values):
+            if value is not None:
+                self.widths[index] = max(self.widths[index], len(str(value)))
+
+    def save(self, path, rows, title=None):
+        """把按顺序排列的值列表一次性写出为工作簿"""
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=title)
+        for index, width in enumerate(self.widths, start=1):
+            ws.column_dimensions[get_column_letter(index)].width = width + self.width_padding
+        ws.append(self.columns)
+        width = len(self.columns)
+        formats = [self.number_formats.get(name) for name in self.columns]
+        formatted = any(formats)
+        for values in rows:
+            if len(values) < width:
+                values = values + [None] * (width - len(values))
+            if formatted:
+                values = [self._cell(ws, value, number_format) for value, number_format in zip(values, formats)]
+            ws.append(values)
+        wb.save(path)
+        return path
+
+    @staticmethod
+    def _cell(ws, value, number_format):
+        if number_format is None or value is None:
+            return value
+        cell = WriteOnlyCell(ws, value=value)
+        cell.number_format = number_format
+        return cell
+
+
+class StreamingExcelWriter:
+    """单次写出的Excel记录器
+
+    数据到达时即去重并记录列宽，save() 时排序并以 openpyxl 只写模式一次性写出，
+    不再需要 临时文件 → read_excel → to_excel → 重新加载调列宽 的往返
+    """
+
+    def __init__(self, key_columns=None, converters=None, sort_by=None,
+                 sort_key=None, descending=True, width_padding=5, key=None, number_formats=None):
+        # key(row) 返回去重键；key 和 key_columns 都为 None 时按整行去重
+        self.key = key
+        self.key_columns = key_columns
+        self.converters = converters or {}
+        self.sort_by = sort_by
+        self.sort_key = sort_key
+        self.descending = descending
+        # number_formats 只在 save() 写出时设置单元格的数字格式
+        self.layout = ColumnLayout(number_formats, width_padding)
+        self.rows = {}
+        self.received = 0
+
+    @property
+    def columns(self):
+        return self.layout.columns
+
+    def add_data(self, data):
+        """添加一条或多条记录（与 DataRecorder.Recorder.add_data 用法相同）"""
+        if isinstance(data, dict):
+            data = [data]
+        for row in data:
+            self.received += 1
+            values = self.layout.pack(row, self.converters)
+
+            if self.key is not None:
+                key = self.key(row)
+            elif self.key_columns is None:
+                # 去掉末尾空列，避免列数增长前后的相同记录被当作不同记录
+                end = len(values)
+                while end and values[end - 1] is None:
+                    end -= 1
+                key = tuple(values[:end])
+            else:
+                key = tuple(row.get(name) for name in self.key_columns)
+            if key in self.rows:
+                continue
+            self.rows[key] = values
+            self.layout.measure(values)
+
+    @property
+    def duplicates(self):
+        """被丢弃的重复记录数"""
+        return self.received - len(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def sorted_rows(self):
+        """按排序列返回全部记录"""
+        rows = list(self.rows.values())
+        if self.sort_by is None or self.sort_by not in self.columns:
+            return rows
+        index = self.columns.index(self.sort_by)
+        convert = self.sort_key or (lambda value: value)
+
+        def key(values):
+            value = values[index] if index < len(values) else None
+            return convert(value) if value is not None else 0
+
+        rows.sort(key=key, reverse=self.descending)
+        return rows
+
+    def records(self):
+        """按排序顺序逐条返回记录字典"""
+        for values in self.sorted_rows():
+            yield {name: values[index] for index, name in enumerate(self.columns)
+                   if index < len(values) and values[index] is not None}
+
+    def save(self, path, title=None):
+        """排序后一次性写出工作簿"""
+        return self.layout.save(path, self.sorted_rows(), title)
@@ -1,78 +1,110 @@
-from DrissionPage import ChromiumPage
-from DataRecorder import Recorder
-import pandas as pd
-from tqdm import tqdm
+import argparse
 import time
 import random
-import re
-import openpyxl
-import os
 import math
 import sys
 import logging
+from note_harvest import NoteBuffer, step_scroll, feed_exhausted, extract_note_id, extract_user_id
+import waits
+from feed_api import FeedListener, USER_POSTED_API, extra_columns
+from excel_writer import StreamingExcelWriter
+from tab_pool import TabPool, run_on_tabs
+from note_index import AuthorNoteIndex
+from note_detail import enrich_records
+from session import BrowserSession, quit_browser
+from jobs import combine_progress
+from lean import tab_setup
+from checkpoint import CrawlCheckpoint, fast_forward
+from global_index import FLAG_COLUMN, note_key, seen_notes
+from likes import count_converters, count_number_formats
+from metrics import metrics
+from run_context import RunContext, current_run
 
-def countdown(n):
-    """倒计时函数"""
-    for i in range(n, 0, -1):
-        print(f'\r倒计时{i}秒', end='')
-        time.sleep(1)
-    print('\r倒计时结束')
-
-def sign_in():
-    """登录小红书"""
-    sign_in_page = ChromiumPage()
-    sign_in_page.get('https://www.xiaohongshu.com')
-    
-    # 检查是否已登录
+def safe_print(message):
+    """安全输出：GUI重定向的标准输出可能不可用，同时写入日志"""
     try:
-        # 尝试找登录按钮，如果找不到说明已登录
-        if not sign_in_page.ele('.login-button', timeout=3):
-            print("已检测到登录状态")
-            return
+        if hasattr(sys.stdout, 'write'):
+            sys.stdout.write(f"{message}\n")
+            if hasattr(sys.stdout, 'flush'):
+                sys.stdout.flush()
     except:
-        print("已检测到登录状态")
-        return
-        
-    print("请扫码登录")
-    countdown(30)
+        pass
+    logging.info(message)
+
+# 登录按钮（未登录标志）
+LOGIN_SELECTORS = ['.login-button']
+
+def check_login_status(page):
+    """页面登录状态：3 秒内没有出现登录按钮即视为已登录"""
+    ready = waits.wait_for_markers(page, LOGIN_SELECTORS, timeout=3, label='check_login_status',
+                                   stop_on=LOGIN_SELECTORS)
+    return ready.selector is None
 
-def open_author_page(url):
-    """打开作者主页"""
-    global page, user_name
-    page = ChromiumPage()
+@metrics.timed('sign_in')
+def sign_in(account='default', lean=False):
+    """登录小红书：复用账号的浏览器目录和 Cookie，只有登录失效时才需要扫码，返回已登录的页面
+
+    lean 为 True 且登录凭证有效时以精简模式启动
+    """
+    session = BrowserSession(account)
+    page = session.open(lean)
+    if session.ensure_login(page, check_login_status):
+        return page
+    print("登录失败")
+    return None
+
+def open_author_page(page, url, listener=None):
+    """打开作者主页，返回作者昵称
+
+    传入 listener 时在打开页面前开始监听笔记列表接口
+    """
+    if listener is not None:
+        listener.start(page)
+    current_run().limiter().acquire()
     page.get(url)
-    page.set.window.max()
+    current_run().limiter().observe(page)
+    try:
+        page.set.window.max()
+    except:
+        pass
     
     # 获取作者信息
     user = page.ele('.info')
-    user_name = user.ele('.user-name', timeout=0).text
-    return user_name
+    return user.ele('.user-name', timeout=0).text
 
-def get_note_info():
-    """获取页面笔记信息"""
+# 全量扫描脚本：每次都返回页面上所有笔记
+FULL_SCAN_SCRIPT = """
+return Array.from(document.querySelectorAll('.note-item')).map(item => {
+    const link = item.querySelector('a');
+    const title = item.querySelector('.title');
+    const count = item.querySelector('.count');
+    const isVideo = item.querySelector('.play-icon') !== null;
+    
+    return {
+        href: link ? link.getAttribute('href') : '',
+        title: title ? title.textContent : '',
+        like: count ? count.textContent : '',
+        type: isVideo ? '视频' : '图文'
+    };
+});
+"""
+
+@metrics.timed('get_note_info')
+def get_note_info(page, author, harvester=None):
+    """获取页面笔记信息
+
+    传入 harvester 时使用增量模式，只返回之前没有返回过的笔记
+    """
     notes = []
     
     try:
-        # 等待页面加载完成
-        time.sleep(2)
+        # 等待笔记卡片出现
+        waits.adaptive_wait(page, 'get_note_info', timeout=2)
         
-        # 获取所有笔记元素的基本信息
-        script = """
-        return Array.from(document.querySelectorAll('.note-item')).map(item => {
-            const link = item.querySelector('a');
-            const title = item.querySelector('.title');
-            const count = item.querySelector('.count');
-            const isVideo = item.querySelector('.play-icon') !== null;
-            
-            return {
-                href: link ? link.getAttribute('href') : '',
-                title: title ? title.textContent : '',
-                like: count ? count.textContent : '',
-                type: isVideo ? '视频' : '图文'
-            };
-        });
-        """
-        items = page.run_js(script)
+        if harvester is not None:
+            items = harvester.harvest(page)
+        else:
+            items = page.run_js(FULL_SCAN_SCRIPT)
         
         # 处理每个笔记
         for item in items:
@@ -83,12 +115,13 @@ def get_note_info():
             note_link = f"https://www.xiaohongshu.com{item['href']}"
             
             note = {
-                '作者': user_name,
+                '作者': author,
                 '笔记类型': item['type'],
                 '标题': item['title'],
                 '点赞数': item['like'],
                 '笔记链接': note_link
             }
+            note.update(extra_columns(item))
             notes.append(note)
             print(f"成功获取笔记: {item['title']} - {note_link}")
             
@@ -97,11 +130,19 @@ def get_note_info():
     
     return notes
 
-def page_scroll_down():
+@metrics.timed('page_scroll_down')
+def page_scroll_down(page):
     """改进的页面向下滚动"""
     print("********下滑页面********")
     
     try:
+        baseline = waits.probe(page)
+        
+        # 滚动会触发下一页请求，按账号限速
+        current_run().limiter().acquire()
+        # 先逐屏滚动，让虚拟列表中的每张卡片都挂载一次，由观察器收进缓冲区
+        scrolled = step_scroll(page)
+        
         # 使用多种滚动方式
         scroll_methods = [
             # 方法1: 使用JavaScript smooth scroll
@@ -124,11 +165,13 @@ def page_scroll_down():
             """
         ]
         
-        # 尝试不同的滚动方法
-        for scroll_script in scroll_methods:
+        # 逐屏滚动失败时尝试不同的滚动方法
+        if not scrolled:
+            metrics.count('scroll_fallbacks')
+        for scroll_script in ([] if scrolled else scroll_methods):
             try:
                 page.run_js(scroll_script)
-                time.sleep(1)
+                waits.adaptive_wait(page, 'scroll_method', timeout=1, baseline=baseline)
                 
                 # 检查是否成功滚动
                 new_height = page.run_js("return window.pageYOffset;")
@@ -137,8 +180,9 @@ def page_scroll_down():
             except:
                 continue
                 
-        # 等待内容加载
-        time.sleep(2)
+        # 等待新内容加载：出现新卡片或网络空闲即可继续
+        waits.adaptive_wait(page, 'page_scroll_down', timeout=2, baseline=baseline)
+        current_run().limiter().observe(page)
         
         # 检查是否需要点击"加载更多"按钮
         load_more_selectors = [
@@ -151,8 +195,10 @@ def page_scroll_down():
             try:
                 load_more = page.ele(f'xpath:{selector}', timeout=1)
                 if load_more:
+                    before_click = waits.probe(page)
+                    current_run().limiter().acquire()
                     load_more.click()
-                    time.sleep(2)
+                    waits.adaptive_wait(page, 'load_more', timeout=2, baseline=before_click)
                     break
             except:
                 continue
@@ -162,67 +208,138 @@ def page_scroll_down():
         # 出错时使用备用滚动方法
         try:
             page.run_js("window.scrollTo(0, document.documentElement.scrollHeight);")
-            time.sleep(2)
+            waits.adaptive_wait(page, 'page_scroll_down', timeout=2)
         except:
             pass
 
-def crawler(times, recorder):
-    """爬取数据"""
-    def safe_print(message):
-        try:
-            if hasattr(sys.stdout, 'write'):
-                sys.stdout.write(f"{message}\n")
-                if hasattr(sys.stdout, 'flush'):
-                    sys.stdout.flush()
-        except:
-            pass
-        logging.info(message)
-        
-    for i in range(1, times + 1):  # 移除tqdm
+# 停止原因
+STOP_REASONS = {
+    'target_reached': '已达到目标笔记数',
+    'reached_known': '已翻到上次采集过的笔记',
+    'no_new_notes': '连续多次翻页没有新笔记',
+    'end_of_feed': '已到达作者主页底部',
+    'page_limit': '已达到最大翻页次数',
+    'cancelled': '任务已取消',
+}
+
+def page_budget(note_num):
+    """最大翻页次数：只作为兜底上限，正常情况下会提前停止"""
+    return math.ceil(note_num / 10) + 5
+
+def crawler(page, author, times, recorder, incremental=True, harvester=None,
+            target=None, idle_limit=3, known_ids=None, known_streak=5, progress=None, cancel=None,
+            checkpoint=None, first_page=1, skip_seen=False, run=None):
+    """爬取数据，返回停止原因（见 STOP_REASONS）
+
+    incremental 为 True 时通过页面内观察器缓冲区采集，每页只记录新出现的笔记，
+    记录器中不会出现重复数据；也可以直接传入 harvester（如接口监听器）。
+    times 为最大翻页次数；达到 target 条不重复笔记、连续 idle_limit 次翻页没有取到任何笔记
+    或出现到底标记时提前停止。
+    传入 known_ids 时只记录其中没有的笔记，连续遇到 known_streak 条已知笔记即停止
+    （置顶笔记可能是已知的，所以不能遇到第一条就停）。
+    每页结束后调用 progress(pages=, total=, notes=, target=) 上报进度；cancel（threading.Event）
+    被设置时在翻下一页之前停止。
+    传入 checkpoint 时每页新记录的笔记随即写入检查点；first_page 为恢复时开始的页码。
+    每条笔记在全局笔记索引中标记是否首次采集（“新笔记”列），skip_seen 为 True 时不记录以前运行中采集过的笔记。
+    run（RunContext）为所属的运行，默认为当前线程所属的运行
+    """
+    run = run or current_run()
+    if harvester is None and incremental:
+        harvester = NoteBuffer()
+    reason = 'page_limit'
+    idle_rounds = 0
+    known_run = 0
+    i = 0
+    for i in range(first_page, times + 1):  # 移除tqdm
         safe_print(f"正在获取第 {i}/{times} 页")
-        notes = get_note_info()
+        notes = get_note_info(page, author, harvester)
+        # 翻页是否还有收获按过滤前的笔记判断：以前采集过的笔记被 known_ids、skip_seen 过滤掉时信息流并没有到头
+        harvested = bool(notes)
+        if known_ids is not None:
+            fresh = []
+            for note in notes:
+                if extract_note_id(note['笔记链接']) in known_ids:
+                    known_run += 1
+                else:
+                    known_run = 0
+                    fresh.append(note)
+            notes = fresh
+        if notes:
+            seen_notes().flag(notes, 'author', run.fresh_notes)
+            if skip_seen:
+                notes = [note for note in notes if note[FLAG_COLUMN] == '是']
         if notes:  # 只有在成功获取到笔记时才记录
+            before = len(recorder)
             recorder.add_data(notes)
-            safe_print(f"第 {i} 页获取到 {len(notes)} 条笔记")
+            run.metrics.count('notes_collected', len(recorder) - before)
+            safe_print(f"第 {i} 页获取到 {len(notes)} 条笔记，累计 {len(recorder)} 条")
+        else:
+            safe_print(f"第 {i} 页未获取到新笔记")
+        if checkpoint is not None:
+            checkpoint.save_page(i, notes)
+        run.waits.page_done()
+        if progress is not None:
+            progress(pages=i, total=times, notes=len(recorder), target=target)
+        
+        # 判断是否可以提前停止
+        idle_rounds = 0 if harvested else idle_rounds + 1
+        if target is not None and len(recorder) >= target:
+            reason = 'target_reached'
+        elif cancel is not None and cancel.is_set():
+            reason = 'cancelled'
+        elif known_ids and known_run >= known_streak:
+            reason = 'reached_known'
+        elif idle_rounds >= idle_limit:
+            reason = 'no_new_notes'
+        elif feed_exhausted(page, harvester):
+            reason = 'end_of_feed'
         else:
-            safe_print(f"第 {i} 页未获取到笔记")
-        page_scroll_down()
+            if i < times:
+                page_scroll_down(page)
+            continue
+        break
+    
+    safe_print(f"停止翻页：{STOP_REASONS[reason]}（共翻页 {i} 次，获取 {len(recorder)} 条笔记）")
+    return reason
 
-def convert_likes_to_number(like_str):
-    """将点赞数文本转换为数字"""
-    try:
-        if '万' in like_str:
-            return int(float(like_str.replace('万', '')) * 10000)
-        return int(like_str)
-    except:
-        return 0
+def new_note_writer():
+    """创建作者笔记记录器：按规范化笔记ID去重，互动数转为整数并按点赞数降序排列，导出时格式化为显示文本"""
+    return StreamingExcelWriter(
+        converters=count_converters(),
+        number_formats=count_number_formats(),
+        sort_by='点赞数',
+        width_padding=5,
+        key=note_key
+    )
+
+def enrich_writer(page, writer, tabs=3, run=None, lean=False):
+    """为已采集的笔记补充收藏、评论、分享数和发布时间，返回新的记录器"""
+    enriched = new_note_writer()
+    enriched.add_data(enrich_records(page, writer.records(), tabs=tabs, run=run, lean=lean))
+    return enriched
 
-def process_excel(init_file_path, author):
-    """处理Excel文件"""
+@metrics.timed('process_excel')
+def process_excel(writer, author):
+    """排序去重后一次性写出Excel文件"""
     try:
-        df = pd.read_excel(init_file_path)
-        print(f"获取{df.shape[0]}条笔记（含重复）")
-        
-        # 数据处理
-        df['点赞数'] = df['点赞数'].apply(convert_likes_to_number)
-        df = df.drop_duplicates()
-        df = df.sort_values(by='点赞数', ascending=False)
+        print(f"获取{writer.received}条笔记，去重后{len(writer)}条")
+        metrics.count('duplicates_discarded', writer.duplicates)
         
         # 生成新的文件名，加入时间戳避免重名
         timestamp = time.strftime("%H%M%S")
-        final_file_path = f"小红书作者主页所有笔记-{author}-{df.shape[0]}条-{timestamp}.xlsx"
+        final_file_path = f"小红书作者主页所有笔记-{author}-{len(writer)}条-{timestamp}.xlsx"
         
         try:
-            df.to_excel(final_file_path, index=False)
+            with metrics.stage('save_excel'):
+                writer.save(final_file_path)
         except PermissionError:
             print(f"无法写入文件 {final_file_path}，尝试使用备用文件名...")
             # 如果写入失败，尝试在文件名中加入随机数
             random_suffix = random.randint(1, 1000)
-            final_file_path = f"小红书作者主页所有笔记-{author}-{df.shape[0]}条-{timestamp}-{random_suffix}.xlsx"
-            df.to_excel(final_file_path, index=False)
+            final_file_path = f"小红书作者主页所有笔记-{author}-{len(writer)}条-{timestamp}-{random_suffix}.xlsx"
+            with metrics.stage('save_excel'):
+                writer.save(final_file_path)
         
-        # 调整列宽
-        auto_resize_column(final_file_path)
         print(f"数据已保存到：{final_file_path}")
         return final_file_path
         
@@ -230,91 +347,251 @@ def process_excel(init_file_path, author):
         print(f"处理Excel文件时出错: {str(e)}")
         return None
 
-def auto_resize_column(excel_path):
-    """自动调整Excel列宽"""
-    wb = openpyxl.load_workbook(excel_path)
-    ws = wb.active
-    for col in ws.iter_cols(min_col=1, max_col=5):
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                max_length = max(max_length, len(str(cell.value)))
-            except:
-                pass
-        ws.column_dimensions[column].width = max_length + 5
-    wb.save(excel_path)
+def crawl_author(page, author_url, note_num, capture='dom', index=None, progress=None, cancel=None,
+                 checkpoint=None, skip_seen=False, run=None):
+    """在指定页面（或标签页）中采集一位作者，返回 (作者昵称, 记录器)
+
+    capture 为 'api' 时通过网络监听直接解析笔记列表接口，否则从页面DOM采集；
+    传入 index（AuthorNoteIndex）时只采集上次运行以来的新笔记，保存成功后由 record_saved 并入作者历史；
+    progress、cancel、skip_seen、run 见 crawler；检查点中已有进度时读回已采集的笔记，快进滚过已完成的页后继续
+    """
+    writer = new_note_writer()
+    listener = FeedListener(USER_POSTED_API) if capture == 'api' else None
+    harvester = listener if listener is not None else NoteBuffer()
+    try:
+        author = open_author_page(page, author_url, listener)
+        done = checkpoint.page if checkpoint is not None else 0
+        if done:
+            writer.add_data(checkpoint.rows())
+            harvester.seen.update(checkpoint.seen_ids())
+            safe_print(f"已读回作者 {author} 的 {len(writer)} 条笔记，快进 {done} 页...")
+            fast_forward(page, done, harvester)
+    
+        author_id = extract_user_id(author_url)
+        known_ids = index.known_ids(author_id) if index is not None else None
+        if known_ids:
+            safe_print(f"开始获取作者 {author} 上次采集（{index.last_run(author_id)}）以来的新笔记...")
+        else:
+            known_ids = None
+            safe_print(f"开始获取作者 {author} 的笔记...")
+        crawler(page, author, page_budget(note_num), writer, harvester=harvester,
+                target=note_num, known_ids=known_ids, progress=progress, cancel=cancel,
+                checkpoint=checkpoint, first_page=done + 1, skip_seen=skip_seen, run=run)
+    finally:
+        # crawler 出错时也要停止监听
+        if listener is not None:
+            listener.stop(page)
+    return author, writer
 
-def delete_init_file(file_path):
-    """删除初始文件"""
-    if os.path.exists(file_path):
-        os.remove(file_path)
-        print(f"已删除初始化excel文件：{file_path}")
+def record_saved(author_url, author, writer, index=None):
+    """作者的笔记文件保存成功后把笔记记入全局笔记索引，传入 index 时并入作者历史
 
-def main(author_url=None, note_num=None):
+    保存失败时不记入，下次运行（since_last_run、skip_seen）仍会重新采集这些笔记
+    """
+    seen_notes().record(writer.records(), 'author')
+    if index is not None:
+        added = index.merge(extract_user_id(author_url), author, writer.records())
+        safe_print(f"作者 {author} 新增 {added} 条笔记已并入历史记录")
+
+def author_checkpoint(author_url):
+    """作者的采集检查点，按作者ID区分"""
+    return CrawlCheckpoint('author', extract_user_id(author_url) or author_url)
+
+def load_author_urls(source):
+    """读取作者主页链接：可以是链接列表，也可以是每行一个链接的文本文件"""
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            source = f.read().splitlines()
+    urls = []
+    for url in source:
+        url = url.strip()
+        if url and not url.startswith('#') and url not in urls:
+            urls.append(url)
+    return urls
+
+def save_combined(writers, timestamp):
+    """把所有作者的笔记写入一个汇总工作簿"""
+    combined = StreamingExcelWriter(sort_by='点赞数', width_padding=5, key=note_key,
+                                    number_formats=count_number_formats())
+    for writer in writers:
+        combined.add_data(writer.records())
+    final_file_path = f"小红书作者批量采集-汇总-{len(writers)}位作者-{len(combined)}条-{timestamp}.xlsx"
     try:
-        # 创建安全的输出函数
-        def safe_print(message):
+        combined.save(final_file_path, title='汇总')
+    except PermissionError:
+        random_suffix = random.randint(1, 1000)
+        final_file_path = final_file_path.replace('.xlsx', f'-{random_suffix}.xlsx')
+        combined.save(final_file_path, title='汇总')
+    return final_file_path
+
+def batch_main(author_urls, note_num=None, tabs=3, capture='dom', since_last_run=False,
+               enrich=False, page=None, progress=None, cancel=None, lean=False, resume=False,
+               skip_seen=False, account='default'):
+    """批量采集多位作者：只登录一次，用 tabs 个标签页并发采集，返回 {作者主页链接: 结果文件路径}
+
+    author_urls 为链接列表或链接文件路径；每位作者各有一个检查点并单独保存，另有一个汇总工作簿。其余参数同 main
+    """
+    outputs = {}
+    own_page = page is None
+    pool = None
+    checkpoints = {}
+    index = AuthorNoteIndex() if since_last_run else None
+    run = RunContext('author', account=account)
+    with run.activate():
+        try:
+            urls = load_author_urls(author_urls)
+            if not urls:
+                safe_print("没有需要采集的作者")
+                return outputs
+            if note_num is None:
+                note_num = 62
+        
+            if own_page:
+                safe_print("正在初始化...")
+                page = sign_in(account, lean=lean)
+                if page is None:
+                    return outputs
+            pool = TabPool(page, min(tabs, len(urls)), setup=tab_setup(lean))
+            safe_print(f"共 {len(urls)} 位作者，使用 {pool.size} 个标签页并发采集")
+        
+            author_progress = combine_progress(progress, len(urls), page_budget(note_num), note_num)
+        
+            def worker(tab, task):
+                i, url = task
+                if cancel is not None and cancel.is_set():
+                    return None
+                with run.activate():
+                    checkpoint = checkpoints[url] = author_checkpoint(url)
+                    checkpoint.start(resume)
+                    return crawl_author(tab, url, note_num, capture, index, author_progress(i), cancel, checkpoint,
+                                        skip_seen, run)
+        
+            # 等待标签页线程期间本线程空闲，不计入线程运行时间
+            with run.waits.paused():
+                results = run_on_tabs(pool, list(enumerate(urls)), worker)
+        
+            # 每位作者单独保存，并汇总到一个工作簿
+            writers = []
+            for url, result in zip(urls, results):
+                if result is None:
+                    safe_print(f"作者 {url} 未采集：任务已取消")
+                    continue
+                if isinstance(result, Exception):
+                    safe_print(f"作者 {url} 采集失败: {str(result)}")
+                    logging.error(f"作者 {url} 采集失败: {str(result)}")
+                    continue
+                author, writer = result
+                if enrich and not (cancel is not None and cancel.is_set()):
+                    writer = enrich_writer(page, writer, tabs, run, lean)
+                final_file_path = process_excel(writer, author)
+                if final_file_path:
+                    outputs[url] = final_file_path
+                    record_saved(url, author, writer, index)
+                    checkpoints[url].finish()
+                writers.append(writer)
+        
+            if writers:
+                combined_path = save_combined(writers, time.strftime("%H%M%S"))
+                safe_print(f"汇总数据已保存到：{combined_path}")
+            safe_print(f"成功采集 {len(outputs)}/{len(urls)} 位作者")
+            safe_print(run.report())
+            run.export()
+        
+        except Exception as e:
+            safe_print(f"批量采集出错: {str(e)}")
+            logging.error(f"批量采集出错: {str(e)}", exc_info=True)
+        finally:
             try:
-                if hasattr(sys.stdout, 'write'):
-                    sys.stdout.write(f"{message}\n")
-                    if hasattr(sys.stdout, 'flush'):
-                        sys.stdout.flush()
+                if pool is not None:
+                    pool.close()
+                if own_page and page is not None:
+                    quit_browser(page)
+                if index is not None:
+                    index.close()
+                for checkpoint in checkpoints.values():
+                    checkpoint.close()
             except:
                 pass
-            # 同时输出到日志文件
-            logging.info(message)
-        
-        # 第一次运行需要登录
-        safe_print("正在初始化...")
-        sign_in()
+        return outputs
+
+def main(author_url=None, note_num=None, capture='dom', since_last_run=False,
+         enrich=False, enrich_tabs=3, page=None, progress=None, cancel=None, lean=False, resume=False,
+         skip_seen=False, account='default'):
+    """采集作者主页笔记
+
+    since_last_run 为 True 时只采集上次运行以来的新笔记，capture 见 crawl_author，progress、cancel、skip_seen 见 crawler，
+    enrich 见 enrich_records，resume 见 CrawlCheckpoint.start，lean 见 BrowserSession.open，account 见 limiter；
+    传入 page 时跳过登录，结束后也不关闭浏览器
+    """
+    index = None
+    checkpoint = None
+    own_page = page is None
+    run = RunContext('author', account=account)
+    with run.activate():
+        try:
+            # 第一次运行需要登录
+            if own_page:
+                safe_print("正在初始化...")
+                page = sign_in(account, lean=lean)
+                if page is None:
+                    return
         
-        # 如果没有传入参数，使用默认值
-        if author_url is None:
-            author_url = "https://www.xiaohongshu.com/user/profile/5c56f621000000001a01f759"
-        if note_num is None:
-            note_num = 62
+            # 如果没有传入参数，使用默认值
+            if author_url is None:
+                author_url = "https://www.xiaohongshu.com/user/profile/5c56f621000000001a01f759"
+            if note_num is None:
+                note_num = 62
             
-        times = math.ceil(note_num / 20 * 1.1)
-        safe_print(f"需要执行翻页次数为：{times}")
-        
-        # 初始化保存文件
-        formatted_time = time.strftime("%Y-%m-%d %H%M%S")
-        init_file_path = f'小红书作者主页所有笔记-{formatted_time}.xlsx'
-        recorder = Recorder(path=init_file_path, cache_size=100)
+            safe_print(f"目标笔记数：{note_num}，最多翻页 {page_budget(note_num)} 次")
         
-        try:
-            # 执行爬取
-            author = open_author_page(author_url)
-            safe_print(f"开始获取作者 {author} 的笔记...")
-            crawler(times, recorder)
-            recorder.record()
+            try:
+                # 执行爬取
+                index = AuthorNoteIndex() if since_last_run else None
+                checkpoint = author_checkpoint(author_url)
+                checkpoint.start(resume)
+                author, writer = crawl_author(page, author_url, note_num, capture, index, progress, cancel,
+                                              checkpoint, skip_seen, run)
+                if enrich and not (cancel is not None and cancel.is_set()):
+                    writer = enrich_writer(page, writer, enrich_tabs, run, lean)
             
-            # 处理数据并保存
-            final_file_path = process_excel(init_file_path, author)
-            if final_file_path:
-                delete_init_file(init_file_path)
-                safe_print(f"数据已保存到：{final_file_path}")
+                # 处理数据并保存
+                final_file_path = process_excel(writer, author)
+                if final_file_path:
+                    safe_print(f"数据已保存到：{final_file_path}")
+                    record_saved(author_url, author, writer, index)
+                    checkpoint.finish()
+                safe_print(run.report())
+                run.export()
                 
-        except Exception as e:
-            safe_print(f"爬取过程出错: {str(e)}")
-            logging.error(f"爬取过程出错: {str(e)}", exc_info=True)
+            except Exception as e:
+                safe_print(f"爬取过程出错: {str(e)}")
+                logging.error(f"爬取过程出错: {str(e)}", exc_info=True)
             
-    except Exception as e:
-        error_msg = f"程序执行出错: {str(e)}"
-        logging.error(error_msg, exc_info=True)
-        try:
-            if hasattr(sys.stdout, 'write'):
-                sys.stdout.write(f"{error_msg}\n")
-        except:
-            pass
-    finally:
-        # 确保关闭浏览器
-        try:
-            if 'page' in globals():
-                page.quit()
-        except:
-            pass
+        except Exception as e:
+            error_msg = f"程序执行出错: {str(e)}"
+            logging.error(error_msg, exc_info=True)
+            try:
+                if hasattr(sys.stdout, 'write'):
+                    sys.stdout.write(f"{error_msg}\n")
+            except:
+                pass
+        finally:
+            # 确保关闭浏览器
+            try:
+                if own_page and page is not None:
+                    quit_browser(page)
+                if index is not None:
+                    index.close()
+                if checkpoint is not None:
+                    checkpoint.close()
+            except:
+                pass
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='小红书作者主页采集')
+    parser.add_argument('author_url', nargs='?', help='作者主页链接')
+    parser.add_argument('--notes', type=int, help='目标笔记数')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的检查点继续')
+    parser.add_argument('--skip-seen', action='store_true', help='跳过以前运行中采集过的笔记')
+    args = parser.parse_args()
+    main(args.author_url, args.notes, resume=args.resume, skip_seen=args.skip_seen)
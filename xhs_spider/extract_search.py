@@ -1,27 +1,72 @@
+import argparse
 import asyncio
-import json
 from datetime import datetime
 import random
 import base64
 import io
 import os
-from DrissionPage import ChromiumPage
-from DataRecorder import Recorder
 import pandas as pd
-from tqdm import tqdm
 import time
-import math
 from urllib.parse import quote
-import openpyxl
 import sys
 import logging
+from note_harvest import NoteBuffer, step_scroll, STEP_SCROLL_SCRIPT
+import waits
+from feed_api import FeedListener, SEARCH_NOTES_API, extra_columns
+from app_paths import get_executable_path
+from note_detail import enrich_records
+from tab_pool import TabPool, run_on_tabs
+from session import BrowserSession, quit_browser
+from jobs import combine_progress
+from lean import route_lean, tab_setup
+from checkpoint import CrawlCheckpoint, fast_forward
+from result_sink import DiskResultSink
+from global_index import FLAG_COLUMN, link_key, seen_notes
+from likes import count_converters, count_number_formats, format_count, format_count_cells, normalize_counts
+from metrics import metrics
+from run_context import RunContext, current_run
+
+# 站点地址，离线模拟器测试时可替换为本地地址
+BASE_URL = 'https://www.xiaohongshu.com'
+
+# Playwright 登录状态文件，多个浏览器上下文共享同一份登录状态
+STORAGE_STATE_FILE = 'playwright_state.json'
+
+# 没有 libs/stealth.min.js 时使用的最小反检测脚本
+FALLBACK_STEALTH_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+
+def as_function(script):
+    """把顶层 return 的页面脚本包装成 Playwright evaluate 可执行的函数"""
+    return f"() => {{{script}}}"
+
+def build_search_url(keyword):
+    """构造搜索结果页地址"""
+    return (
+        f'{BASE_URL}/search_result?'
+        f'keyword={quote(keyword)}&'
+        f'source=web_search_result_notes&'
+        f'type=51'
+    )
 
 class XHSSearchCrawler:
-    def __init__(self):
+    """asyncio + Playwright 搜索引擎
+
+    一个浏览器进程、每个关键词一个独立上下文并发搜索，上下文之间通过 storage_state 共享登录状态，
+    返回与 get_search_results 相同格式的记录。
+    lean 为 True 时拦截图片、视频和字体请求，已有登录状态文件时以无界面模式运行
+    （登录二维码是内嵌的 data URI，不受拦截影响）
+    """
+    def __init__(self, headless=False, concurrency=3, state_path=None, lean=False):
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        self.headless = headless
+        self.concurrency = max(1, concurrency)
+        self.state_path = state_path or os.path.join(get_executable_path(), STORAGE_STATE_FILE)
+        self.lean = lean
+        if lean and os.path.exists(self.state_path):
+            self.headless = True
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"
@@ -29,33 +74,56 @@ class XHSSearchCrawler:
         
     async def init(self):
         """初始化浏览器环境"""
+        # playwright 是可选依赖，只在选择该引擎时导入
+        from playwright.async_api import async_playwright
+        
         self.playwright = await async_playwright().start()
+        args = [
+            '--disable-blink-features=AutomationControlled',
+            '--no-sandbox'
+        ]
+        if not self.headless:
+            args.append('--start-maximized')
         self.browser = await self.playwright.chromium.launch(
-            headless=False,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--no-sandbox',
-                '--start-maximized'
-            ]
-        )
-        self.context = await self.browser.new_context(
-            viewport={"width": random.randint(1200, 1920), "height": random.randint(800, 1080)},
-            user_agent=random.choice(self.user_agents),
-            locale="zh-CN",
-            timezone_id="Asia/Shanghai"
+            headless=self.headless,
+            args=args
         )
-        await self.context.add_init_script(path="libs/stealth.min.js")
+        self.context = await self.new_context()
         self.page = await self.context.new_page()
         
+    async def new_context(self):
+        """创建浏览器上下文，已有登录状态文件时自动带上登录状态"""
+        options = {
+            'viewport': {"width": random.randint(1200, 1920), "height": random.randint(800, 1080)},
+            'user_agent': random.choice(self.user_agents),
+            'locale': "zh-CN",
+            'timezone_id': "Asia/Shanghai"
+        }
+        if os.path.exists(self.state_path):
+            options['storage_state'] = self.state_path
+        context = await self.browser.new_context(**options)
+        
+        stealth_path = os.path.join(get_executable_path(), 'libs', 'stealth.min.js')
+        if os.path.exists(stealth_path):
+            await context.add_init_script(path=stealth_path)
+        else:
+            await context.add_init_script(FALLBACK_STEALTH_SCRIPT)
+        if self.lean:
+            await route_lean(context)
+        return context
+        
     async def check_login_state(self):
         """检查登录状态"""
         try:
             # 先确保在小红书页面
             current_url = self.page.url
-            if not current_url.startswith("https://www.xiaohongshu.com"):
+            if not current_url.startswith(BASE_URL):
                 print("当前不在小红书页面，正在跳转...")
-                await self.page.goto("https://www.xiaohongshu.com/explore", timeout=30000)
-                await asyncio.sleep(3)
+                await self.page.goto(f"{BASE_URL}/explore", timeout=30000)
+                try:
+                    await self.page.wait_for_load_state('networkidle', timeout=3000)
+                except Exception:
+                    pass
 
             # 更严格的登录检查
             checks = [
@@ -88,13 +156,18 @@ class XHSSearchCrawler:
             print(f"登录状态检查出错：{str(e)}")
             return False
 
-    async def login(self, max_retry=3):
-        """修改后的登录流程"""
+    async def save_login_state(self):
+        """保存登录状态，供其他上下文和下次运行复用"""
+        await self.context.storage_state(path=self.state_path)
+
+    async def login(self):
+        """登录并保存登录状态"""
         try:
-            await self.page.goto("https://www.xiaohongshu.com/explore", timeout=60000)
+            await self.page.goto(f"{BASE_URL}/explore", timeout=60000)
             
             if await self.check_login_state():
                 print("当前已登录")
+                await self.save_login_state()
                 return True
             
             # 触发登录弹窗
@@ -114,11 +187,7 @@ class XHSSearchCrawler:
             # 显示二维码
             if qr_src:
                 base64_img = qr_src.split("base64,")[-1]
-                if not os.environ.get('DISPLAY'):
-                    print(f"BASE64二维码:\n{base64_img[:100]}...")
-                else:
-                    img = Image.open(io.BytesIO(base64.b64decode(base64_img)))
-                    img.show()
+                self.show_qrcode(base64_img)
                 print("请扫码登录（60秒内有效）...")
 
                 # 等待登录成功
@@ -127,14 +196,30 @@ class XHSSearchCrawler:
                     timeout=60000
                 )
                 print("登录成功！")
-                await asyncio.sleep(3)
+                await self.save_login_state()
                 return True
+            return False
                 
         except Exception as e:
             print(f"登录失败：{str(e)}")
             await self.page.screenshot(path=f"login_fail_{datetime.now().strftime('%Y%m%d%H%M%S')}.png")
             return False
 
+    def show_qrcode(self, base64_img):
+        """显示登录二维码：有图形界面且安装了 Pillow 时直接打开，否则保存为图片文件"""
+        data = base64.b64decode(base64_img)
+        if os.environ.get('DISPLAY') or sys.platform.startswith('win') or sys.platform == 'darwin':
+            try:
+                from PIL import Image
+                Image.open(io.BytesIO(data)).show()
+                return
+            except ImportError:
+                pass
+        qr_path = os.path.join(get_executable_path(), 'login_qrcode.png')
+        with open(qr_path, 'wb') as f:
+            f.write(data)
+        print(f"二维码已保存到：{qr_path}")
+
     async def safe_click(self, selector, timeout=15000, max_retry=3):
         """带重试的安全点击"""
         for _ in range(max_retry):
@@ -145,86 +230,97 @@ class XHSSearchCrawler:
                     timeout=timeout
                 )
                 await element.scroll_into_view_if_needed()
+                await current_run().limiter().acquire_async()
                 await element.click(delay=random.uniform(100, 300))
                 return True
             except:
                 await asyncio.sleep(1)
         return False
 
-    async def search(self, keyword: str, max_pages: int = 1) -> list:
-        """修复版搜索功能"""
+    async def scroll(self, page):
+        """逐屏滚动到底部，等待新内容加载；滚动会触发下一页请求，按账号限速"""
+        await current_run().limiter().acquire_async()
+        for _ in range(10):
+            state = await page.evaluate(as_function(STEP_SCROLL_SCRIPT)) or {}
+            if not state.get('moved'):
+                break
+            await asyncio.sleep(0.15)
+            if state.get('bottom'):
+                break
         try:
-            # 定位搜索入口
-            search_selectors = [
-                'xpath=//input[@placeholder="搜索"]',
-                'xpath=//div[contains(@class,"search-bar")]',
-                'xpath=//button[contains(@class,"search-btn")]'
-            ]
-            
-            for selector in search_selectors:
-                if await self.safe_click(selector, timeout=10000):
-                    break
-            else:
-                raise Exception("未找到搜索入口")
-
-            # 输入关键词
-            input_selector = 'xpath=//input[@type="search" and @placeholder="搜索"]'
-            await self.page.wait_for_selector(input_selector, state="visible", timeout=15000)
-            await self.page.type(
-                input_selector,
-                keyword,
-                delay=random.uniform(50, 150)  # 模拟真人输入
-            )
-            await self.page.keyboard.press("Enter")
-            
-            # 等待结果加载
-            await self.page.wait_for_selector(
-                'xpath=//div[contains(@class,"note-item")]',
-                timeout=20000
-            )
-            print("已进入搜索结果页")
+            await page.wait_for_load_state('networkidle', timeout=3000)
+        except Exception:
+            pass
+        await current_run().limiter().observe_async(page)
+
+    async def search(self, keyword: str, max_pages: int = 1, page=None, progress=None, cancel=None,
+                     skip_seen=False) -> list:
+        """在指定页面中搜索关键词，返回与 get_search_results 相同格式的结果
+
+        progress、cancel、skip_seen 与 crawl_keyword 相同
+        """
+        page = page or self.page
+        buffer = new_search_buffer()
+        try:
+            await current_run().limiter().acquire_async()
+            await page.goto(build_search_url(keyword), timeout=60000)
+            try:
+                await page.wait_for_selector('.feeds-page .note-item', timeout=20000)
+            finally:
+                await current_run().limiter().observe_async(page, expect_items=True)
+            print(f"[{keyword}] 已进入搜索结果页")
 
-            # 滚动加载
             results = []
-            last_count = 0
-            for _ in range(max_pages):
-                # 动态滚动
-                for _ in range(3):
-                    await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await asyncio.sleep(random.uniform(2.0, 3.5))
-                    
-                # 提取数据
-                notes = await self.page.query_selector_all(
-                    'xpath=//div[contains(@class,"note-item")]'
-                )
-                print(f"当前页获取到 {len(notes)} 条结果")
-                
-                for note in notes:
-                    try:
-                        title = await note.query_selector("xpath=.//h3")
-                        link = await note.query_selector("xpath=.//a[contains(@href,'/explore/')]")
-                        result = {
-                            "title": (await title.text_content()).strip() if title else "",
-                            "url": f"https://www.xiaohongshu.com{await link.get_attribute('href')}" if link else "",
-                            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        results.append(result)
-                    except:
-                        continue
-                
-                # 页数控制
-                if len(notes) <= last_count:
+            for i in range(max_pages):
+                raw = await page.evaluate(as_function(buffer.script))
+                items = [format_search_item(item) for item in buffer.accept(raw)]
+                if len(buffer) == 0:
+                    # 缓冲区没有收到任何笔记时回退到全量扫描
+                    items = await page.evaluate(as_function(SEARCH_RESULT_SCRIPT))
+                page_results = clean_results(items)
+                seen_notes().flag(page_results, 'search', current_run().fresh_notes)
+                if skip_seen:
+                    page_results = [item for item in page_results if item[FLAG_COLUMN] == '是']
+                results.extend(page_results)
+                print(f"[{keyword}] 第 {i+1}/{max_pages} 页获取到 {len(page_results)} 条结果")
+                if progress is not None:
+                    progress(pages=i + 1, total=max_pages, notes=len(results))
+                if cancel is not None and cancel.is_set():
+                    print(f"[{keyword}] 任务已取消，保留已采集的 {len(results)} 条结果")
                     break
-                last_count = len(notes)
-                await asyncio.sleep(random.uniform(1.5, 2.5))
+                
+                if i < max_pages - 1:
+                    await self.scroll(page)
 
             return results
             
         except Exception as e:
-            print(f"搜索出错：{str(e)}")
-            await self.page.screenshot(path=f"search_error_{datetime.now().strftime('%Y%m%d%H%M%S')}.png")
+            print(f"[{keyword}] 搜索出错：{str(e)}")
+            await page.screenshot(path=f"search_error_{datetime.now().strftime('%Y%m%d%H%M%S')}.png")
             return []
 
+    async def search_many(self, keywords, max_pages=1, progress=None, cancel=None, skip_seen=False):
+        """并发搜索多个关键词，返回 {关键词: 结果列表}
+
+        progress 汇总上报全部关键词的进度，cancel 被设置后不再开始新的关键词
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        keyword_progress = combine_progress(progress, len(keywords), max_pages)
+
+        async def search_in_context(i, keyword):
+            async with semaphore:
+                if cancel is not None and cancel.is_set():
+                    return []
+                context = await self.new_context()
+                try:
+                    page = await context.new_page()
+                    return await self.search(keyword, max_pages, page, keyword_progress(i), cancel, skip_seen)
+                finally:
+                    await context.close()
+
+        results = await asyncio.gather(*(search_in_context(i, keyword) for i, keyword in enumerate(keywords)))
+        return dict(zip(keywords, results))
+
     async def close(self):
         """关闭资源"""
         if self.browser:
@@ -232,67 +328,83 @@ class XHSSearchCrawler:
         if self.playwright:
             await self.playwright.stop()
 
-def countdown(n):
-    """倒计时函数"""
-    for i in range(n, 0, -1):
-        print(f'\r倒计时{i}秒', end='')
-        time.sleep(1)
-    print('\r倒计时结束')
+def run_playwright_search(keywords, pages=1, concurrency=3, headless=False, lean=False, progress=None,
+                          cancel=None, skip_seen=False):
+    """用 Playwright 引擎在一个事件循环中并发搜索多个关键词，返回 {关键词: 结果列表}
 
-def search_keyword(page, keyword):
-    """搜索关键词"""
+    progress、cancel、skip_seen 见 XHSSearchCrawler.search_many
+    """
+    async def run():
+        crawler = XHSSearchCrawler(headless=headless, concurrency=concurrency, lean=lean)
+        try:
+            await crawler.init()
+            if not await crawler.login():
+                print("登录失败，程序退出")
+                return {}
+            return await crawler.search_many(keywords, pages, progress, cancel, skip_seen)
+        finally:
+            await crawler.close()
+    
+    return asyncio.run(run())
+
+def safe_print(message):
+    """安全输出：GUI重定向的标准输出可能不可用，同时写入日志"""
+    try:
+        if hasattr(sys.stdout, 'write'):
+            sys.stdout.write(f"{message}\n")
+            if hasattr(sys.stdout, 'flush'):
+                sys.stdout.flush()
+    except:
+        pass
+    logging.info(message)
+
+# 可选的采集引擎：DrissionPage 标签页，或在一个事件循环中并发的异步 Playwright
+ENGINES = ('drission', 'playwright')
+
+# 搜索结果就绪的候选选择器，按优先级排列
+SEARCH_READY_SELECTORS = [
+    'xpath://div[contains(@class, "note-item")]',  # 通用笔记项
+    'xpath://div[contains(@class, "feeds-page")]//a[contains(@href, "/explore/")]',  # 笔记链接
+    'xpath://div[contains(@class, "content")]//a[contains(@href, "/explore/")]',  # 备用笔记链接
+    'xpath://div[contains(@class, "search-container")]//div[contains(@class, "note-item")]',  # 搜索容器
+    'div[class*="note-item"], a[href*="/explore/"]',  # 兜底
+]
+
+# 登录状态相关元素：登录弹窗（未登录标志）、头像、用户名
+LOGIN_SELECTORS = [
+    'xpath://div[contains(@class,"login-modal")]',
+    'xpath://div[contains(@class,"avatar")]',
+    'xpath://div[contains(@class,"user-name")]',
+]
+
+@metrics.timed('search_keyword')
+def search_keyword(page, keyword, listener=None):
+    """搜索关键词
+
+    传入 listener 时在跳转前开始监听搜索结果接口
+    """
     try:
         # 直接访问搜索结果页面
-        encoded_keyword = quote(keyword)  # 使用 urllib.parse.quote 进行编码
-        
-        # 构造完整的搜索URL
-        search_url = (
-            f'https://www.xiaohongshu.com/search_result?'
-            f'keyword={encoded_keyword}&'
-            f'source=web_search_result_notes&'
-            f'type=51'
-        )
+        search_url = build_search_url(keyword)
         print(f"正在跳转到搜索页面: {search_url}")
+        if listener is not None:
+            listener.start(page)
+        current_run().limiter().acquire()
         page.get(search_url)
-        time.sleep(5)  # 增加等待时间
         
         # 验证搜索结果页面
         if 'search_result' in page.url:
             print("成功进入搜索结果页面")
             
-            # 等待搜索结果加载
-            selectors = [
-                'xpath://div[contains(@class, "note-item")]',  # 通用笔记项
-                'xpath://div[contains(@class, "feeds-page")]//a[contains(@href, "/explore/")]',  # 笔记链接
-                'xpath://div[contains(@class, "content")]//a[contains(@href, "/explore/")]',  # 备用笔记链接
-                'xpath://div[contains(@class, "search-container")]//div[contains(@class, "note-item")]'  # 搜索容器
-            ]
-            
-            # 增加重试机制
-            max_retries = 3
-            for _ in range(max_retries):
-                for selector in selectors:
-                    try:
-                        elements = page.eles(selector, timeout=5)
-                        if elements:
-                            print(f"找到 {len(elements)} 个搜索结果")
-                            return True
-                    except:
-                        continue
-                
-                print("未找到结果，等待页面加载...")
-                time.sleep(2)
-            
-            # 如果多次重试后仍未找到结果，尝试执行JavaScript检查
-            try:
-                note_count = page.run_js("""
-                    return document.querySelectorAll('div[class*="note-item"], a[href*="/explore/"]').length;
-                """)
-                if note_count > 0:
-                    print(f"通过JavaScript检测到 {note_count} 个结果")
-                    return True
-            except:
-                pass
+            # 全部候选选择器在同一截止时间内竞速，任意一个出现即可继续
+            ready = waits.wait_for_any(page, SEARCH_READY_SELECTORS, timeout=15, label='search_keyword')
+            current_run().limiter().observe(page, expect_items=True)
+            if ready.selector:
+                if ready.selector != SEARCH_READY_SELECTORS[0]:
+                    metrics.count('selector_fallbacks')
+                count = ready.counts[SEARCH_READY_SELECTORS.index(ready.selector)]
+                print(f"找到 {count} 个搜索结果（耗时 {ready.elapsed:.2f}s）")
+                return True
             
             print("未检测到搜索结果")
             return False
@@ -305,21 +417,16 @@ def search_keyword(page, keyword):
         print(f"搜索失败：{str(e)}")
         return False
 
-def check_login_status(page):
+def check_login_status(page, timeout=3):
     """检查登录状态"""
     try:
-        # 等待页面加载
-        time.sleep(3)
-        
-        # 多重检查登录状态
-        checks = [
-            # 检查登录弹窗是否存在（未登录标志）
-            not page.ele('xpath://div[contains(@class,"login-modal")]', timeout=1),
-            # 检查头像是否存在
-            page.ele('xpath://div[contains(@class,"avatar")]', timeout=1) is not None,
-            # 检查用户名是否存在
-            page.ele('xpath://div[contains(@class,"user-name")]', timeout=1) is not None
-        ]
+        # 页面元素渲染先后不定，等到截止时间（出现登录弹窗时提前结束）再一起检查三项
+        ready = waits.wait_for_markers(page, LOGIN_SELECTORS, timeout=timeout, label='check_login_status',
+                                       stop_on=LOGIN_SELECTORS[:1])
+        modal, avatar, user_name = (count > 0 for count in ready.counts)
+        
+        # 多重检查登录状态：没有登录弹窗、存在头像、存在用户名
+        checks = [not modal, avatar, user_name]
         
         # 至少需要两个条件满足才认为是已登录
         login_status = sum(checks) >= 2
@@ -335,85 +442,126 @@ def check_login_status(page):
         print(f"登录状态检查出错: {str(e)}")
         return False
 
-def get_search_results(page):
-    """获取搜索结果信息"""
+# 使用更精确的JavaScript选择器获取搜索结果
+SEARCH_RESULT_SCRIPT = """
+return Array.from(document.querySelectorAll('.feeds-page .note-item')).map(item => {
+    // 获取笔记链接和ID
+    const link = item.querySelector('a[href*="/explore/"]');
+    const href = link ? link.getAttribute('href') : '';
+    
+    // 获取标题
+    const title = item.querySelector('.title');
+    
+    // 获取作者信息
+    const authorElement = item.querySelector('.author');
+    const authorLink = authorElement ? authorElement.closest('a[href*="/user/profile/"]') : null;
+    
+    // 获取点赞数
+    const likeElement = item.querySelector('.like-wrapper .count, .interaction-info .count');
+    
+    // 检查是否为视频
+    const isVideo = item.querySelector('.play-icon') !== null;
+    
+    return {
+        '标题': title ? title.textContent.trim() : '',
+        '作者': authorElement ? authorElement.textContent.trim() : '',
+        '笔记类型': isVideo ? '视频' : '图文',
+        '点赞数': likeElement ? likeElement.textContent.trim() : '0',
+        '笔记链接': href ? 'https://www.xiaohongshu.com' + href : '',
+        '作者主页': authorLink ? 'https://www.xiaohongshu.com' + authorLink.getAttribute('href') : ''
+    };
+});
+"""
+
+# 备用方法：使用更宽松的选择器
+BACKUP_SEARCH_RESULT_SCRIPT = """
+return Array.from(document.querySelectorAll('div[class*="note-item"]')).map(item => {
+    const link = item.querySelector('a');
+    const title = item.querySelector('div[class*="title"]');
+    const author = item.querySelector('div[class*="author"]');
+    const authorLink = author ? author.closest('a') : null;
+    const likeCount = item.querySelector('span[class*="count"]');
+    const isVideo = item.querySelector('div[class*="play"]') !== null;
+    
+    return {
+        '标题': title ? title.textContent.trim() : '',
+        '作者': author ? author.textContent.trim() : '',
+        '笔记类型': isVideo ? '视频' : '图文',
+        '点赞数': likeCount ? likeCount.textContent.trim() : '0',
+        '笔记链接': link ? 'https://www.xiaohongshu.com' + link.getAttribute('href') : '',
+        '作者主页': authorLink ? 'https://www.xiaohongshu.com' + authorLink.getAttribute('href') : ''
+    };
+});
+"""
+
+def new_search_buffer():
+    """创建搜索结果页的笔记缓冲区"""
+    return NoteBuffer(item_selector='.feeds-page .note-item', link_selector='a[href*="/explore/"]')
+
+def format_search_item(item):
+    """把缓冲区（或接口监听器）的原始字段转换为搜索结果格式"""
+    return {
+        '标题': item['title'].strip(),
+        '作者': item['author'].strip(),
+        '笔记类型': item['type'],
+        '点赞数': item['like'].strip() or '0',
+        '笔记链接': 'https://www.xiaohongshu.com' + item['href'],
+        '作者主页': 'https://www.xiaohongshu.com' + item['authorHref'] if item['authorHref'] else '',
+        **extra_columns(item)
+    }
+
+def drain_search_buffer(page, buffer):
+    """取走缓冲区（或接口监听器）中的新笔记并转换为搜索结果格式"""
+    return [format_search_item(item) for item in buffer.harvest(page)]
+
+def clean_results(items):
+    """清理并筛选有效的搜索结果"""
     results = []
-    try:
-        # 等待页面加载
-        time.sleep(3)
-        
-        # 使用更精确的JavaScript选择器获取搜索结果
-        script = """
-        return Array.from(document.querySelectorAll('.feeds-page .note-item')).map(item => {
-            // 获取笔记链接和ID
-            const link = item.querySelector('a[href*="/explore/"]');
-            const href = link ? link.getAttribute('href') : '';
-            
-            // 获取标题
-            const title = item.querySelector('.title');
-            
-            // 获取作者信息
-            const authorElement = item.querySelector('.author');
-            const authorLink = authorElement ? authorElement.closest('a[href*="/user/profile/"]') : null;
+    for item in items or []:
+        if item['笔记链接'] and item['标题']:  # 只添加有效的结果
+            # 清理数据
+            item['标题'] = item['标题'].strip()
+            item['作者'] = item['作者'].strip()
+            item['点赞数'] = item['点赞数'].strip()
             
-            // 获取点赞数
-            const likeElement = item.querySelector('.like-wrapper .count, .interaction-info .count');
-            
-            // 检查是否为视频
-            const isVideo = item.querySelector('.play-icon') !== null;
-            
-            return {
-                '标题': title ? title.textContent.trim() : '',
-                '作者': authorElement ? authorElement.textContent.trim() : '',
-                '笔记类型': isVideo ? '视频' : '图文',
-                '点赞数': likeElement ? likeElement.textContent.trim() : '0',
-                '笔记链接': href ? 'https://www.xiaohongshu.com' + href : '',
-                '作者主页': authorLink ? 'https://www.xiaohongshu.com' + authorLink.getAttribute('href') : ''
-            };
-        });
-        """
+            # 验证链接格式
+            if '/explore/' in item['笔记链接']:
+                results.append(item)
+                print(f"获取到笔记: {item['标题'][:30]}... | 作者: {item['作者']} | 点赞: {item['点赞数']}")
+    return results
+
+@metrics.timed('get_search_results')
+def get_search_results(page, buffer=None):
+    """获取搜索结果信息
+
+    传入 buffer 时从页面内观察器缓冲区取走新挂载的笔记，只返回之前没有返回过的结果
+    """
+    results = []
+    try:
+        # 等待笔记卡片出现
+        waits.adaptive_wait(page, 'get_search_results', timeout=3)
         
-        items = page.run_js(script)
+        items = []
+        if buffer is not None:
+            items = drain_search_buffer(page, buffer)
+        if buffer is None or len(buffer) == 0:
+            # 缓冲区还没有收到任何笔记时回退到全量扫描
+            if buffer is not None:
+                metrics.count('selector_fallbacks')
+            items = page.run_js(SEARCH_RESULT_SCRIPT)
         
         if not items:
             print("未通过主方法获取到结果，尝试备用方法...")
-            # 备用方法：使用更宽松的选择器
-            backup_script = """
-            return Array.from(document.querySelectorAll('div[class*="note-item"]')).map(item => {
-                const link = item.querySelector('a');
-                const title = item.querySelector('div[class*="title"]');
-                const author = item.querySelector('div[class*="author"]');
-                const authorLink = author ? author.closest('a') : null;
-                const likeCount = item.querySelector('span[class*="count"]');
-                const isVideo = item.querySelector('div[class*="play"]') !== null;
-                
-                return {
-                    '标题': title ? title.textContent.trim() : '',
-                    '作者': author ? author.textContent.trim() : '',
-                    '笔记类型': isVideo ? '视频' : '图文',
-                    '点赞数': likeCount ? likeCount.textContent.trim() : '0',
-                    '笔记链接': link ? 'https://www.xiaohongshu.com' + link.getAttribute('href') : '',
-                    '作者主页': authorLink ? 'https://www.xiaohongshu.com' + authorLink.getAttribute('href') : ''
-                };
-            });
-            """
-            items = page.run_js(backup_script)
+            metrics.count('selector_fallbacks')
+            items = page.run_js(BACKUP_SEARCH_RESULT_SCRIPT)
         
         # 处理结果
-        for item in items:
-            if item['笔记链接'] and item['标题']:  # 只添加有效的结果
-                # 清理数据
-                item['标题'] = item['标题'].strip()
-                item['作者'] = item['作者'].strip()
-                item['点赞数'] = item['点赞数'].strip()
-                
-                # 验证链接格式
-                if '/explore/' in item['笔记链接']:
-                    results.append(item)
-                    print(f"获取到笔记: {item['标题'][:30]}... | 作者: {item['作者']} | 点赞: {item['点赞数']}")
+        results = clean_results(items)
         
         if results:
             print(f"本页共获取到 {len(results)} 条有效结果")
+        elif buffer is not None and len(buffer) > 0:
+            print("本页没有新出现的笔记")
         else:
             print("本页未获取到有效结果，可能是页面结构发生变化")
             # 保存页面源码以供调试
@@ -435,236 +583,458 @@ def get_search_results(page):
         
     return results
 
+@metrics.timed('page_scroll_down')
 def page_scroll_down(page):
     """页面向下滚动"""
     print("********下滑页面********")
     
-    script = """
-    window.scrollTo({
-        top: document.documentElement.scrollHeight,
-        behavior: 'smooth'
-    });
-    """
-    page.run_js(script)
-    time.sleep(3)
+    baseline = waits.probe(page)
+    
+    # 滚动会触发下一页请求，按账号限速
+    current_run().limiter().acquire()
+    # 逐屏滚动，让虚拟列表中的每张卡片都挂载一次，由观察器收进缓冲区
+    if not step_scroll(page):
+        metrics.count('scroll_fallbacks')
+        script = """
+        window.scrollTo({
+            top: document.documentElement.scrollHeight,
+            behavior: 'smooth'
+        });
+        """
+        page.run_js(script)
+    # 等待新内容加载：出现新卡片或网络空闲即可继续
+    waits.adaptive_wait(page, 'page_scroll_down', timeout=3, baseline=baseline)
+    current_run().limiter().observe(page)
 
-def process_excel(file_path, keyword):
-    """处理Excel文件"""
+def save_search_results(all_results, keyword):
+    """去重、按点赞数排序后保存搜索结果"""
+    # 生成文件名
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    filename = f'小红书搜索结果_{keyword}_{len(all_results)}条_{timestamp}.xlsx'
+    
     try:
-        df = pd.read_excel(file_path)
-        print(f"获取{df.shape[0]}条搜索结果（含重复）")
-        
-        # 数据处理
-        df = df.drop_duplicates()
-        
-        # 将点赞数转换为数值类型并处理"万"单位
-        def convert_likes(like_str):
-            try:
-                if isinstance(like_str, str):
-                    if '万' in like_str:
-                        return float(like_str.replace('万', '')) * 10000
-                    return float(like_str)
-                return float(like_str)
-            except:
-                return 0
+        # 转换为DataFrame并处理数据
+        df = pd.DataFrame(all_results)
+        # 按规范化笔记ID去重，链接中的 xsec_token 等查询参数不影响判断
+        df = df[~df['笔记链接'].map(link_key).duplicated()]
+        metrics.count('duplicates_discarded', len(all_results) - len(df))
         
-        # 转换点赞数并排序
-        df['点赞数'] = df['点赞数'].apply(convert_likes)
+        # 互动数转换为整数列后按点赞数排序，写出时由数字格式显示为“1.2万”
+        normalize_counts(df)
         df = df.sort_values(by='点赞数', ascending=False)
         
-        # 将点赞数重新格式化为易读格式
-        def format_likes(num):
-            if num >= 10000:
-                return f"{num/10000:.1f}万"
-            return str(int(num))
+        # 保存文件
+        save_path = save_excel(df, filename)
+        safe_print(f"数据已成功保存到：{save_path}")
         
-        df['点赞数'] = df['点赞数'].apply(format_likes)
+        # 显示统计信息
+        safe_print("\n数据统计：")
+        safe_print(f"原始数据条数：{len(all_results)}")
+        safe_print(f"去重后条数：{len(df)}")
+        safe_print("\n排序后的前5条结果：")
+        for _, row in df.head().iterrows():
+            safe_print(f"标题: {row['标题'][:30]}... 点赞数: {format_count(row['点赞数'])}")
+        return save_path
         
-        # 生成新文件名
-        timestamp = time.strftime("%H%M%S")
-        final_file_path = f"小红书搜索结果-{keyword}-{df.shape[0]}条-{timestamp}.xlsx"
+    except Exception as e:
+        safe_print(f"保存Excel文件时出错: {str(e)}")
+        backup_filename = f'小红书搜索结果_{keyword}_{int(time.time())}.xlsx'
+        backup_path = save_excel(df, backup_filename)
+        safe_print(f"数据已保存到备用文件：{backup_path}")
+        return backup_path
+
+@metrics.timed('save_excel')
+def save_stream_results(sink, keyword, top=None):
+    """把落盘的搜索结果按点赞数降序写出，top 为只导出的前几条"""
+    count = min(len(sink), top) if top else len(sink)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    save_path = os.path.join(get_executable_path(), f'小红书搜索结果_{keyword}_{count}条_{timestamp}.xlsx')
+    metrics.count('duplicates_discarded', sink.duplicates)
+    try:
+        sink.save(save_path, top=top)
+    except PermissionError:
+        save_path = save_path.replace('.xlsx', f'-{random.randint(1, 1000)}.xlsx')
+        sink.save(save_path, top=top)
+    safe_print(f"数据已成功保存到：{save_path}")
+    
+    safe_print("\n数据统计：")
+    safe_print(f"原始数据条数：{sink.received}")
+    if sink.unlinked:
+        safe_print(f"缺少笔记链接而丢弃：{sink.unlinked} 条")
+    safe_print(f"去重后条数：{len(sink)}，导出 {count} 条")
+    safe_print("\n排序后的前5条结果：")
+    for row in sink.records(top=5):
+        safe_print(f"标题: {row.get('标题', '')[:30]}... 点赞数: {format_count(row.get('点赞数'))}")
+    return save_path
+
+def crawl_keyword(page, keyword, pages, capture='dom', progress=None, cancel=None, checkpoint=None,
+                  sink=None, skip_seen=False, run=None):
+    """在指定页面（或标签页）中采集一个关键词的前 pages 页搜索结果
+
+    capture 为 'api' 时通过网络监听直接解析搜索结果接口，否则从页面DOM采集。
+    每页结束后调用 progress(pages=, total=, notes=) 上报进度；cancel（threading.Event）
+    被设置时在翻下一页之前停止，返回已采集的结果。
+    传入 checkpoint（CrawlCheckpoint）时每页结果随即写入检查点；检查点中已有进度时
+    先读回已采集的结果，快进滚过已完成的页，再从下一页继续。
+    传入 sink（DiskResultSink）时结果逐页写入 sink，不在内存中累积，返回空列表。
+    每条结果在全局笔记索引中标记是否首次采集（“新笔记”列），skip_seen 为 True 时丢弃以前运行中采集过的笔记。
+    run（RunContext）为所属的运行，默认为当前线程所属的运行
+    """
+    run = run or current_run()
+    all_results = []
+    collected = sink if sink is not None else all_results
+
+    def collect(results):
+        if sink is not None:
+            sink.add(results)
+        else:
+            all_results.extend(results)
+
+    done = checkpoint.page if checkpoint is not None else 0
+    if done:
+        collect(checkpoint.rows())
+    listener = FeedListener(SEARCH_NOTES_API) if capture == 'api' else None
+    try:
+        # search_keyword 在跳转前就开始监听，搜索失败时也要在 finally 中停止
+        if not search_keyword(page, keyword, listener):
+            return all_results
         
-        try:
-            # 调整列的顺序
-            columns_order = ['标题', '作者', '笔记类型', '点赞数', '笔记链接', '作者主页']
-            df = df[columns_order]
-            
-            df.to_excel(final_file_path, index=False)
+        buffer = listener if listener is not None else new_search_buffer()
+        if done:
+            buffer.seen.update(checkpoint.seen_ids())
+            safe_print(f"[{keyword}] 已读回 {len(collected)} 条结果，快进 {done} 页...")
+            fast_forward(page, done, buffer)
+        # 爬取搜索结果
+        for i in range(done, pages):
+            safe_print(f"[{keyword}] 正在获取第 {i+1}/{pages} 页")
+            results = get_search_results(page, buffer)
+            if results:
+                seen_notes().flag(results, 'search', run.fresh_notes)
+                if skip_seen:
+                    results = [item for item in results if item[FLAG_COLUMN] == '是']
+            if results:
+                safe_print(f"[{keyword}] 第 {i+1} 页获取到 {len(results)} 条结果")
+                collect(results)
+                run.metrics.count('notes_collected', len(results))
+            else:
+                safe_print(f"[{keyword}] 第 {i+1} 页没有获取到新结果")
+            if checkpoint is not None:
+                checkpoint.save_page(i + 1, results)
             
-            # 调整Excel列宽
-            wb = openpyxl.load_workbook(final_file_path)
-            ws = wb.active
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                ws.column_dimensions[column].width = max_length + 2
-            wb.save(final_file_path)
+            run.waits.page_done()
+            if progress is not None:
+                progress(pages=i + 1, total=pages, notes=len(collected))
+            if cancel is not None and cancel.is_set():
+                safe_print(f"[{keyword}] 任务已取消，保留已采集的 {len(collected)} 条结果")
+                break
             
-        except PermissionError:
-            random_suffix = random.randint(1, 1000)
-            final_file_path = f"小红书搜索结果-{keyword}-{df.shape[0]}条-{timestamp}-{random_suffix}.xlsx"
-            df.to_excel(final_file_path, index=False)
+            # 如果不是最后一页，则滚动加载下一页（滚动内部已等待新内容加载）
+            if i < pages - 1:
+                page_scroll_down(page)
+    finally:
+        if listener is not None:
+            listener.stop(page)
+    return all_results
+
+def load_keywords(source):
+    """读取关键词：可以是关键词列表，也可以是每行一个关键词的文本文件"""
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            source = f.read().splitlines()
+    keywords = []
+    for keyword in source:
+        keyword = keyword.strip()
+        if keyword and not keyword.startswith('#') and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+def merge_keyword_results(keyword_results):
+    """跨关键词去重
+
+    keyword_results 为 {关键词: 结果列表 或 异常}。同一篇笔记只保留一条记录，
+    并在“命中关键词”列记录命中它的全部关键词；返回 (合并后的记录, 每个关键词的统计)
+    """
+    merged = {}
+    hits = {}
+    for keyword, results in keyword_results.items():
+        if isinstance(results, Exception):
+            continue
+        keyword_hits = hits.setdefault(keyword, set())
+        for item in results:
+            note_id = link_key(item['笔记链接'])
+            if note_id in keyword_hits:
+                continue
+            keyword_hits.add(note_id)
+            if note_id in merged:
+                merged[note_id]['命中关键词'].append(keyword)
+            else:
+                merged[note_id] = {**item, '命中关键词': [keyword]}
+    
+    stats = []
+    for keyword, results in keyword_results.items():
+        if isinstance(results, Exception):
+            stats.append({'关键词': keyword, '状态': f'失败: {results}', '结果数': 0,
+                          '去重笔记数': 0, '独有笔记数': 0})
+            continue
+        note_ids = hits.get(keyword, set())
+        stats.append({
+            '关键词': keyword,
+            '状态': '成功' if results else '无结果',
+            '结果数': len(results),
+            '去重笔记数': len(note_ids),
+            '独有笔记数': sum(1 for note_id in note_ids if len(merged[note_id]['命中关键词']) == 1),
+        })
+    
+    records = []
+    for record in merged.values():
+        record['命中关键词'] = '、'.join(record['命中关键词'])
+        records.append(record)
+    return records, stats
+
+def save_batch_results(records, stats):
+    """保存批量搜索结果：“汇总”表按点赞数排序，“关键词统计”表记录每个关键词的命中情况"""
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    filename = f'小红书批量搜索结果_{len(stats)}个关键词_{len(records)}条_{timestamp}.xlsx'
+    save_path = os.path.join(get_executable_path(), filename)
+    
+    df = pd.DataFrame(records)
+    if not df.empty:
+        normalize_counts(df)
+        df = df.sort_values(by='点赞数', ascending=False)
+    stats_df = pd.DataFrame(stats)
+    
+    try:
+        with pd.ExcelWriter(save_path) as writer:
+            df.to_excel(writer, sheet_name='汇总', index=False)
+            format_count_cells(writer.sheets['汇总'], df.columns)
+            stats_df.to_excel(writer, sheet_name='关键词统计', index=False)
+    except PermissionError:
+        save_path = save_path.replace('.xlsx', f'-{random.randint(1, 1000)}.xlsx')
+        with pd.ExcelWriter(save_path) as writer:
+            df.to_excel(writer, sheet_name='汇总', index=False)
+            format_count_cells(writer.sheets['汇总'], df.columns)
+            stats_df.to_excel(writer, sheet_name='关键词统计', index=False)
+    return save_path
+
+def warn_unsupported(capture='dom', enrich=False, page=None, resume=False, stream=False):
+    """Playwright 引擎不支持的参数：传入时提示并忽略"""
+    unsupported = [name for name, used in (
+        ("接口监听（capture='api'）", capture != 'dom'),
+        ('补充笔记详情（enrich）', enrich),
+        ('传入的标签页（page）', page is not None),
+        ('断点续采（resume）', resume),
+        ('流式落盘（stream）', stream),
+    ) if used]
+    if unsupported:
+        safe_print(f"Playwright 引擎不支持{'、'.join(unsupported)}，已忽略")
+        logging.warning(f"Playwright 引擎忽略的参数: {'、'.join(unsupported)}")
+
+def batch_main(keywords, pages=1, tabs=3, capture='dom', enrich=False, enrich_tabs=3, page=None,
+               progress=None, cancel=None, lean=False, resume=False, skip_seen=False,
+               account='default', engine='drission'):
+    """批量搜索多个关键词，结果跨关键词去重后保存到一个工作簿，返回结果文件路径
+
+    keywords 为关键词列表或关键词文件路径；DrissionPage 引擎只登录一次，用 tabs 个标签页并发采集，
+    每个关键词各有一个检查点；Playwright 引擎时 tabs 为并发数。其余参数同 main
+    """
+    own_page = page is None
+    pool = None
+    save_path = None
+    checkpoints = {}
+    run = RunContext('search', account=account)
+    with run.activate():
+        try:
+            keywords = load_keywords(keywords)
+            if not keywords:
+                safe_print("没有需要搜索的关键词")
+                return None
         
-        # 打印排序后的前5条结果
-        print("\n排序后的前5条结果：")
-        for _, row in df.head().iterrows():
-            print(f"标题: {row['标题'][:30]}... "
-                  f"作者: {row['作者']} "
-                  f"点赞数: {row['点赞数']}")
+            if engine == 'playwright':
+                safe_print("使用 Playwright 引擎...")
+                warn_unsupported(capture=capture, enrich=enrich, page=page, resume=resume)
+                keyword_results = run_playwright_search(keywords, pages, concurrency=tabs, lean=lean,
+                                                        progress=progress, cancel=cancel, skip_seen=skip_seen)
+            else:
+                if own_page:
+                    safe_print("正在初始化浏览器...")
+                    page = sign_in(account, lean=lean)
+                    if not page:
+                        safe_print("登录失败，程序退出")
+                        return None
+                pool = TabPool(page, min(tabs, len(keywords)), setup=tab_setup(lean))
+                safe_print(f"共 {len(keywords)} 个关键词，使用 {pool.size} 个标签页并发采集")
         
-        print(f"\n数据已保存到：{final_file_path}")
-        return final_file_path
+                keyword_progress = combine_progress(progress, len(keywords), pages)
         
-    except Exception as e:
-        print(f"处理Excel文件时出错: {str(e)}")
-        return None
-
-def main(keyword=None, pages=1):
-    try:
-        # 创建一个安全的输出函数
-        def safe_print(message):
+                def worker(tab, task):
+                    i, keyword = task
+                    if cancel is not None and cancel.is_set():
+                        return []
+                    with run.activate():
+                        checkpoint = checkpoints[keyword] = CrawlCheckpoint('search', keyword)
+                        checkpoint.start(resume)
+                        return crawl_keyword(tab, keyword, pages, capture, keyword_progress(i), cancel, checkpoint,
+                                             skip_seen=skip_seen, run=run)
+        
+                # 等待标签页线程期间本线程空闲，不计入线程运行时间
+                with run.waits.paused():
+                    results = run_on_tabs(pool, list(enumerate(keywords)), worker)
+                keyword_results = dict(zip(keywords, results))
+            for keyword, result in keyword_results.items():
+                if isinstance(result, Exception):
+                    safe_print(f"关键词 {keyword} 采集失败: {str(result)}")
+                    logging.error(f"关键词 {keyword} 采集失败: {str(result)}")
+        
+            records, stats = merge_keyword_results(keyword_results)
+            run.metrics.count('duplicates_discarded', sum(row['结果数'] for row in stats) - len(records))
+            if not records:
+                safe_print("没有找到任何搜索结果")
+                return None
+            if enrich and engine != 'playwright' and not (cancel is not None and cancel.is_set()):
+                records = enrich_records(page, records, tabs=enrich_tabs, run=run, lean=lean)
+        
+            save_path = save_batch_results(records, stats)
+            safe_print(f"数据已保存到：{save_path}")
+            seen_notes().record(records, 'search')
+            for checkpoint in checkpoints.values():
+                checkpoint.finish()
+        
+            # 显示每个关键词的统计
+            safe_print("\n关键词统计：")
+            for row in stats:
+                safe_print(f"{row['关键词']}: {row['状态']}，结果 {row['结果数']} 条，"
+                           f"去重后 {row['去重笔记数']} 条，独有 {row['独有笔记数']} 条")
+            total = sum(row['结果数'] for row in stats)
+            safe_print(f"合计 {total} 条结果，跨关键词去重后 {len(records)} 条")
+            safe_print(run.report())
+            run.export()
+        
+        except Exception as e:
+            safe_print(f"批量搜索出错: {str(e)}")
+            logging.error(f"批量搜索出错: {str(e)}", exc_info=True)
+        finally:
             try:
-                if hasattr(sys.stdout, 'write'):
-                    sys.stdout.write(f"{message}\n")
-                    if hasattr(sys.stdout, 'flush'):
-                        sys.stdout.flush()
+                if pool is not None:
+                    pool.close()
+                if own_page and page is not None:
+                    quit_browser(page)
+                for checkpoint in checkpoints.values():
+                    checkpoint.close()
             except:
                 pass
-            # 同时输出到日志文件
-            logging.info(message)
-
-        # 登录
-        safe_print("正在初始化浏览器...")
-        page = sign_in()
-        if not page:
-            safe_print("登录失败，程序退出")
-            return
-            
-        # 使用传入的关键词，不再提示输入
-        if not keyword:
-            keyword = input("请输入要搜索的关键词：")
+        return save_path
+
+def main(keyword=None, pages=1, capture='dom', enrich=False, enrich_tabs=3, engine='drission',
+         page=None, progress=None, cancel=None, lean=False, resume=False, stream=False, top=None,
+         skip_seen=False, account='default'):
+    """采集关键词搜索结果
+
+    capture、progress、cancel、skip_seen 见 crawl_keyword，enrich 见 enrich_records，
+    engine 见 ENGINES（Playwright 不支持的参数见 warn_unsupported），stream、top 见 DiskResultSink，
+    resume 见 CrawlCheckpoint.start，lean 见 BrowserSession.open，account 见 limiter；
+    传入 page 时跳过登录，结束后也不关闭浏览器
+    """
+    own_page = page is None
+    checkpoint = None
+    sink = None
+    run = RunContext('search', account=account)
+    with run.activate():
+        try:
+            # 使用传入的关键词，不再提示输入
+            if not keyword:
+                keyword = input("请输入要搜索的关键词：")
             
-        # 使用传入的页数，不再提示输入    
-        if not pages:
-            pages = int(input("请输入要爬取的页数："))
-        
-        # 初始化结果列表
-        all_results = []
-        
-        # 执行搜索
-        if search_keyword(page, keyword):
-            # 爬取搜索结果
-            for i in range(pages):  # 移除tqdm
-                safe_print(f"正在获取第 {i+1}/{pages} 页")
-                results = get_search_results(page)
-                if results:
-                    safe_print(f"第 {i+1} 页获取到 {len(results)} 条结果")
-                    all_results.extend(results)
+            # 使用传入的页数，不再提示输入    
+            if not pages:
+                pages = int(input("请输入要爬取的页数："))
+        
+            if engine == 'playwright':
+                safe_print("使用 Playwright 引擎...")
+                warn_unsupported(capture=capture, enrich=enrich, page=page, resume=resume, stream=stream)
+                all_results = run_playwright_search([keyword], pages, lean=lean, progress=progress, cancel=cancel,
+                                                    skip_seen=skip_seen).get(keyword, [])
+                if all_results:
+                    safe_print(f"\n总共获取到 {len(all_results)} 条结果")
+                    if save_search_results(all_results, keyword):
+                        seen_notes().record(all_results, 'search')
                 else:
-                    safe_print(f"第 {i+1} 页没有获取到新结果")
-                
-                # 如果不是最后一页，则滚动加载下一页
-                if i < pages - 1:
-                    page_scroll_down(page)
-                    time.sleep(3)  # 等待新内容加载
-            
+                    safe_print("没有找到任何搜索结果")
+                return
+        
+            # 登录
+            if own_page:
+                safe_print("正在初始化浏览器...")
+                page = sign_in(account, lean=lean)
+                if not page:
+                    safe_print("登录失败，程序退出")
+                    return
+        
+            # 执行搜索
+            checkpoint = CrawlCheckpoint('search', keyword)
+            checkpoint.start(resume)
+            if stream:
+                sink = DiskResultSink(converters=count_converters(), number_formats=count_number_formats())
+            all_results = crawl_keyword(page, keyword, pages, capture, progress, cancel, checkpoint, sink, skip_seen,
+                                        run)
+        
             # 保存数据到Excel
-            if all_results:
+            if sink is not None:
+                if len(sink):
+                    safe_print(f"\n总共获取到 {len(sink)} 条结果")
+                    if enrich:
+                        safe_print("流式模式不支持补充笔记详情，已跳过")
+                    if save_stream_results(sink, keyword, top):
+                        seen_notes().record(sink.records(top=top), 'search')
+                        checkpoint.finish()
+                else:
+                    safe_print("没有找到任何搜索结果")
+            elif all_results:
                 safe_print(f"\n总共获取到 {len(all_results)} 条结果")
-                
-                # 生成文件名
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                filename = f'小红书搜索结果_{keyword}_{len(all_results)}条_{timestamp}.xlsx'
-                
-                try:
-                    # 转换为DataFrame并处理数据
-                    df = pd.DataFrame(all_results)
-                    df = df.drop_duplicates()
-                    df = df.drop_duplicates(subset=['标题', '笔记链接'])
-                    
-                    # 处理点赞数并排序
-                    def convert_likes(like_str):
-                        try:
-                            if isinstance(like_str, str):
-                                if '万' in like_str:
-                                    return float(like_str.replace('万', '')) * 10000
-                                return float(like_str)
-                            return float(like_str)
-                        except:
-                            return 0
-                    
-                    df['点赞数值'] = df['点赞数'].apply(convert_likes)
-                    df = df.sort_values(by='点赞数值', ascending=False)
-                    df = df.drop('点赞数值', axis=1)
-                    
-                    # 保存文件
-                    save_path = save_excel(df, filename)
-                    safe_print(f"数据已成功保存到：{save_path}")
-                    
-                    # 显示统计信息
-                    safe_print("\n数据统计：")
-                    safe_print(f"原始数据条数：{len(all_results)}")
-                    safe_print(f"去重后条数：{len(df)}")
-                    safe_print("\n排序后的前5条结果：")
-                    for _, row in df.head().iterrows():
-                        safe_print(f"标题: {row['标题'][:30]}... 点赞数: {row['点赞数']}")
-                    
-                except Exception as e:
-                    safe_print(f"保存Excel文件时出错: {str(e)}")
-                    backup_filename = f'小红书搜索结果_{keyword}_{int(time.time())}.xlsx'
-                    backup_path = save_excel(df, backup_filename)
-                    safe_print(f"数据已保存到备用文件：{backup_path}")
+                if enrich and not (cancel is not None and cancel.is_set()):
+                    all_results = enrich_records(page, all_results, tabs=enrich_tabs, run=run, lean=lean)
+            
+                if save_search_results(all_results, keyword):
+                    seen_notes().record(all_results, 'search')
+                    checkpoint.finish()
             else:
                 safe_print("没有找到任何搜索结果")
+            safe_print(run.report())
+            run.export()
                 
-    except Exception as e:
-        error_msg = f"程序执行出错: {str(e)}"
-        logging.error(error_msg, exc_info=True)
-        try:
-            if hasattr(sys.stdout, 'write'):
-                sys.stdout.write(f"{error_msg}\n")
-        except:
-            pass
-    finally:
-        if 'page' in locals():
+        except Exception as e:
+            error_msg = f"程序执行出错: {str(e)}"
+            logging.error(error_msg, exc_info=True)
             try:
-                page.quit()
+                if hasattr(sys.stdout, 'write'):
+                    sys.stdout.write(f"{error_msg}\n")
             except:
                 pass
+        finally:
+            if own_page and page is not None:
+                try:
+                    quit_browser(page)
+                except:
+                    pass
+            if checkpoint is not None:
+                checkpoint.close()
+            if sink is not None:
+                sink.close()
+
+@metrics.timed('sign_in')
+def sign_in(account='default', lean=False):
+    """登录小红书：复用账号的浏览器目录和 Cookie，只有登录失效时才需要扫码
 
-def sign_in():
-    """登录小红书"""
+    lean 为 True 且登录凭证有效时以精简模式启动
+    """
     try:
         print("初始化浏览器...")
-        page = ChromiumPage()
-        
-        # 访问小红书
-        print("访问小红书...")
-        page.get('https://www.xiaohongshu.com/explore')
-        time.sleep(3)
+        session = BrowserSession(account)
+        page = session.open(lean)
         
-        # 检查登录状态
-        print("检查登录状态...")
-        if check_login_status(page):
-            print("已经登录")
+        # 先从 Cookie 判断登录状态，失效时再检查页面并扫码
+        if session.ensure_login(page, check_login_status):
             return page
             
-        # 等待用户扫码登录
-        print("请扫码登录")
-        countdown(30)
-        
-        # 多次检查登录状态
-        for i in range(3):
-            if check_login_status(page):
-                print("登录成功")
-                return page
-            time.sleep(3)
-            
         print("登录失败")
         return None
             
@@ -672,21 +1042,19 @@ def sign_in():
         print(f"登录过程出错: {str(e)}")
         return None
 
-def get_executable_path():
-    """获取可执行文件路径"""
-    if getattr(sys, 'frozen', False):
-        # 如果是打包后的exe运行
-        return os.path.dirname(sys.executable)
-    else:
-        # 如果是python脚本运行
-        return os.path.dirname(os.path.abspath(__file__))
+def write_excel(df, path):
+    """写出 DataFrame，互动数列保持整数并设置显示格式"""
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, index=False)
+        format_count_cells(writer.sheets['Sheet1'], df.columns)
 
 # 在保存文件的地方使用这个路径
+@metrics.timed('save_excel')
 def save_excel(df, filename):
     """保存Excel文件"""
     save_path = os.path.join(get_executable_path(), filename)
     try:
-        df.to_excel(save_path, index=False)
+        write_excel(df, save_path)
         print(f"数据已保存到：{save_path}")
         return save_path
     except Exception as e:
@@ -694,9 +1062,23 @@ def save_excel(df, filename):
         # 尝试使用备用文件名
         backup_filename = f'数据_{int(time.time())}.xlsx'
         backup_path = os.path.join(get_executable_path(), backup_filename)
-        df.to_excel(backup_path, index=False)
+        write_excel(df, backup_path)
         print(f"数据已保存到备用文件：{backup_path}")
         return backup_path
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='小红书关键词搜索采集')
+    parser.add_argument('keywords', nargs='*', help='搜索关键词，多个关键词批量采集（不填时提示输入）')
+    parser.add_argument('--engine', choices=ENGINES, default='drission',
+                        help='采集引擎：drission（DrissionPage 标签页）或 playwright（异步并发）')
+    parser.add_argument('--pages', type=int, default=1, help='采集页数')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的检查点继续')
+    parser.add_argument('--stream', action='store_true', help='流式模式：结果落盘，内存占用不随结果数增长')
+    parser.add_argument('--top', type=int, help='流式模式下只导出点赞数最高的前几条')
+    parser.add_argument('--skip-seen', action='store_true', help='跳过以前运行中采集过的笔记')
+    args = parser.parse_args()
+    if len(args.keywords) > 1:
+        batch_main(args.keywords, args.pages, resume=args.resume, skip_seen=args.skip_seen, engine=args.engine)
+    else:
+        main(args.keywords[0] if args.keywords else None, args.pages, engine=args.engine, resume=args.resume,
+             stream=args.stream, top=args.top, skip_seen=args.skip_seen)
\ No newline at end of file
@@ -0,0 +1,148 @@
+import time
+from datetime import datetime
+
+# 作者主页笔记列表和搜索结果背后的接口路径（监听时按子串匹配）
+USER_POSTED_API = '/api/sns/web/v1/user_posted'
+SEARCH_NOTES_API = '/api/sns/web/v1/search/notes'
+
+# 接口字段到输出列的映射，只有接口返回了对应字段才会输出
+EXTRA_COLUMNS = {
+    'id': '笔记ID',
+    'collect': '收藏数',
+    'comment': '评论数',
+    'share': '分享数',
+    'time': '发布时间',
+}
+
+
+def format_timestamp(value):
+    """把毫秒时间戳转换为文本时间"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return ''
+    if value > 10 ** 11:
+        value = value / 1000
+    return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def note_from_card(note_id, card, xsec_token='', source='pc_feed'):
+    """把接口中的笔记卡片转换为与页面缓冲区相同的原始字段"""
+    user = card.get('user') or {}
+    interact = card.get('interact_info') or {}
+    href = f'/explore/{note_id}'
+    if xsec_token:
+        href += f'?xsec_token={xsec_token}&xsec_source={source}'
+
+    item = {
+        'id': note_id,
+        'href': href,
+        'title': card.get('display_title') or card.get('title') or '',
+        'author': user.get('nickname') or user.get('nick_name') or '',
+        'authorHref': f"/user/profile/{user['user_id']}" if user.get('user_id') else '',
+        'like': str(interact.get('liked_count', '')),
+        'type': '视频' if card.get('type') == 'video' else '图文',
+    }
+    for key, field in (('collect', 'collected_count'), ('comment', 'comment_count'),
+                       ('share', 'shared_count')):
+        if field in interact:
+            item[key] = str(interact[field])
+
+    # 详情接口带有发布时间戳；搜索卡片只有角标上的相对时间
+    if card.get('time'):
+        item['time'] = format_timestamp(card['time'])
+    else:
+        for tag in card.get('corner_tag_info') or []:
+            if tag.get('type') == 'publish_time':
+                item['time'] = tag.get('text', '')
+    return item
+
+
+def parse_user_posted(payload):
+    """解析作者主页笔记列表接口，返回 (笔记列表, 是否还有更多)"""
+    data = (payload or {}).get('data') or {}
+    notes = []
+    for card in data.get('notes') or []:
+        note_id = card.get('note_id') or card.get('id')
+        if note_id:
+            notes.append(note_from_card(note_id, card, card.get('xsec_token', ''), 'pc_user'))
+    return notes, bool(data.get('has_more'))
+
+
+def parse_search_notes(payload):
+    """解析搜索结果接口，返回 (笔记列表, 是否还有更多)"""
+    data = (payload or {}).get('data') or {}
+    notes = []
+    for entry in data.get('items') or []:
+        if entry.get('model_type', 'note') != 'note' or not entry.get('id'):
+            continue
+        card = entry.get('note_card') or {}
+        notes.append(note_from_card(entry['id'], card, entry.get('xsec_token', ''), 'pc_search'))
+    return notes, bool(data.get('has_more'))
+
+
+PARSERS = {
+    USER_POSTED_API: parse_user_posted,
+    SEARCH_NOTES_API: parse_search_notes,
+}
+
+
+def extra_columns(item):
+    """取出接口模式才有的附加列"""
+    return {column: item[key] for key, column in EXTRA_COLUMNS.items() if key in item}
+
+
+class FeedListener:
+    """通过 DrissionPage 网络监听采集接口返回的笔记
+
+    与 NoteBuffer 提供相同的 harvest(page) 接口，可以直接传给 get_note_info / get_search_results。
+    必须在触发接口请求的页面跳转之前调用 start()
+    """
+
+    def __init__(self, api=USER_POSTED_API):
+        self.api = api
+        self.parser = PARSERS[api]
+        self.seen = set()
+        self.has_more = True
+        self.responses = 0
+        self.parse_seconds = 0.0
+
+    def start(self, page):
+        """开始监听接口"""
+        page.listen.start(self.api)
+
+    def stop(self, page):
+        """停止监听"""
+        try:
+            page.listen.stop()
+        except Exception:
+            pass
+
+    def harvest(self, page, timeout=3, gap=0.5):
+        """取走已捕获的接口响应并解析出新笔记
+
+        等待第一个响应最多 timeout 秒，之后连续 gap 秒没有新响应即返回
+        """
+        fresh = []
+        wait = timeout
+        while True:
+            packet = page.listen.wait(timeout=wait)
+            if not packet:
+                break
+            wait = gap
+            body = packet.response.body if packet.response else None
+            if not isinstance(body, dict):
+                continue
+            self.responses += 1
+            start = time.perf_counter()
+            notes, self.has_more = self.parser(body)
+            self.parse_seconds += time.perf_counter() - start
+            for note in notes:
+                if note['id'] in self.seen:
+                    continue
+                self.seen.add(note['id'])
+                fresh.append(note)
+        return fresh
+
+    def __len__(self):
+        return len(self.seen)
@@ -0,0 +1,181 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+
+from app_paths import data_path
+from metrics import metrics
+from note_harvest import NOTE_ID_PATTERN
+
+# 输出中标记笔记是否为首次采集的列
+FLAG_COLUMN = '新笔记'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_notes (
+    note_id TEXT PRIMARY KEY,
+    source TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+"""
+
+# 布隆过滤器的最小容量和误判率
+MIN_CAPACITY = 100000
+ERROR_RATE = 0.001
+
+
+def canonical_note_id(url):
+    """规范化的笔记ID：取自 /explore/<id>、/discovery/item/<id>、/user/profile/<用户ID>/<id>，
+    与查询参数（如 xsec_token）无关；不是笔记链接时返回空字符串"""
+    if not url:
+        return ''
+    match = NOTE_ID_PATTERN.search(url)
+    return match.group(1).lower() if match else ''
+
+
+def link_key(link):
+    """链接的去重键：规范化笔记ID，无法识别时退回去掉查询参数的链接"""
+    link = link or ''
+    return canonical_note_id(link) or link.split('?')[0]
+
+
+def note_key(record, link_column='笔记链接'):
+    """记录的去重键，见 link_key"""
+    return link_key(record.get(link_column))
+
+
+class BloomFilter:
+    """布隆过滤器：判断“一定不存在”只需几次位运算，“可能存在”再去数据库确认"""
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # 双重哈希：由一个摘要派生出 hashes 个位置
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class GlobalNoteIndex:
+    """跨运行的全局笔记索引：搜索和作者采集共用，记录采集过的全部笔记ID
+
+    成员判断先查内存中的布隆过滤器，只有可能存在时才查询 SQLite
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path('global_notes.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.count = self._conn.execute('SELECT COUNT(*) FROM seen_notes').fetchone()[0]
+        self._rebuild()
+
+    def _rebuild(self):
+        """按当前笔记数重建布隆过滤器（容量留出一倍余量）"""
+        self.bloom = BloomFilter(max(MIN_CAPACITY, self.count * 2))
+        for (note_id,) in self._conn.execute('SELECT note_id FROM seen_notes'):
+            self.bloom.add(note_id)
+
+    def __contains__(self, note_id):
+        return bool(self.known([note_id]))
+
+    def __len__(self):
+        return self.count
+
+    def known(self, note_ids):
+        """返回 note_ids 中已经采集过的笔记ID集合"""
+        with self._lock:
+            candidates = list({note_id for note_id in note_ids if note_id and note_id in self.bloom})
+            found = set()
+            for i in range(0, len(candidates), 500):
+                chunk = candidates[i:i + 500]
+                rows = self._conn.execute(
+                    f'SELECT note_id FROM seen_notes WHERE note_id IN ({",".join("?" * len(chunk))})', chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def add(self, note_ids, source=''):
+        """记录采集到的笔记ID，已有的笔记只更新最后采集时间"""
+        note_ids = {note_id for note_id in note_ids if note_id}
+        if not note_ids:
+            return
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            before = self._conn.total_changes
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO seen_notes (note_id, source, first_seen, last_seen) VALUES (?, ?, ?, ?)',
+                    [(note_id, source, now, now) for note_id in note_ids]
+                )
+                added = self._conn.total_changes - before
+                self._conn.executemany(
+                    'UPDATE seen_notes SET last_seen = ? WHERE note_id = ?',
+                    [(now, note_id) for note_id in note_ids]
+                )
+            self.count += added
+            if self.count > self.bloom.capacity:
+                self._rebuild()
+            else:
+                for note_id in note_ids:
+                    self.bloom.add(note_id)
+
+    def flag(self, records, source='', fresh_notes=None, link_column='笔记链接'):
+        """在记录的“新笔记”列标记是否首次采集（是/否），返回新笔记数
+
+        fresh_notes 为本轮运行首次出现的笔记ID集合（RunContext.fresh_notes），
+        其中的笔记在同一轮内再次遇到时仍算新笔记。
+        这里只做标记，不写入索引：输出保存成功后再用 record 记入，
+        保存失败或中途出错时这些笔记下次运行仍算新笔记。
+        采集入口的 skip_seen 为 True 时丢弃标记为“否”的记录，即以前运行（包括另一种采集）中保存过的笔记
+        """
+        if fresh_notes is None:
+            fresh_notes = set()
+        note_ids = [canonical_note_id(record.get(link_column, '')) for record in records]
+        known = self.known(note_ids)
+        fresh = 0
+        with self._lock:
+            for record, note_id in zip(records, note_ids):
+                is_new = note_id not in known or note_id in fresh_notes
+                record[FLAG_COLUMN] = '是' if is_new else '否'
+                fresh += is_new
+            fresh_notes.update(note_id for note_id in note_ids if note_id and note_id not in known)
+        metrics.count('notes_new', fresh)
+        metrics.count('notes_seen_before', len(records) - fresh)
+        return fresh
+
+    def record(self, records, source='', link_column='笔记链接'):
+        """把已经写入输出文件的记录记入索引（在保存成功之后调用）"""
+        self.add([canonical_note_id(record.get(link_column, '')) for record in records], source)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def seen_notes():
+    """进程内共享的全局笔记索引，第一次调用时打开"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = GlobalNoteIndex()
+        return _index
@@ -0,0 +1,202 @@
+import itertools
+import logging
+import threading
+import time
+
+# 任务状态
+STATUS_TEXT = {
+    'queued': '排队中',
+    'running': '运行中',
+    'cancelling': '取消中',
+    'cancelled': '已取消',
+    'done': '已完成',
+    'failed': '失败',
+}
+FINISHED = ('cancelled', 'done', 'failed')
+
+_job_ids = itertools.count(1)
+
+
+class Job:
+    """一个采集任务：记录爬虫上报的进度，支持协作式取消
+
+    target(progress=..., cancel=...) 中的爬虫在每页之间调用 progress 上报进度、检查 cancel
+    """
+
+    def __init__(self, name, target):
+        self.id = next(_job_ids)
+        self.name = name
+        self.target = target
+        self.cancel_event = threading.Event()
+        self.status = 'queued'
+        self.pages = 0
+        self.total = 0
+        self.notes = 0
+        self.notes_target = None
+        self.started = None
+        self.finished = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def progress(self, pages=None, total=None, notes=None, target=None):
+        """进度回调：已完成页数、总页数、已采集笔记数、目标笔记数"""
+        with self._lock:
+            if pages is not None:
+                self.pages = pages
+            if total is not None:
+                self.total = total
+            if notes is not None:
+                self.notes = notes
+            if target is not None:
+                self.notes_target = target
+
+    def cancel(self):
+        """请求取消：排队中的任务直接取消，运行中的任务在下一页之前停止并保存已采集的数据"""
+        self.cancel_event.set()
+        with self._lock:
+            if self.status == 'queued':
+                self.status = 'cancelled'
+            elif self.status == 'running':
+                self.status = 'cancelling'
+
+    @property
+    def fraction(self):
+        """完成比例：有目标笔记数时按笔记数，否则按页数"""
+        with self._lock:
+            if self.status == 'done':
+                return 1.0
+            if self.notes_target:
+                return min(self.notes / self.notes_target, 1.0)
+            if self.total:
+                return min(self.pages / self.total, 1.0)
+            return 0.0
+
+    def eta(self):
+        """按当前速度估算的剩余秒数，无法估算时返回 None"""
+        fraction = self.fraction
+        if self.started is None or self.status != 'running' or not 0 < fraction < 1:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return elapsed * (1 - fraction) / fraction
+
+    def summary(self):
+        """任务状态的一行说明"""
+        parts = [f"#{self.id} {self.name}", STATUS_TEXT[self.status]]
+        if self.total:
+            parts.append(f"第 {self.pages}/{self.total} 页")
+        if self.notes:
+            parts.append(f"{self.notes} 条")
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f"剩余约 {eta:.0f}s")
+        if self.error:
+            parts.append(self.error)
+        return ' | '.join(parts)
+
+    def run(self):
+        """在当前线程中执行任务"""
+        with self._lock:
+            if self.status == 'cancelled':
+                return
+            self.status = 'running'
+            self.started = time.perf_counter()
+        try:
+            self.target(progress=self.progress, cancel=self.cancel_event)
+            status = 'cancelled' if self.cancel_event.is_set() else 'done'
+        except Exception as e:
+            logging.error(f"任务 {self.name} 出错: {str(e)}", exc_info=True)
+            self.error = str(e)
+            status = 'failed'
+        with self._lock:
+            self.status = status
+            self.finished = time.perf_counter()
+
+
+class JobManager:
+    """任务队列：最多同时运行 max_concurrent 个任务，其余排队"""
+
+    def __init__(self, max_concurrent=2):
+        self.max_concurrent = max(1, max_concurrent)
+        self.jobs = []
+        self._pending = []
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, name, target):
+        """提交任务，返回 Job"""
+        job = Job(name, target)
+        with self._lock:
+            self.jobs.append(job)
+            self._pending.append(job)
+        self._schedule()
+        return job
+
+    def set_limit(self, max_concurrent):
+        """调整并发上限，调大时立即启动排队中的任务"""
+        with self._lock:
+            self.max_concurrent = max(1, max_concurrent)
+        self._schedule()
+
+    def _schedule(self):
+        with self._lock:
+            while self._pending and self._running < self.max_concurrent:
+                job = self._pending.pop(0)
+                if job.status == 'cancelled':
+                    continue
+                self._running += 1
+                threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        try:
+            job.run()
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._schedule()
+
+    def cancel(self, job_id):
+        """取消指定任务"""
+        for job in self.jobs:
+            if job.id == job_id:
+                job.cancel()
+
+    def cancel_all(self):
+        """取消全部未结束的任务"""
+        for job in self.jobs:
+            if job.status not in FINISHED:
+                job.cancel()
+
+    def clear_finished(self):
+        """移除已结束的任务，返回被移除的任务"""
+        with self._lock:
+            finished = [job for job in self.jobs if job.status in FINISHED]
+            self.jobs = [job for job in self.jobs if job.status not in FINISHED]
+        return finished
+
+
+def combine_progress(progress, parts, total=0, target=0):
+    """把 parts 个并行子任务的进度合并上报，返回 make(index) → 第 index 个子任务的进度回调
+
+    total、target 为每个子任务预计的页数和笔记数，未开始的子任务也计入总量
+    """
+    if progress is None:
+        return lambda index: None
+    lock = threading.Lock()
+    states = [{'pages': 0, 'total': total, 'notes': 0, 'target': target} for _ in range(parts)]
+
+    def make(index):
+        def report(pages=None, total=None, notes=None, target=None):
+            with lock:
+                state = states[index]
+                for key, value in (('pages', pages), ('total', total), ('notes', notes), ('target', target)):
+                    if value is not None:
+                        state[key] = value
+                progress(
+                    pages=sum(s['pages'] for s in states),
+                    total=sum(s['total'] for s in states),
+                    notes=sum(s['notes'] for s in states),
+                    target=sum(s['target'] for s in states) or None,
+                )
+        return report
+
+    return make
@@ -0,0 +1,54 @@
+from metrics import metrics
+
+# 精简模式：只读取文字和链接，不下载封面图片、视频和字体
+# Playwright 按请求类型拦截
+BLOCKED_RESOURCE_TYPES = ('image', 'media', 'font')
+# DrissionPage 通过 CDP 按地址拦截（Network.setBlockedURLs 支持 * 通配符）
+BLOCKED_URL_PATTERNS = [
+    '*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.svg*',
+    '*.mp4*', '*.m3u8*', '*.m4s*', '*.flv*',
+    '*.woff*', '*.ttf*', '*.otf*',
+    '*sns-webpic*', '*sns-img*', '*sns-avatar*', '*sns-video*', '*picasso-static*',
+]
+# 浏览器级开关：禁止加载图片、静音，对所有标签页生效
+LEAN_ARGUMENTS = ['--blink-settings=imagesEnabled=false', '--mute-audio']
+
+
+def lean_options(co, headless=True):
+    """给 DrissionPage 的 ChromiumOptions 加上精简模式参数，返回 co"""
+    for argument in LEAN_ARGUMENTS:
+        co.set_argument(argument)
+    if headless:
+        co.headless()
+    return co
+
+
+def block_resources(page):
+    """在标签页上通过 CDP 拦截图片、视频和字体请求，返回是否成功
+
+    CDP 的拦截只对当前标签页生效，新建的标签页需要再调用一次
+    """
+    try:
+        page.run_cdp('Network.enable')
+        page.run_cdp('Network.setBlockedURLs', urls=BLOCKED_URL_PATTERNS)
+        return True
+    except Exception as e:
+        print(f"设置资源拦截失败: {str(e)}")
+        return False
+
+
+def tab_setup(lean):
+    """TabPool 等新建标签页时的初始化函数，非精简模式返回 None"""
+    return block_resources if lean else None
+
+
+async def route_lean(context):
+    """Playwright 上下文中中止图片、视频和字体请求"""
+    async def handle(route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            metrics.count('blocked_requests')
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route('**/*', handle)
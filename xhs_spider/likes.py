@@ -0,0 +1,175 @@
+"""互动数（点赞、收藏、评论）文本与整数之间的转换，搜索和作者采集共用
+
+页面上的互动数是显示文本：“1234”、“1.2万”、“3亿”、“10w+”、“2.5k”、“1,234”，
+没有互动时显示“赞”。采集阶段保留原文，处理和排序时统一转换为整数；
+导出的工作簿中仍是整数（可以排序、筛选），由单元格数字格式显示为“1.2万”
+"""
+
+# 需要转换为整数的互动数列（列表页的点赞数，接口模式和详情补充的收藏、评论、分享数）
+COUNT_COLUMNS = ('点赞数', '收藏数', '评论数', '分享数')
+
+# 单位后缀对应的倍数
+UNITS = {'k': 1000, 'K': 1000, '千': 1000, 'w': 10000, 'W': 10000, '万': 10000, '亿': 100000000}
+
+# 解析前去掉的字符：空白、千位分隔符、“+”和“赞”
+STRIP_CHARS = ' \t\r\n\u3000\xa0,，+＋赞'
+STRIP_TABLE = str.maketrans('', '', STRIP_CHARS)
+
+# int64 能表示的上界（2**63），超出时向量化结果无法与 parse_count 一致
+INT64_LIMIT = 2.0 ** 63
+
+# 互动数列的 Excel 数字格式：一万以上显示为“1.2万”，一亿以上显示为“1.23亿”，单元格的值仍是整数
+# （“,”把数值缩小一千倍，“!.”在末位数字前插入小数点）
+COUNT_NUMBER_FORMAT = '[>=100000000]0!.00,,"亿";[>=10000]0!.0,"万";0'
+
+# 日志等显示文本的单位，从大到小
+DISPLAY_UNITS = ((100000000, '亿'), (10000, '万'))
+
+
+def parse_count(value):
+    """把一个互动数（文本或数字）转换为整数，无法识别时为 0"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 0 if value != value else int(round(value))
+    text = str(value).translate(STRIP_TABLE)
+    scale = UNITS.get(text[-1:])
+    if scale:
+        text = text[:-1]
+    else:
+        scale = 1
+    if not text.replace('.', '', 1).isdecimal():
+        return 0
+    return int(round(float(text) * scale))
+
+
+def parse_counts(series):
+    """parse_count 的向量化版本：把一列互动数转换为 int64 列，结果与逐行 parse_count 一致
+
+    文本转为 NumPy 定长字符串数组后，去字符、取单位、校验和解析数字都是 numpy.strings 的整列运算；
+    NumPy 低于 2.3（没有 numpy.strings.slice）或有取值超出 int64 范围时退回逐行 parse_count
+    （超出范围时结果为 Python 整数的 object 列）
+    """
+    # 作者采集只用 parse_count，不必为它导入 pandas
+    import numpy as np
+    import pandas as pd
+
+    series = pd.Series(series)
+    if pd.api.types.is_numeric_dtype(series):
+        numbers = series.fillna(0).round()
+        if (numbers.abs() >= INT64_LIMIT).any():
+            return series.map(parse_count).astype(object)
+        return numbers.astype(np.int64)
+    if not _has_string_ufuncs():
+        numbers = series.map(parse_count)
+        if any(abs(number) >= INT64_LIMIT for number in numbers):
+            return numbers.astype(object)
+        return numbers.astype(np.int64)
+
+    # 数字类型的取值（接口模式和详情补充的列）直接使用，只解析文本
+    is_text = (series.map(type) == str).to_numpy()
+    numbers = pd.to_numeric(series.where(~is_text), errors='coerce').to_numpy(dtype=np.float64, copy=True)
+    if is_text.any():
+        numbers[is_text] = _parse_text(series.to_numpy()[is_text].astype(str))
+    numbers[np.isnan(numbers)] = 0
+    numbers = np.round(numbers)
+    if (np.abs(numbers) >= INT64_LIMIT).any():
+        return series.map(parse_count).astype(object)
+    return pd.Series(numbers.astype(np.int64), index=series.index)
+
+
+def _has_string_ufuncs():
+    """NumPy 是否提供 parse_counts / format_counts 用到的字符串运算（2.3 以上）"""
+    import numpy as np
+
+    strings = getattr(np, 'strings', None)
+    return strings is not None and hasattr(strings, 'slice')
+
+
+def _parse_text(text):
+    """解析 NumPy 定长字符串数组，返回浮点数组（无法识别的为 0）"""
+    import numpy as np
+
+    # 已经是纯数字的文本（最常见）不需要去字符；去字符只会变短，可以直接写回原数组
+    plain = np.strings.isdecimal(text)
+    if not plain.all():
+        messy = text[~plain]
+        # 定长字符串按 UTF-32 存储，先在码位上判断哪些字符出现过，只替换出现过的
+        codes = messy.view(np.uint32)
+        for char in STRIP_CHARS:
+            if (codes == ord(char)).any():
+                messy = np.strings.replace(messy, char, '')
+        text[~plain] = messy
+
+    last = np.strings.slice(text, -1, None)
+    scale = np.ones(len(text))
+    for unit, factor in UNITS.items():
+        scale[last == unit] = factor
+    body = np.where(scale != 1, np.strings.slice(text, 0, -1), text)
+    valid = np.strings.isdecimal(np.strings.replace(body, '.', '', 1))
+    parsed = np.zeros(len(text))
+    parsed[valid] = body[valid].astype(np.float64) * scale[valid]
+    return parsed
+
+
+def count_converters():
+    """StreamingExcelWriter / DiskResultSink 的 converters：记录写入时把互动数列转换为整数"""
+    return {column: parse_count for column in COUNT_COLUMNS}
+
+
+def count_number_formats():
+    """StreamingExcelWriter / DiskResultSink 的 number_formats：导出时互动数列使用 COUNT_NUMBER_FORMAT"""
+    return {column: COUNT_NUMBER_FORMAT for column in COUNT_COLUMNS}
+
+
+def normalize_counts(df):
+    """把 DataFrame 中存在的互动数列原地转换为整数列，返回 df"""
+    for column in COUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = parse_counts(df[column])
+    return df
+
+
+def format_count_cells(worksheet, columns):
+    """给 DataFrame.to_excel 写出的工作表中的互动数列设置 COUNT_NUMBER_FORMAT，columns 为表头列名"""
+    for index, column in enumerate(columns, start=1):
+        if column in COUNT_COLUMNS:
+            for (cell,) in worksheet.iter_rows(min_row=2, min_col=index, max_col=index):
+                cell.number_format = COUNT_NUMBER_FORMAT
+
+
+def format_count(num):
+    """把互动数格式化为显示文本：一万以上显示为“1.2万”，一亿以上显示为“1.2亿”（保留一位小数，四舍五入）"""
+    num = parse_count(num)
+    for scale, unit in DISPLAY_UNITS:
+        if num >= scale:
+            # 用整数运算取十分位，避免浮点数舍入的差异
+            tenths = (num * 10 + scale // 2) // scale
+            return f"{tenths // 10}.{tenths % 10}{unit}"
+    return str(num)
+
+
+def format_counts(series):
+    """format_count 的向量化版本"""
+    import numpy as np
+    import pandas as pd
+
+    numbers = parse_counts(series)
+    # 超出 int64 范围的列（object 列）同样逐行格式化
+    if not _has_string_ufuncs() or numbers.dtype != np.int64:
+        return numbers.map(format_count)
+    values = numbers.to_numpy()
+    text = values.astype(str).astype(object)
+    upper = None
+    for scale, unit in DISPLAY_UNITS:
+        mask = values >= scale
+        if upper is not None:
+            mask &= values < upper
+        upper = scale
+        if mask.any():
+            tenths = (values[mask] * 10 + scale // 2) // scale
+            text[mask] = np.strings.add(
+                np.strings.add((tenths // 10).astype(str), '.'),
+                np.strings.add((tenths % 10).astype(str), unit)
+            )
+    return pd.Series(text, index=numbers.index)
@@ -0,0 +1,246 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app_paths import data_path
+
+# 指标输出目录；设置 XHS_METRICS_DIR 可直接写入 node exporter 的 textfile 目录
+METRICS_DIR_ENV = 'XHS_METRICS_DIR'
+PREFIX = 'xhs_crawler'
+
+# 计数器说明，未列出的计数器也会照常输出
+COUNTER_HELP = {
+    'notes_collected': '采集到的笔记数',
+    'duplicates_discarded': '去重丢弃的记录数',
+    'selector_fallbacks': '主选择器/脚本失效后使用备用方案的次数',
+    'scroll_fallbacks': '逐屏滚动失败后使用备用滚动方式的次数',
+    'stage_errors': '阶段内抛出异常的次数',
+    'blocked_requests': '精简模式拦截的图片、视频和字体请求数',
+    'rate_limit_waits': '因限速等待的次数',
+    'rate_limit_wait_seconds': '因限速等待的总秒数',
+    'block_signals_captcha': '遇到验证码页面的次数',
+    'block_signals_login': '遇到登录弹窗的次数',
+    'block_signals_empty': '遇到空结果页的次数',
+    'notes_new': '首次采集到的笔记数',
+    'notes_seen_before': '以前运行中已采集过的笔记数',
+}
+
+# 状态量说明
+GAUGE_HELP = {
+    'request_rate': '当前请求速率（次/秒）',
+    'rate_limit_paused_seconds': '限流暂停的剩余秒数',
+}
+
+
+class Metrics:
+    """一次运行的分阶段计时和计数（每次运行各有一份，见 run_context.RunContext）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """开始新一轮统计"""
+        with self._lock:
+            self.started = time.time()
+            self._clock = time.perf_counter()
+            self.stages = {}
+            self.counters = {}
+            self.gauges = {}
+
+    @contextmanager
+    def stage(self, name):
+        """with 语句中计时一个阶段"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count('stage_errors')
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                record = self.stages.setdefault(name, [0, 0.0, 0.0])
+                record[0] += 1
+                record[1] += elapsed
+                record[2] = max(record[2], elapsed)
+
+    def timed(self, name):
+        """装饰器：把整个函数计为一个阶段"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        """累加计数器"""
+        if value:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """设置状态量（覆盖旧值），labels 区分同名状态量（如不同账号）"""
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def summary(self):
+        """本轮统计的汇总（可直接序列化为JSON）"""
+        with self._lock:
+            duration = time.perf_counter() - self._clock
+            notes = self.counters.get('notes_collected', 0)
+            return {
+                'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+                'duration_seconds': round(duration, 3),
+                'notes_per_second': round(notes / duration, 3) if duration > 0 else 0.0,
+                'stages': {
+                    name: {'calls': count, 'seconds': round(total, 3), 'max_seconds': round(longest, 3)}
+                    for name, (count, total, longest) in sorted(self.stages.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': {
+                    name + ''.join(f'[{value}]' for _, value in labels): value
+                    for (name, labels), value in sorted(self.gauges.items())
+                },
+            }
+
+    def prometheus(self, job):
+        """Prometheus 文本格式"""
+        summary = self.summary()
+        label = f'job="{job}"'
+        lines = [
+            f'# HELP {PREFIX}_stage_seconds 各阶段累计耗时',
+            f'# TYPE {PREFIX}_stage_seconds gauge',
+        ]
+        for name, stage in summary['stages'].items():
+            lines.append(f'{PREFIX}_stage_seconds{{{label},stage="{name}"}} {stage["seconds"]}')
+        lines += [
+            f'# HELP {PREFIX}_stage_calls 各阶段调用次数',
+            f'# TYPE {PREFIX}_stage_calls gauge',
+        ]
+        for name, stage in summary['stages'].items():
+            lines.append(f'{PREFIX}_stage_calls{{{label},stage="{name}"}} {stage["calls"]}')
+        lines += [
+            f'# HELP {PREFIX}_stage_max_seconds 各阶段单次最长耗时',
+            f'# TYPE {PREFIX}_stage_max_seconds gauge',
+        ]
+        for name, stage in summary['stages'].items():
+            lines.append(f'{PREFIX}_stage_max_seconds{{{label},stage="{name}"}} {stage["max_seconds"]}')
+        for name, value in summary['counters'].items():
+            lines += [
+                f'# HELP {PREFIX}_{name} {COUNTER_HELP.get(name, name)}',
+                f'# TYPE {PREFIX}_{name} gauge',
+                f'{PREFIX}_{name}{{{label}}} {value}',
+            ]
+        with self._lock:
+            gauges = sorted(self.gauges.items())
+        for name in sorted({name for (name, _), _ in gauges}):
+            lines += [
+                f'# HELP {PREFIX}_{name} {GAUGE_HELP.get(name, name)}',
+                f'# TYPE {PREFIX}_{name} gauge',
+            ]
+            for (gauge_name, labels), value in gauges:
+                if gauge_name == name:
+                    extra = ''.join(f',{key}="{val}"' for key, val in labels)
+                    lines.append(f'{PREFIX}_{name}{{{label}{extra}}} {value}')
+        lines += [
+            f'# HELP {PREFIX}_notes_per_second 本次运行的采集速度',
+            f'# TYPE {PREFIX}_notes_per_second gauge',
+            f'{PREFIX}_notes_per_second{{{label}}} {summary["notes_per_second"]}',
+            f'# HELP {PREFIX}_run_duration_seconds 本次运行总耗时',
+            f'# TYPE {PREFIX}_run_duration_seconds gauge',
+            f'{PREFIX}_run_duration_seconds{{{label}}} {summary["duration_seconds"]}',
+            f'# HELP {PREFIX}_last_run_timestamp_seconds 本次运行结束时间',
+            f'# TYPE {PREFIX}_last_run_timestamp_seconds gauge',
+            f'{PREFIX}_last_run_timestamp_seconds{{{label}}} {int(time.time())}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def export(self, job, directory=None):
+        """写出 <job>_metrics.json 和 <job>.prom，返回两个文件路径
+
+        先写临时文件再替换，node exporter 不会读到写了一半的文件
+        """
+        directory = directory or os.environ.get(METRICS_DIR_ENV) or data_path('metrics')
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f'{job}_metrics.json')
+        prom_path = os.path.join(directory, f'{job}.prom')
+        for path, content in (
+            (json_path, json.dumps(self.summary(), ensure_ascii=False, indent=2)),
+            (prom_path, self.prometheus(job)),
+        ):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return json_path, prom_path
+
+    def report(self):
+        """生成分阶段耗时报告"""
+        summary = self.summary()
+        lines = [
+            "分阶段耗时统计：",
+            f"总耗时 {summary['duration_seconds']:.1f}s，采集速度 {summary['notes_per_second']:.2f} 条/秒",
+        ]
+        for name, stage in sorted(summary['stages'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"  {name}: {stage['calls']} 次，共 {stage['seconds']:.1f}s，最长 {stage['max_seconds']:.1f}s")
+        for name, value in summary['counters'].items():
+            lines.append(f"  {COUNTER_HELP.get(name, name)}: {value}")
+        for name, value in summary['gauges'].items():
+            base, _, suffix = name.partition('[')
+            lines.append(f"  {GAUGE_HELP.get(base, base)}{'[' + suffix if suffix else ''}: {value}")
+        return '\n'.join(lines)
+
+
+# 线程当前所属运行的指标
+_local = threading.local()
+
+# 不在任何运行中的线程（如后台保活、单独调用采集函数）记录到这里
+background = Metrics()
+
+
+def current():
+    """当前线程所属运行的指标，没有绑定时为 background"""
+    return getattr(_local, 'metrics', None) or background
+
+
+@contextmanager
+def bind(target):
+    """with 语句中把当前线程的指标绑定到 target"""
+    previous = getattr(_local, 'metrics', None)
+    _local.metrics = target
+    try:
+        yield target
+    finally:
+        _local.metrics = previous
+
+
+class CurrentMetrics:
+    """转发到当前线程所属运行的指标，各模块通过它计时和计数，不需要层层传递"""
+
+    def stage(self, name):
+        return current().stage(name)
+
+    def timed(self, name):
+        """装饰器：把整个函数计为一个阶段，调用时才确定记录到哪次运行"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with current().stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        current().count(name, value)
+
+    def gauge(self, name, value, **labels):
+        current().gauge(name, value, **labels)
+
+
+metrics = CurrentMetrics()
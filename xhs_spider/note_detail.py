@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import threading
+import time
+
+from app_paths import data_path
+from feed_api import format_timestamp
+from lean import tab_setup
+from note_harvest import extract_note_id
+from run_context import current_run
+from tab_pool import TabPool, run_on_tabs
+
+# 详情补充的输出列
+DETAIL_COLUMNS = {
+    'collect': '收藏数',
+    'comment': '评论数',
+    'share': '分享数',
+    'time': '发布时间',
+    'ip': 'IP属地',
+}
+
+# 读取笔记详情：优先取页面内嵌的详情JSON（__INITIAL_STATE__），取不到时退回DOM
+DETAIL_SCRIPT = """
+const noteId = __NOTE_ID__;
+const unwrap = value => {
+    if (value && value._rawValue !== undefined) {
+        return value._rawValue;
+    }
+    if (value && value._value !== undefined) {
+        return value._value;
+    }
+    return value;
+};
+let note = null;
+try {
+    const map = unwrap(unwrap(window.__INITIAL_STATE__.note).noteDetailMap);
+    const entry = map[noteId] || map[Object.keys(map)[0]];
+    note = unwrap(entry).note;
+} catch (e) {}
+if (note && note.interactInfo) {
+    const info = note.interactInfo;
+    const text = value => value === undefined || value === null ? '' : String(value);
+    return {
+        source: 'state',
+        collect: text(info.collectedCount),
+        comment: text(info.commentCount),
+        share: text(info.shareCount),
+        time: note.time || '',
+        ip: note.ipLocation || ''
+    };
+}
+const text = selector => {
+    const el = document.querySelector(selector);
+    return el ? el.textContent.trim() : '';
+};
+return {
+    source: 'dom',
+    collect: text('.interact-container .collect-wrapper .count'),
+    comment: text('.interact-container .chat-wrapper .count'),
+    share: text('.interact-container .share-wrapper .count'),
+    time: text('.note-content .date'),
+    ip: ''
+};
+"""
+
+
+class DetailCache:
+    """笔记详情磁盘缓存，按笔记ID保存；中断后重新运行会跳过已缓存的笔记"""
+
+    def __init__(self, path=None):
+        self.path = path or data_path('note_detail_cache.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS note_details ('
+            'note_id TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at TEXT NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get_many(self, note_ids):
+        """批量读取缓存，返回 {笔记ID: 详情}"""
+        found = {}
+        note_ids = list(note_ids)
+        with self._lock:
+            for i in range(0, len(note_ids), 500):
+                chunk = note_ids[i:i + 500]
+                rows = self._conn.execute(
+                    f'SELECT note_id, data FROM note_details WHERE note_id IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall()
+                found.update((row[0], json.loads(row[1])) for row in rows)
+        return found
+
+    def put(self, note_id, detail):
+        """写入一条详情（立即提交，保证可以断点续跑）"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO note_details (note_id, data, fetched_at) VALUES (?, ?, ?)',
+                (note_id, json.dumps(detail, ensure_ascii=False), time.strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_note_detail(tab, note_url, note_id):
+    """在标签页中打开笔记并读取收藏、评论、分享数和发布时间（按账号限速）
+
+    返回 (详情, 限流信号)，信号见 rate_limit.TokenBucket.observe
+    """
+    current_run().limiter().acquire()
+    tab.get(note_url)
+    signal = current_run().limiter().observe(tab)
+    detail = tab.run_js(DETAIL_SCRIPT.replace('__NOTE_ID__', json.dumps(note_id))) or {}
+    if detail.get('source') == 'state' and detail.get('time'):
+        detail['time'] = format_timestamp(detail['time'])
+    return detail, signal
+
+
+def cacheable(detail, signal):
+    """详情是否可以写入缓存：遇到验证码或登录页时不缓存，DOM 兜底结果全部为空时也不缓存，
+    这些笔记下次运行会重新抓取"""
+    if signal in ('captcha', 'login'):
+        return False
+    return detail.get('source') == 'state' or any(detail.get(key) for key in DETAIL_COLUMNS)
+
+
+def detail_columns(detail):
+    """把详情转换为输出列"""
+    return {column: detail[key] for key, column in DETAIL_COLUMNS.items() if detail.get(key)}
+
+
+def enrich_records(page, records, tabs=3, cache=None, link_column='笔记链接', run=None, lean=False):
+    """为记录补充笔记详情列
+
+    通过同一浏览器中的 tabs 个标签页并发打开笔记，所有标签页共享账号的限速令牌桶；
+    结果按笔记ID缓存到磁盘，重复运行只会抓取尚未缓存的笔记。返回补充后的记录列表。
+    标签页线程的统计记入 run（RunContext），默认为当前线程所属的运行；
+    lean 为 True 时新开的标签页同样使用精简模式（不加载图片、视频和字体）
+    """
+    run = run or current_run()
+    records = list(records)
+    own_cache = cache is None
+    cache = cache or DetailCache()
+    pool = None
+    try:
+        urls = {}
+        for record in records:
+            note_id = extract_note_id(record.get(link_column, ''))
+            if note_id and note_id not in urls:
+                urls[note_id] = record[link_column]
+
+        details = cache.get_many(urls)
+        todo = [(note_id, url) for note_id, url in urls.items() if note_id not in details]
+        print(f"笔记详情：共 {len(urls)} 条，已缓存 {len(details)} 条，待抓取 {len(todo)} 条")
+
+        if todo:
+            done = [0]
+            done_lock = threading.Lock()
+
+            def worker(tab, task):
+                note_id, url = task
+                with run.activate():
+                    detail, signal = fetch_note_detail(tab, url, note_id)
+                if cacheable(detail, signal):
+                    cache.put(note_id, detail)
+                with done_lock:
+                    done[0] += 1
+                    print(f"已获取笔记详情 {done[0]}/{len(todo)}")
+                return detail
+
+            pool = TabPool(page, min(tabs, len(todo)), setup=tab_setup(lean))
+            with run.waits.paused():
+                results = run_on_tabs(pool, todo, worker)
+            for (note_id, _), result in zip(todo, results):
+                if isinstance(result, Exception):
+                    print(f"获取笔记详情失败 {note_id}: {str(result)}")
+                else:
+                    details[note_id] = result
+
+        for record in records:
+            detail = details.get(extract_note_id(record.get(link_column, '')))
+            if detail:
+                record.update(detail_columns(detail))
+        return records
+    finally:
+        if pool is not None:
+            pool.close()
+        if own_cache:
+            cache.close()
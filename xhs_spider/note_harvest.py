@@ -0,0 +1,257 @@
+import json
+import re
+import time
+
+# 笔记链接中提取笔记ID：/explore/<id>、/discovery/item/<id>、/user/profile/<用户ID>/<id>
+NOTE_ID_PATTERN = re.compile(
+    r'/(?:explore|discovery/item|user/profile/[0-9a-zA-Z]+)/([0-9a-zA-Z]+)'
+)
+
+# 作者主页链接中提取用户ID：/user/profile/<用户ID>
+USER_ID_PATTERN = re.compile(r'/user/profile/([0-9a-zA-Z]+)')
+
+# 增量采集脚本：页面内维护已见笔记ID集合，只返回本轮新出现的笔记
+# 已处理过的卡片会打上 data-xhs-note-id 标记，下一轮直接跳过
+HARVEST_SCRIPT = """
+const seen = window.__xhsSeenNotes || (window.__xhsSeenNotes = new Set());
+const idPattern = /\\/(?:explore|discovery\\/item|user\\/profile\\/[0-9a-zA-Z]+)\\/([0-9a-zA-Z]+)/;
+const fresh = [];
+document.querySelectorAll('.note-item:not([data-xhs-note-id])').forEach(item => {
+    const link = item.querySelector('a');
+    const href = link ? link.getAttribute('href') : '';
+    if (!href) {
+        return;  // 卡片还没渲染完成，下一轮再取
+    }
+    const match = href.match(idPattern);
+    const noteId = match ? match[1] : href.split('?')[0];
+    item.setAttribute('data-xhs-note-id', noteId);
+    if (seen.has(noteId)) {
+        return;
+    }
+    seen.add(noteId);
+
+    const title = item.querySelector('.title');
+    const count = item.querySelector('.count');
+    const isVideo = item.querySelector('.play-icon') !== null;
+    fresh.push({
+        id: noteId,
+        href: href,
+        title: title ? title.textContent : '',
+        like: count ? count.textContent : '',
+        type: isVideo ? '视频' : '图文'
+    });
+});
+return fresh;
+"""
+
+# 清空页面内的已见集合（切换页面或重新采集时使用）
+RESET_SCRIPT = """
+window.__xhsSeenNotes = new Set();
+document.querySelectorAll('.note-item[data-xhs-note-id]').forEach(item => {
+    item.removeAttribute('data-xhs-note-id');
+});
+"""
+
+# 观察器缓冲脚本：首次执行时注入 MutationObserver，卡片一挂载（或链接变化）就写入页面缓冲区
+# 每次执行都会取走缓冲区中的笔记；虚拟列表回收掉的卡片也不会漏掉
+BUFFER_SCRIPT = """
+const config = __CONFIG__;
+let state = window.__xhsNoteBuffer;
+if (!state) {
+    state = window.__xhsNoteBuffer = {seen: new Set(), buffer: [], pending: new Set()};
+    const idPattern = /\\/(?:explore|discovery\\/item|user\\/profile\\/[0-9a-zA-Z]+)\\/([0-9a-zA-Z]+)/;
+
+    // 读取卡片数据，卡片尚未渲染完成时返回 false
+    const capture = item => {
+        if (!item.isConnected) {
+            return true;
+        }
+        const link = item.querySelector(config.linkSelector);
+        const href = link ? link.getAttribute('href') : '';
+        if (!href) {
+            return false;
+        }
+        const match = href.match(idPattern);
+        const noteId = match ? match[1] : href.split('?')[0];
+        if (state.seen.has(noteId)) {
+            return true;
+        }
+        state.seen.add(noteId);
+
+        const title = item.querySelector('.title');
+        const authorElement = item.querySelector('.author');
+        const authorLink = authorElement ? authorElement.closest('a[href*="/user/profile/"]') : null;
+        const count = item.querySelector('.like-wrapper .count, .interaction-info .count, .count');
+        state.buffer.push({
+            id: noteId,
+            href: href,
+            title: title ? title.textContent : '',
+            author: authorElement ? authorElement.textContent : '',
+            authorHref: authorLink ? authorLink.getAttribute('href') : '',
+            like: count ? count.textContent : '',
+            type: item.querySelector('.play-icon') !== null ? '视频' : '图文'
+        });
+        return true;
+    };
+    state.flush = () => {
+        for (const item of Array.from(state.pending)) {
+            if (capture(item)) {
+                state.pending.delete(item);
+            }
+        }
+    };
+    const collect = node => {
+        if (node.nodeType !== 1) {
+            node = node.parentElement;
+            if (!node) {
+                return;
+            }
+        }
+        if (node.matches(config.itemSelector)) {
+            state.pending.add(node);
+        } else {
+            const card = node.closest(config.itemSelector);
+            if (card) {
+                state.pending.add(card);  // 卡片内部内容后到
+            }
+        }
+        node.querySelectorAll(config.itemSelector).forEach(item => state.pending.add(item));
+    };
+    state.observer = new MutationObserver(mutations => {
+        for (const mutation of mutations) {
+            if (mutation.type === 'childList') {
+                mutation.addedNodes.forEach(collect);
+            } else {
+                collect(mutation.target);
+            }
+        }
+        state.flush();
+    });
+    state.observer.observe(document.body, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: ['href']
+    });
+    document.querySelectorAll(config.itemSelector).forEach(item => state.pending.add(item));
+}
+state.flush();
+return state.buffer.splice(0, state.buffer.length);
+"""
+
+# 逐屏滚动一步，返回是否已经到达页面底部
+STEP_SCROLL_SCRIPT = """
+const before = window.pageYOffset;
+window.scrollBy(0, Math.floor(window.innerHeight * 0.8));
+const root = document.documentElement;
+return {
+    moved: window.pageYOffset > before,
+    bottom: window.innerHeight + window.pageYOffset >= root.scrollHeight - 2
+};
+"""
+
+# 页面底部的“没有更多了”标记
+END_OF_FEED_SCRIPT = """
+if (document.querySelector('.end-container, .feeds-end, .no-more')) {
+    return true;
+}
+const tail = Array.from(document.querySelectorAll('.feeds-container ~ div, .feeds-page ~ div, .feeds-page > div:last-child'));
+return tail.some(el => /没有更多|THE END/i.test(el.textContent || ''));
+"""
+
+
+def extract_note_id(url):
+    """从笔记链接中提取笔记ID，无法识别时返回去掉查询参数的路径"""
+    if not url:
+        return ''
+    match = NOTE_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    return url.split('?')[0]
+
+
+def extract_user_id(url):
+    """从作者主页链接中提取用户ID，无法识别时返回去掉查询参数的链接"""
+    if not url:
+        return ''
+    match = USER_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    return url.split('?')[0]
+
+
+class NoteHarvester:
+    """增量笔记采集器：页面和Python两侧都按笔记ID去重"""
+
+    def __init__(self):
+        self.seen = set()
+        self.script = HARVEST_SCRIPT
+
+    def harvest(self, page):
+        """返回自上次调用以来新出现的笔记（页面原始字段）"""
+        return self.accept(page.run_js(self.script))
+
+    def accept(self, items):
+        """过滤掉已经返回过的笔记（异步引擎自行执行 self.script 后调用）"""
+        fresh = []
+        for item in items or []:
+            # 页面刷新后页面内集合会丢失，这里再做一次兜底去重
+            note_id = item.get('id') or extract_note_id(item.get('href'))
+            if not note_id or note_id in self.seen:
+                continue
+            self.seen.add(note_id)
+            fresh.append(item)
+        return fresh
+
+    def reset(self, page=None):
+        """清空已见集合"""
+        self.seen.clear()
+        if page is not None:
+            page.run_js(RESET_SCRIPT)
+
+    def __len__(self):
+        return len(self.seen)
+
+
+class NoteBuffer(NoteHarvester):
+    """基于 MutationObserver 的笔记缓冲区：卡片一挂载就被记录，采集时取走缓冲区"""
+
+    def __init__(self, item_selector='.note-item', link_selector='a'):
+        super().__init__()
+        self.script = BUFFER_SCRIPT.replace('__CONFIG__', json.dumps({
+            'itemSelector': item_selector,
+            'linkSelector': link_selector,
+        }))
+
+    def reset(self, page=None):
+        """清空已见集合并停止页面内观察器"""
+        self.seen.clear()
+        if page is not None:
+            page.run_js("""
+            if (window.__xhsNoteBuffer) {
+                window.__xhsNoteBuffer.observer.disconnect();
+                window.__xhsNoteBuffer = undefined;
+            }
+            """)
+
+
+def step_scroll(page, max_steps=10, pause=0.15):
+    """逐屏向下滚动，让虚拟列表中的每张卡片都挂载一次，返回是否发生了滚动"""
+    moved = False
+    for _ in range(max_steps):
+        state = page.run_js(STEP_SCROLL_SCRIPT) or {}
+        if not state.get('moved'):
+            break
+        moved = True
+        time.sleep(pause)
+        if state.get('bottom'):
+            break
+    return moved
+
+
+def feed_exhausted(page, harvester=None):
+    """判断信息流是否已经到底：接口返回没有更多，或页面出现到底标记"""
+    if harvester is not None and getattr(harvester, 'has_more', True) is False:
+        return True
+    try:
+        return bool(page.run_js(END_OF_FEED_SCRIPT))
+    except Exception:
+        return False
@@ -0,0 +1,91 @@
+import json
+import sqlite3
+import threading
+import time
+
+from app_paths import data_path
+from note_harvest import extract_note_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS author_notes (
+    author_id TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    PRIMARY KEY (author_id, note_id)
+);
+CREATE TABLE IF NOT EXISTS author_runs (
+    author_id TEXT PRIMARY KEY,
+    author TEXT,
+    last_run TEXT NOT NULL,
+    note_count INTEGER NOT NULL
+);
+"""
+
+
+class AuthorNoteIndex:
+    """作者笔记索引：持久化记录每位作者已经采集过的笔记，用于“只采集上次以来的新笔记”"""
+
+    def __init__(self, path=None):
+        self.path = path or data_path('note_index.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def known_ids(self, author_id):
+        """作者已采集过的笔记ID集合"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT note_id FROM author_notes WHERE author_id = ?', (author_id,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def last_run(self, author_id):
+        """作者上次采集的时间，从未采集过时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT last_run FROM author_runs WHERE author_id = ?', (author_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def merge(self, author_id, author, notes):
+        """把本次采集的笔记并入作者历史，返回其中新笔记的数量"""
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        rows = []
+        for note in notes:
+            note_id = extract_note_id(note.get('笔记链接', ''))
+            if note_id:
+                rows.append((author_id, note_id, json.dumps(note, ensure_ascii=False), now))
+        with self._lock:
+            before = self._count(author_id)
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO author_notes (author_id, note_id, data, first_seen) '
+                'VALUES (?, ?, ?, ?)', rows
+            )
+            total = self._count(author_id)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO author_runs (author_id, author, last_run, note_count) '
+                'VALUES (?, ?, ?, ?)', (author_id, author, now, total)
+            )
+            self._conn.commit()
+        return total - before
+
+    def history(self, author_id):
+        """作者的全部历史笔记，按首次采集时间排序"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM author_notes WHERE author_id = ? ORDER BY first_seen, rowid',
+                (author_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _count(self, author_id):
+        return self._conn.execute(
+            'SELECT COUNT(*) FROM author_notes WHERE author_id = ?', (author_id,)
+        ).fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
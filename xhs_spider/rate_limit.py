@@ -0,0 +1,147 @@
+import asyncio
+import random
+import threading
+import time
+
+from metrics import metrics
+
+# 页面被限流的迹象：验证码页、登录弹窗、应有结果却没有任何笔记
+BLOCK_SCRIPT = """
+const text = document.body ? document.body.innerText.slice(0, 2000) : '';
+if (/captcha|verify/i.test(location.href) ||
+    document.querySelector('.red-captcha, [class*="captcha"]') ||
+    text.includes('安全验证') || text.includes('请完成验证')) {
+    return 'captcha';
+}
+if (document.querySelector('.login-modal, .login-container')) {
+    return 'login';
+}
+return document.querySelectorAll('.note-item').length ? 'ok' : 'empty';
+"""
+
+# 各类信号出现后暂停请求的秒数
+BLOCK_PAUSE = {
+    'captcha': 60.0,
+    'login': 30.0,
+    'empty': 0.0,
+}
+SIGNAL_TEXT = {
+    'captcha': '验证码页面',
+    'login': '登录弹窗',
+    'empty': '空结果页',
+}
+
+
+class TokenBucket:
+    """单个账号的令牌桶：所有标签页、任务的页面跳转和滚动都从这里取令牌
+
+    响应正常时速率线性上升（每次 increase，最高 max_rate），
+    出现限流迹象时速率减半（最低 min_rate），验证码和登录弹窗还会暂停 BLOCK_PAUSE 秒
+    """
+
+    def __init__(self, account='default', rate=0.5, burst=2, min_rate=0.05, max_rate=1.5,
+                 increase=0.02, decrease=0.5, jitter=0.2):
+        self.account = account
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.publish()
+
+    def reserve(self, cost=1.0):
+        """预订 cost 个令牌，返回需要等待的秒数（令牌不足时记为欠账，后来者排在后面）"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= cost
+            delay = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+        if delay > 0:
+            # 抖动避免请求间隔过于规律
+            delay *= random.uniform(1, 1 + self.jitter)
+            metrics.count('rate_limit_waits')
+            metrics.count('rate_limit_wait_seconds', round(delay, 3))
+        return delay
+
+    def acquire(self, cost=1.0):
+        """取令牌，必要时阻塞等待"""
+        delay = self.reserve(cost)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, cost=1.0):
+        """异步版 acquire，不阻塞事件循环"""
+        delay = self.reserve(cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def feedback(self, signal):
+        """根据页面状态调整速率：'ok' 加速，'captcha'、'login'、'empty' 退避"""
+        with self._lock:
+            if signal not in BLOCK_PAUSE:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            else:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.tokens = min(self.tokens, 0.0)
+                pause = BLOCK_PAUSE[signal]
+                if pause:
+                    self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        if signal in BLOCK_PAUSE:
+            metrics.count(f'block_signals_{signal}')
+            print(f"检测到{SIGNAL_TEXT[signal]}，请求速率降至 {self.rate:.2f} 次/秒"
+                  + (f"，暂停 {BLOCK_PAUSE[signal]:.0f}s" if BLOCK_PAUSE[signal] else ''))
+        self.publish()
+
+    def observe(self, page, expect_items=False):
+        """检查页面是否出现限流迹象并据此调整速率，返回信号
+
+        expect_items 为 False 时页面上没有笔记不视为异常（如详情页）
+        """
+        try:
+            signal = page.run_js(BLOCK_SCRIPT)
+        except Exception:
+            return None
+        return self.record(signal, expect_items)
+
+    async def observe_async(self, page, expect_items=False):
+        """Playwright 页面版 observe"""
+        try:
+            signal = await page.evaluate(f"() => {{{BLOCK_SCRIPT}}}")
+        except Exception:
+            return None
+        return self.record(signal, expect_items)
+
+    def record(self, signal, expect_items=False):
+        if signal == 'empty' and not expect_items:
+            signal = 'ok'
+        self.feedback(signal)
+        return signal
+
+    def publish(self):
+        """把当前状态写入指标"""
+        metrics.gauge('request_rate', round(self.rate, 3), account=self.account)
+        metrics.gauge('rate_limit_paused_seconds',
+                      round(max(0.0, self.paused_until - time.monotonic()), 1), account=self.account)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def limiter(account='default'):
+    """账号共享的令牌桶，同一进程内所有爬虫、标签页和任务使用同一个
+
+    采集入口的 account 参数即这里的账号，运行中的请求通过 RunContext.limiter() 取得该账号的令牌桶
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(account)
+        if bucket is None:
+            bucket = _buckets[account] = TokenBucket(account)
+        return bucket
@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import tempfile
+
+from excel_writer import ColumnLayout
+from global_index import link_key
+
+# 每次从磁盘读取的行数
+FETCH_SIZE = 1000
+
+
+class DiskResultSink:
+    """落盘的结果接收器：大规模采集时内存占用不随行数增长
+
+    每条记录压缩为按列序号排列的值列表，连同笔记ID和排序值写入临时 SQLite 文件；
+    笔记ID为主键，重复记录在写入时丢弃，没有笔记链接的记录无法去重，单独计数后丢弃。导出时由 SQLite 排序（数据量大时自动使用磁盘临时文件），
+    逐批读出写入只写模式的工作簿，可以只导出前 top 条
+    """
+
+    def __init__(self, sort_by='点赞数', sort_key=None, link_column='笔记链接', path=None, width_padding=5,
+                 converters=None, number_formats=None):
+        # converters 在记录写入时按列转换取值，sort_key 再把排序列的取值转换为数值；
+        # number_formats 只在 save() 写出时设置单元格的数字格式
+        self.converters = converters or {}
+        self.sort_by = sort_by
+        self.sort_key = sort_key or (lambda value: value)
+        self.link_column = link_column
+        self.layout = ColumnLayout(number_formats, width_padding)
+        self.received = 0
+        self.count = 0
+        # 没有笔记链接而丢弃的记录数，不算作重复记录
+        self.unlinked = 0
+        self._seq = 0
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix='.db', prefix='xhs_results_')
+            os.close(fd)
+            self._own_file = True
+        else:
+            self._own_file = False
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # 临时数据，不需要崩溃保护
+        self._conn.execute('PRAGMA journal_mode=OFF')
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'note_id TEXT PRIMARY KEY, sort_value REAL, seq INTEGER, data TEXT NOT NULL)'
+        )
+        self._conn.commit()
+
+    @property
+    def columns(self):
+        return self.layout.columns
+
+    def add(self, records):
+        """写入一批记录，返回其中新记录的条数"""
+        rows = []
+        for record in records:
+            self.received += 1
+            note_id = link_key(record.get(self.link_column))
+            if not note_id:
+                self.unlinked += 1
+                continue
+            record = {name: self.converters[name](value) if name in self.converters else value
+                      for name, value in record.items()}
+            values = self.layout.pack(record)
+            try:
+                sort_value = float(self.sort_key(record.get(self.sort_by)))
+            except (TypeError, ValueError):
+                sort_value = 0.0
+            self._seq += 1
+            rows.append((values, (note_id, sort_value, self._seq, json.dumps(values, ensure_ascii=False))))
+        if not rows:
+            return 0
+        # 逐行插入（同一事务内），只有真正写入的记录参与列宽计算，
+        # 与 StreamingExcelWriter 一样，被丢弃的重复记录不会撑宽导出的列
+        added = 0
+        with self._conn:
+            for values, row in rows:
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO results (note_id, sort_value, seq, data) VALUES (?, ?, ?, ?)', row
+                )
+                if cursor.rowcount == 1:
+                    added += 1
+                    self.layout.measure(values)
+        self.count += added
+        return added
+
+    @property
+    def duplicates(self):
+        """被丢弃的重复记录数（不含没有笔记链接的记录）"""
+        return self.received - self.count - self.unlinked
+
+    def __len__(self):
+        return self.count
+
+    def sorted_rows(self, top=None):
+        """按排序值降序逐条返回值列表（已补齐到全部列）"""
+        sql = 'SELECT data FROM results ORDER BY sort_value DESC, seq'
+        params = ()
+        if top:
+            sql += ' LIMIT ?'
+            params = (top,)
+        cursor = self._conn.execute(sql, params)
+        width = len(self.columns)
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                return
+            for (data,) in batch:
+                values = json.loads(data)
+                if len(values) < width:
+                    values.extend([None] * (width - len(values)))
+                yield values
+
+    def records(self, top=None):
+        """按排序顺序逐条返回记录字典"""
+        for values in self.sorted_rows(top):
+            yield {name: value for name, value in zip(self.columns, values) if value is not None}
+
+    def save(self, path, title=None, top=None):
+        """排序后写出工作簿，top 为只导出的前几条"""
+        return self.layout.save(path, self.sorted_rows(top), title)
+
+    def close(self):
+        """关闭并删除临时文件"""
+        self._conn.close()
+        if self._own_file:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,63 @@
+import threading
+from contextlib import contextmanager
+
+import metrics
+import waits
+from rate_limit import limiter
+
+# 线程当前所属的运行
+_local = threading.local()
+
+
+class RunContext:
+    """一次采集运行（一次 main / batch_main 调用）独有的统计和状态
+
+    GUI 可以同时运行多个任务，每次运行各有一份分阶段指标、等待统计和本轮首次出现的笔记，
+    不会互相清零或混在一起。运行中的每个线程（包括标签页线程）通过 activate() 绑定到本次运行，
+    之后 metrics.metrics 和 waits.stats 记录到本次运行；account 为本次运行登录的账号，
+    运行中的请求都使用该账号的令牌桶（见 limiter）
+    """
+
+    def __init__(self, job, metrics_=None, wait_stats=None, account='default'):
+        self.job = job
+        self.account = account
+        self.metrics = metrics_ or metrics.Metrics()
+        self.waits = wait_stats or waits.WaitStats()
+        # 本轮首次出现的笔记ID：同一轮内再次遇到时仍算新笔记（见 GlobalNoteIndex.flag）
+        self.fresh_notes = set()
+
+    @contextmanager
+    def activate(self):
+        """with 语句中把当前线程绑定到本次运行，期间的时间计入线程运行时间"""
+        previous = getattr(_local, 'run', None)
+        if previous is self:
+            yield self
+            return
+        _local.run = self
+        try:
+            with metrics.bind(self.metrics), waits.bind(self.waits), self.waits.track():
+                yield self
+        finally:
+            _local.run = previous
+
+    def limiter(self):
+        """本次运行所用账号的令牌桶"""
+        return limiter(self.account)
+
+    def report(self):
+        """等待耗时和分阶段耗时报告"""
+        return self.waits.report() + '\n' + self.metrics.report()
+
+    def export(self):
+        """写出页面就绪耗时和指标文件"""
+        self.waits.export()
+        self.metrics.export(self.job)
+
+
+# 不在任何运行中的线程使用的运行，与 metrics.background、waits.background 共用统计
+background = RunContext('background', metrics.background, waits.background)
+
+
+def current_run():
+    """当前线程所属的运行，没有绑定时为 background"""
+    return getattr(_local, 'run', None) or background
@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+import zlib
+
+from app_paths import data_path
+from lean import block_resources, lean_options
+from rate_limit import limiter
+import waits
+
+# 登录凭证 Cookie：存在且未过期即视为已登录
+SESSION_COOKIE = 'web_session'
+EXPLORE_URL = 'https://www.xiaohongshu.com/explore'
+# 默认账号沿用 DrissionPage 的默认端口，其他账号按名称分配固定端口
+DEFAULT_PORT = 9222
+
+
+def cookie_expiry(cookie):
+    """Cookie 过期时间戳，会话 Cookie 返回 None"""
+    expires = cookie.get('expires', cookie.get('expiry'))
+    if expires is None or expires <= 0:
+        return None
+    return float(expires)
+
+
+def session_cookie(cookies):
+    """从 Cookie 列表中找出登录凭证"""
+    for cookie in cookies or []:
+        if cookie.get('name') == SESSION_COOKIE and cookie.get('value'):
+            return cookie
+    return None
+
+
+def cookies_valid(cookies, margin=0):
+    """登录凭证存在且在 margin 秒后仍未过期"""
+    cookie = session_cookie(cookies)
+    if cookie is None:
+        return False
+    expiry = cookie_expiry(cookie)
+    return expiry is None or expiry > time.time() + margin
+
+
+# 正在续期的页面（按 id）对应的会话，quit_browser 关闭浏览器前先停止续期
+_refreshing = {}
+_refreshing_lock = threading.Lock()
+
+
+def quit_browser(page):
+    """停止页面所属会话的后台续期线程并关闭浏览器（命令行入口结束时使用）"""
+    with _refreshing_lock:
+        session = _refreshing.get(id(page))
+    if session is not None:
+        session.stop_refresh()
+    page.quit()
+
+
+class BrowserSession:
+    """按账号持久化的浏览器会话：独立的用户数据目录和 Cookie 存储
+
+    登录状态直接从 Cookie 的有效期判断，不需要加载页面；只有 Cookie 确实失效时才进入扫码流程
+    """
+
+    def __init__(self, account='default', refresh_margin=12 * 3600, check_interval=300):
+        self.account = account
+        self.profile_dir = data_path(os.path.join('profiles', account))
+        self.cookie_path = os.path.join(self.profile_dir, 'cookies.json')
+        self.port = DEFAULT_PORT if account == 'default' else DEFAULT_PORT + 1 + zlib.crc32(account.encode('utf-8')) % 1000
+        self.refresh_margin = refresh_margin
+        self.check_interval = check_interval
+        # 本次启动是否实际使用了精简模式
+        self.lean = False
+        self._stop = threading.Event()
+        self._refresher = None
+        # 续期线程所续期的浏览器页面，浏览器重启后页面变化时需要换一个线程
+        self._refresh_page = None
+        os.makedirs(self.profile_dir, exist_ok=True)
+
+    def options(self, lean=False):
+        """使用该账号用户数据目录和端口的浏览器配置，lean 为 True 时不加载图片并以无界面模式运行"""
+        from DrissionPage import ChromiumOptions
+
+        co = ChromiumOptions()
+        co.set_user_data_path(self.profile_dir)
+        co.set_local_port(self.port)
+        if lean:
+            lean_options(co)
+        return co
+
+    def open(self, lean=False):
+        """启动（或连接到）该账号的浏览器，lean 为 True 时使用精简模式（不加载图片、视频和字体，无界面运行）
+
+        精简模式只在已保存有效登录凭证时启用：扫码登录需要显示二维码图片和浏览器窗口。
+        该账号的浏览器已在运行时会直接连接，启动参数不生效，但仍会在标签页上拦截资源
+        """
+        from DrissionPage import ChromiumPage
+
+        self.lean = lean and self.stored_valid()
+        if lean and not self.lean:
+            print("登录已失效，本次以有界面模式启动以便扫码，登录后下次运行即可使用精简模式")
+        page = ChromiumPage(self.options(self.lean))
+        if self.lean:
+            block_resources(page)
+        return page
+
+    def load_cookies(self):
+        """读取保存的 Cookie，文件不存在或损坏时返回空列表"""
+        try:
+            with open(self.cookie_path, encoding='utf-8') as f:
+                return json.load(f).get('cookies', [])
+        except (OSError, ValueError):
+            return []
+
+    def save_cookies(self, cookies):
+        """保存 Cookie（先写临时文件再替换，避免中断时损坏）"""
+        tmp_path = self.cookie_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'account': self.account,
+                'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'cookies': cookies,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cookie_path)
+
+    def browser_cookies(self, page):
+        """读取浏览器中的全部 Cookie（含过期时间）"""
+        try:
+            return page.cookies(all_domains=True, all_info=True)
+        except Exception:
+            return []
+
+    def stored_valid(self):
+        """只看本地 Cookie 存储判断是否已登录，不访问浏览器"""
+        return cookies_valid(self.load_cookies())
+
+    def logged_in(self, page):
+        """浏览器中的登录凭证是否有效；有效时同步到 Cookie 存储"""
+        cookies = self.browser_cookies(page)
+        if cookies_valid(cookies):
+            self.save_cookies(cookies)
+            return True
+        return False
+
+    def restore(self, page):
+        """浏览器中没有有效凭证时，把存储中仍有效的 Cookie 写回浏览器"""
+        cookies = self.load_cookies()
+        if not cookies_valid(cookies):
+            return False
+        try:
+            page.set.cookies(cookies)
+        except Exception:
+            return False
+        return self.logged_in(page)
+
+    def ensure_login(self, page, dom_check=None, timeout=120, interval=0.5):
+        """确保已登录，返回是否成功
+
+        依次尝试：浏览器 Cookie → 存储的 Cookie → 页面登录状态（dom_check）→ 扫码登录；
+        扫码时轮询登录凭证，登录成功立即返回，最多等待 timeout 秒
+        """
+        start = time.perf_counter()
+        if self.logged_in(page) or self.restore(page):
+            waits.stats.add_ready('login_cookie', SESSION_COOKIE, time.perf_counter() - start, 0)
+            print("已检测到登录状态（Cookie 有效）")
+            self.start_refresh(page)
+            return True
+
+        limiter(self.account).acquire()
+        page.get(EXPLORE_URL)
+        if dom_check is not None and dom_check(page):
+            self.save_cookies(self.browser_cookies(page))
+            self.start_refresh(page)
+            return True
+
+        print(f"登录已失效，请在{timeout}秒内扫码登录")
+        start = time.perf_counter()
+        deadline = start + timeout
+        while time.perf_counter() < deadline:
+            if self.logged_in(page):
+                waits.stats.add_ready('login_scan', SESSION_COOKIE, time.perf_counter() - start, timeout)
+                print("登录成功")
+                self.start_refresh(page)
+                return True
+            time.sleep(interval)
+        waits.stats.add_ready('login_scan', None, time.perf_counter() - start, timeout)
+        return False
+
+    def refresh(self, page):
+        """在新标签页中访问站点让服务端续期登录凭证，并保存新的 Cookie"""
+        tab = page.new_tab()
+        if self.lean:
+            block_resources(tab)
+        limiter(self.account).acquire()
+        tab.get(EXPLORE_URL)
+        try:
+            waits.adaptive_wait(tab, 'session_refresh', timeout=5)
+        finally:
+            tab.close()
+        return self.logged_in(page)
+
+    def start_refresh(self, page):
+        """启动后台续期线程：凭证剩余有效期不足 refresh_margin 时自动续期
+
+        已有线程在为同一页面续期时不重复启动；页面变化（浏览器重启）时先停止旧线程再为新页面启动
+        """
+        with _refreshing_lock:
+            if self._refresher is not None and self._refresher.is_alive() and self._refresh_page is page:
+                return
+        self.stop_refresh()
+        # 每个线程一个停止事件，旧线程退出前不会被新线程的 clear() 唤醒后继续运行
+        stop = self._stop = threading.Event()
+
+        def run():
+            while not stop.wait(self.check_interval):
+                try:
+                    cookies = page.cookies(all_domains=True, all_info=True)
+                except Exception:
+                    # 读不到 Cookie 说明浏览器已关闭，不能当作凭证即将过期
+                    return
+                try:
+                    if not cookies_valid(cookies, self.refresh_margin):
+                        print("登录凭证即将过期，正在续期...")
+                        if not self.refresh(page):
+                            print("登录凭证续期失败，下次运行时需要重新扫码")
+                except Exception:
+                    # 浏览器已关闭
+                    return
+
+        with _refreshing_lock:
+            self._refresh_page = page
+            self._refresher = threading.Thread(target=run, daemon=True)
+            self._refresher.start()
+            _refreshing[id(page)] = self
+
+    def stop_refresh(self, timeout=5):
+        """停止后台续期线程，最多等待 timeout 秒让它退出"""
+        with _refreshing_lock:
+            self._stop.set()
+            refresher = self._refresher
+            if self._refresh_page is not None and _refreshing.get(id(self._refresh_page)) is self:
+                del _refreshing[id(self._refresh_page)]
+            self._refresher = None
+            self._refresh_page = None
+        if refresher is not None and refresher is not threading.current_thread():
+            refresher.join(timeout)
@@ -0,0 +1,332 @@
+"""小红书离线模拟服务
+
+提供与线上相同类名的发现页、作者主页、搜索结果页，以及背后的笔记列表/搜索接口，
+接口数据可以来自录制的响应文件，也可以按真实结构合成。
+支持无限滚动（--notes 0）、虚拟列表（只保留最近的 N 张卡片）、接口延迟和“加载更多”按钮。
+
+用法：
+    python simulator.py --port 8000 --notes 500
+    python simulator.py --notes 0 --virtualize 40 --latency 0.3 --load-more
+    python simulator.py --payloads recorded/   # 目录下 user_posted_0.json、search_notes_0.json ...
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from feed_api import SEARCH_NOTES_API, USER_POSTED_API
+
+# 页面脚本：加载第一页数据，滚动接近底部时继续请求下一页
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>__TITLE__</title>
+<style>
+.note-item { display: block; height: 240px; margin: 8px; }
+.load-more { padding: 12px; cursor: pointer; }
+</style></head>
+<body>
+<div class="info"><div class="user-name">__USER_NAME__</div></div>
+<div class="feeds-page"></div>
+<script>
+const mode = '__MODE__';
+const keyword = __KEYWORD__;
+const userId = '__USER_ID__';
+// virtualize：最多保留的卡片数（0 为不回收）；loadMore：是否需要点击“加载更多”才加载下一页
+const options = __OPTIONS__;
+let cursor = '', page = 1, hasMore = true, loading = false, recycledHeight = 0;
+
+function renderCard(note) {
+    const item = document.createElement('section');
+    item.className = 'note-item';
+    item.innerHTML =
+        '<a href="/explore/' + note.id + '" style="display:none"></a>' +
+        '<a class="cover" href="' + note.coverHref + '">' +
+        (note.video ? '<span class="play-icon"></span>' : '') + '</a>' +
+        '<div class="footer"><a class="title"><span></span></a>' +
+        '<div class="author-wrapper"><a href="/user/profile/' + note.userId + '">' +
+        '<div class="author"></div></a>' +
+        '<span class="like-wrapper"><span class="count"></span></span></div></div>';
+    item.querySelector('.title span').textContent = note.title;
+    item.querySelector('.author').textContent = note.nickname;
+    item.querySelector('.count').textContent = note.liked;
+    return item;
+}
+
+function cardsFrom(data) {
+    if (mode === 'profile') {
+        return (data.notes || []).map(n => ({
+            id: n.note_id, title: n.display_title, video: n.type === 'video',
+            nickname: n.user.nickname, userId: n.user.user_id, liked: n.interact_info.liked_count,
+            coverHref: '/user/profile/' + n.user.user_id + '/' + n.note_id + '?xsec_token=' + n.xsec_token
+        }));
+    }
+    return (data.items || []).map(e => ({
+        id: e.id, title: e.note_card.display_title, video: e.note_card.type === 'video',
+        nickname: e.note_card.user.nickname, userId: e.note_card.user.user_id,
+        liked: e.note_card.interact_info.liked_count,
+        coverHref: '/explore/' + e.id + '?xsec_token=' + e.xsec_token
+    }));
+}
+
+async function loadMore() {
+    if (loading || !hasMore) {
+        return;
+    }
+    loading = true;
+    let response;
+    if (mode === 'profile') {
+        response = await fetch('__USER_POSTED_API__?num=30&user_id=' + userId + '&cursor=' + cursor);
+    } else {
+        response = await fetch('__SEARCH_NOTES_API__', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({keyword: keyword, page: page, page_size: 20})
+        });
+    }
+    const payload = await response.json();
+    const data = payload.data || {};
+    const feed = document.querySelector('.feeds-page');
+    cardsFrom(data).forEach(note => feed.appendChild(renderCard(note)));
+    recycle(feed);
+    hasMore = !!data.has_more;
+    const button = document.querySelector('.load-more');
+    if (button) {
+        button.remove();
+    }
+    if (!hasMore) {
+        const end = document.createElement('div');
+        end.className = 'end-container';
+        end.textContent = '- THE END -';
+        feed.after(end);
+    } else if (options.loadMore) {
+        const more = document.createElement('div');
+        more.className = 'load-more';
+        more.textContent = '加载更多';
+        more.addEventListener('click', loadMore);
+        feed.after(more);
+    }
+    cursor = data.cursor || '';
+    page += 1;
+    loading = false;
+}
+
+// 虚拟列表：移除最早的卡片，用顶部留白保持滚动位置
+function recycle(feed) {
+    if (!options.virtualize) {
+        return;
+    }
+    while (feed.children.length > options.virtualize) {
+        const first = feed.firstElementChild;
+        const style = getComputedStyle(first);
+        recycledHeight += first.offsetHeight + parseFloat(style.marginTop) + parseFloat(style.marginBottom);
+        first.remove();
+    }
+    feed.style.paddingTop = recycledHeight + 'px';
+}
+
+window.addEventListener('scroll', () => {
+    const root = document.documentElement;
+    if (!options.loadMore && window.innerHeight + window.pageYOffset >= root.scrollHeight - 300) {
+        loadMore();
+    }
+});
+loadMore();
+</script>
+</body></html>
+"""
+
+
+def synthetic_card(index, user_id='5c56f621000000001a01f759'):
+    """按接口结构合成一条笔记"""
+    return {
+        'note_id': f'{index:024x}',
+        'xsec_token': f'token{index}',
+        'type': 'video' if index % 5 == 0 else 'normal',
+        'display_title': f'模拟笔记 {index}',
+        'user': {'user_id': user_id, 'nickname': '模拟作者'},
+        'interact_info': {
+            'liked_count': f'{index / 10:.1f}万' if index and index % 7 == 0 else str(index * 3),
+            'collected_count': str(index),
+            'comment_count': str(index % 50),
+            'shared_count': str(index % 20),
+        },
+    }
+
+
+class FeedData:
+    """接口数据源：优先使用录制的响应文件，否则合成"""
+
+    def __init__(self, total_notes=200, page_size=20, payload_dir=None):
+        # total_notes 为 None 或 0 时无限滚动
+        self.total_notes = total_notes
+        self.page_size = page_size
+        self.payload_dir = payload_dir
+
+    def recorded(self, name, index):
+        """读取录制的第 index 页响应，不存在时返回 None"""
+        if not self.payload_dir:
+            return None
+        path = os.path.join(self.payload_dir, f'{name}_{index}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def page_cards(self, index):
+        """合成第 index 页（从0开始）的笔记"""
+        start = index * self.page_size
+        if not self.total_notes:
+            end = start + self.page_size
+            return [synthetic_card(i) for i in range(start, end)], True
+        end = min(start + self.page_size, self.total_notes)
+        return [synthetic_card(i) for i in range(start, end)], end < self.total_notes
+
+    def user_posted(self, cursor):
+        """作者笔记列表接口，cursor 为页码"""
+        index = int(cursor) if cursor else 0
+        payload = self.recorded('user_posted', index)
+        if payload is not None:
+            payload.setdefault('data', {})['cursor'] = str(index + 1)
+            return payload
+        cards, has_more = self.page_cards(index)
+        return {'code': 0, 'success': True,
+                'data': {'cursor': str(index + 1), 'has_more': has_more, 'notes': cards}}
+
+    def search_notes(self, page):
+        """搜索结果接口，page 从1开始"""
+        index = max(int(page or 1), 1) - 1
+        payload = self.recorded('search_notes', index)
+        if payload is not None:
+            return payload
+        cards, has_more = self.page_cards(index)
+        items = [{'id': card.pop('note_id'), 'model_type': 'note',
+                  'xsec_token': card.pop('xsec_token'), 'note_card': card} for card in cards]
+        return {'code': 0, 'success': True, 'data': {'has_more': has_more, 'items': items}}
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """模拟服务请求处理"""
+
+    data = None
+    # 接口响应延迟（秒）和页面选项
+    latency = 0.0
+    page_options = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_page(self, mode, title, user_name='', keyword='', user_id=''):
+        html = (PAGE_TEMPLATE
+                .replace('__TITLE__', title)
+                .replace('__USER_NAME__', user_name)
+                .replace('__MODE__', mode)
+                .replace('__KEYWORD__', json.dumps(keyword))
+                .replace('__USER_ID__', user_id)
+                .replace('__OPTIONS__', json.dumps(self.page_options))
+                .replace('__USER_POSTED_API__', USER_POSTED_API)
+                .replace('__SEARCH_NOTES_API__', SEARCH_NOTES_API))
+        self.send_body(html, 'text/html; charset=utf-8')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == USER_POSTED_API:
+            time.sleep(self.latency)
+            payload = self.data.user_posted(query.get('cursor', [''])[0])
+            self.send_body(json.dumps(payload, ensure_ascii=False), 'application/json')
+        elif url.path.startswith('/user/profile/'):
+            user_id = url.path.rstrip('/').split('/')[-1]
+            self.send_page('profile', '作者主页', user_name='模拟作者', user_id=user_id)
+        elif url.path == '/search_result':
+            self.send_page('search', '搜索结果', keyword=query.get('keyword', [''])[0])
+        elif url.path == '/explore':
+            # 发现页与搜索结果页结构相同，数据来自同一个接口
+            self.send_page('search', '发现')
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != SEARCH_NOTES_API:
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        payload = self.data.search_notes(body.get('page', 1))
+        self.send_body(json.dumps(payload, ensure_ascii=False), 'application/json')
+
+
+class FeedSimulator:
+    """在后台线程中运行的模拟服务
+
+    latency 为每次接口请求的延迟秒数；virtualize 为页面最多保留的卡片数（0 为不回收）；
+    load_more 为 True 时需要点击“加载更多”按钮才会加载下一页；其余参数传给 FeedData
+    """
+
+    def __init__(self, port=0, latency=0.0, virtualize=0, load_more=False, **data_options):
+        handler = type('Handler', (SimulatorHandler,), {
+            'data': FeedData(**data_options),
+            'latency': latency,
+            'page_options': {'virtualize': virtualize, 'loadMore': load_more},
+        })
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """启动服务，返回服务地址"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """停止服务"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='小红书离线模拟服务')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--notes', type=int, default=200, help='合成笔记总数（0 为无限滚动）')
+    parser.add_argument('--page-size', type=int, default=20, help='每次接口返回的笔记数')
+    parser.add_argument('--payloads', help='录制的接口响应目录')
+    parser.add_argument('--latency', type=float, default=0.0, help='接口延迟（秒）')
+    parser.add_argument('--virtualize', type=int, default=0, help='页面最多保留的卡片数（0 为不回收）')
+    parser.add_argument('--load-more', action='store_true', help='需要点击“加载更多”才加载下一页')
+    args = parser.parse_args()
+
+    simulator = FeedSimulator(args.port, latency=args.latency, virtualize=args.virtualize,
+                              load_more=args.load_more, total_notes=args.notes,
+                              page_size=args.page_size, payload_dir=args.payloads)
+    print(f"模拟服务已启动：{simulator.base_url}/user/profile/5c56f621000000001a01f759")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        simulator.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
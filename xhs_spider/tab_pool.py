@@ -0,0 +1,79 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class TabPool:
+    """在同一个已登录浏览器上维护一组标签页，供多个任务并发使用
+
+    setup(tab) 在每个新建的标签页上调用一次（如精简模式的资源拦截）
+    """
+
+    def __init__(self, browser_page, size, setup=None):
+        self.browser_page = browser_page
+        self.size = max(1, size)
+        self.tabs = []
+        self._idle = queue.Queue()
+        # 传入的是标签页对象时通过其所属浏览器新建标签页
+        new_tab = getattr(browser_page, 'new_tab', None) or browser_page.browser.new_tab
+        for _ in range(self.size):
+            tab = new_tab()
+            if setup is not None:
+                setup(tab)
+            self.tabs.append(tab)
+            self._idle.put(tab)
+
+    def acquire(self, timeout=None):
+        """取出一个空闲标签页，超时抛出 queue.Empty"""
+        return self._idle.get(timeout=timeout)
+
+    def release(self, tab):
+        """归还标签页"""
+        self._idle.put(tab)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """with 语句中租用一个标签页"""
+        tab = self.acquire(timeout)
+        try:
+            yield tab
+        finally:
+            self.release(tab)
+
+    def close(self):
+        """关闭池中所有标签页"""
+        for tab in self.tabs:
+            try:
+                tab.close()
+            except Exception:
+                pass
+        self.tabs.clear()
+
+
+def run_on_tabs(pool, tasks, worker):
+    """每个标签页一个调度线程，从共享队列中领取任务执行
+
+    worker(tab, task) 的返回值按任务顺序返回；单个任务出错时结果为该异常
+    """
+    pending = queue.Queue()
+    for index, task in enumerate(tasks):
+        pending.put((index, task))
+    results = [None] * pending.qsize()
+
+    def schedule(tab):
+        while True:
+            try:
+                index, task = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = worker(tab, task)
+            except Exception as e:
+                results[index] = e
+
+    threads = [threading.Thread(target=schedule, args=(tab,), daemon=True) for tab in pool.tabs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
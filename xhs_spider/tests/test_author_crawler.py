@@ -0,0 +1,30 @@
+import extract_author
+from excel_writer import StreamingExcelWriter
+from global_index import GlobalNoteIndex, note_key
+
+
+def feed_notes(count):
+    return [{'作者': '作者', '笔记类型': '图文', '标题': f'笔记{i}', '点赞数': str(i),
+             '笔记链接': f'https://www.xiaohongshu.com/explore/{i:024x}'} for i in range(count)]
+
+
+def test_seen_notes_at_top_of_feed_do_not_stop_crawl(tmp_path, monkeypatch):
+    """作者主页顶部是以前运行中采集过的笔记时，skip_seen 过滤后的空页不算“没有新笔记”"""
+    notes = feed_notes(200)
+    index = GlobalNoteIndex(str(tmp_path / 'global_notes.db'))
+    index.record(notes[:60], 'search')
+    pages = iter(notes[i:i + 20] for i in range(0, len(notes), 20))
+
+    monkeypatch.setattr(extract_author, 'seen_notes', lambda: index)
+    monkeypatch.setattr(extract_author, 'get_note_info', lambda page, author, harvester=None: next(pages, []))
+    monkeypatch.setattr(extract_author, 'page_scroll_down', lambda page: None)
+    monkeypatch.setattr(extract_author, 'feed_exhausted', lambda page, harvester=None: False)
+
+    recorder = StreamingExcelWriter(key=note_key)
+    reason = extract_author.crawler(None, '作者', extract_author.page_budget(100), recorder,
+                                    target=100, skip_seen=True)
+    index.close()
+
+    assert reason == 'target_reached'
+    assert len(recorder) == 100
+    assert {record['标题'] for record in recorder.records()} == {f'笔记{i}' for i in range(60, 160)}
@@ -0,0 +1,319 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from app_paths import data_path
+
+# 默认的笔记卡片选择器
+CARD_SELECTOR = '.note-item'
+
+# 页面探针：首次执行时给 fetch / XMLHttpRequest 打补丁统计进行中的请求，
+# 返回卡片数量、观察器缓冲区已见笔记数和网络空闲时长
+PROBE_SCRIPT = """
+if (!window.__xhsNet) {
+    const net = window.__xhsNet = {inflight: 0, last: performance.now()};
+    const done = () => {
+        net.inflight = Math.max(0, net.inflight - 1);
+        net.last = performance.now();
+    };
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function (...args) {
+            net.inflight++;
+            net.last = performance.now();
+            return originalFetch.apply(this, args).finally(done);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        net.inflight++;
+        net.last = performance.now();
+        this.addEventListener('loadend', done, {once: true});
+        return originalSend.apply(this, args);
+    };
+}
+const buffer = window.__xhsNoteBuffer;
+return {
+    count: document.querySelectorAll(__SELECTOR__).length,
+    seen: buffer ? buffer.seen.size + buffer.buffer.length : 0,
+    inflight: window.__xhsNet.inflight,
+    quiet: performance.now() - window.__xhsNet.last
+};
+"""
+
+# 选择器竞速：一次执行中检查全部候选选择器（CSS 或 xpath: 前缀），返回各自的匹配数量
+RACE_SCRIPT = """
+const selectors = __SELECTORS__;
+return selectors.map(selector => {
+    try {
+        if (selector.startsWith('xpath:')) {
+            return document.evaluate('count(' + selector.slice(6) + ')', document, null,
+                                     XPathResult.NUMBER_TYPE, null).numberValue;
+        }
+        return document.querySelectorAll(selector).length;
+    } catch (e) {
+        return 0;
+    }
+});
+"""
+
+# 竞速结果：匹配到的选择器（超时为 None）、耗时和最后一次检查时各选择器的匹配数量
+Ready = namedtuple('Ready', ['selector', 'elapsed', 'counts'])
+
+
+class WaitStats:
+    """统计一次运行中等待与工作的耗时（每次运行各有一份，见 run_context.RunContext）
+
+    多个标签页线程并行时等待时间是各线程之和，所以工作时间按各线程的运行时间之和（busy）计算
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """开始新一轮统计"""
+        with self._lock:
+            self.started = time.perf_counter()
+            self.busy = 0.0
+            self.records = {}
+            self.reasons = {}
+            self.pages = 0
+            self.ready = []
+
+    @contextmanager
+    def track(self):
+        """with 语句中的时间计入线程运行时间"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.busy += time.perf_counter() - start
+
+    @contextmanager
+    def paused(self):
+        """with 语句中的时间不计入线程运行时间（如等待标签页线程结束）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.busy -= time.perf_counter() - start
+
+    def add(self, label, waited, budget, reason):
+        """记录一次等待：实际耗时、原固定等待时长和结束原因"""
+        with self._lock:
+            record = self.records.setdefault(label, [0, 0.0, 0.0])
+            record[0] += 1
+            record[1] += waited
+            record[2] += budget
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def add_ready(self, label, selector, elapsed, timeout):
+        """记录一次页面就绪等待：匹配到的选择器和耗时"""
+        with self._lock:
+            self.ready.append({
+                'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'label': label,
+                'selector': selector,
+                'elapsed': round(elapsed, 3),
+                'timeout': timeout,
+            })
+
+    def page_done(self, count=1):
+        """记录完成的页数"""
+        with self._lock:
+            self.pages += count
+
+    def report(self):
+        """生成等待/工作耗时报告"""
+        with self._lock:
+            total = time.perf_counter() - self.started
+            busy = self.busy or total
+            waited = sum(r[1] for r in self.records.values())
+            budget = sum(r[2] for r in self.records.values())
+            lines = [
+                "等待耗时统计：",
+                f"总耗时 {total:.1f}s，各线程合计 {busy:.1f}s，其中等待 {waited:.1f}s，"
+                f"工作 {max(busy - waited, 0):.1f}s",
+                f"原固定等待 {budget:.1f}s，节省 {budget - waited:.1f}s",
+            ]
+            if self.pages:
+                lines.append(f"共 {self.pages} 页，每页节省 {(budget - waited) / self.pages:.2f}s")
+            for label, (count, label_waited, label_budget) in sorted(self.records.items()):
+                lines.append(
+                    f"  {label}: {count} 次，等待 {label_waited:.1f}s / 原 {label_budget:.1f}s"
+                )
+            if self.reasons:
+                reasons = '，'.join(f"{k} {v} 次" for k, v in sorted(self.reasons.items()))
+                lines.append(f"  结束原因：{reasons}")
+            if self.ready:
+                lines.append("页面就绪耗时：")
+                labels = {}
+                for event in self.ready:
+                    labels.setdefault(event['label'], []).append(event)
+                for label, events in sorted(labels.items()):
+                    elapsed = [event['elapsed'] for event in events]
+                    missed = sum(1 for event in events if event['selector'] is None)
+                    lines.append(
+                        f"  {label}: {len(events)} 次，平均 {sum(elapsed) / len(elapsed):.2f}s，"
+                        f"最长 {max(elapsed):.2f}s，超时 {missed} 次"
+                    )
+            return '\n'.join(lines)
+
+    def export(self, path=None):
+        """把本轮的页面就绪耗时追加写入 JSON Lines 文件，返回文件路径"""
+        path = path or data_path('page_ready.jsonl')
+        with self._lock:
+            events = list(self.ready)
+        if events:
+            with open(path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        return path
+
+
+# 线程当前所属运行的等待统计
+_local = threading.local()
+
+# 不在任何运行中的线程（如后台保活、单独调用采集函数）记录到这里
+background = WaitStats()
+
+
+def current():
+    """当前线程所属运行的等待统计，没有绑定时为 background"""
+    return getattr(_local, 'stats', None) or background
+
+
+@contextmanager
+def bind(target):
+    """with 语句中把当前线程的等待统计绑定到 target"""
+    previous = getattr(_local, 'stats', None)
+    _local.stats = target
+    try:
+        yield target
+    finally:
+        _local.stats = previous
+
+
+class CurrentWaitStats:
+    """转发到当前线程所属运行的等待统计"""
+
+    def add(self, label, waited, budget, reason):
+        current().add(label, waited, budget, reason)
+
+    def add_ready(self, label, selector, elapsed, timeout):
+        current().add_ready(label, selector, elapsed, timeout)
+
+    def page_done(self, count=1):
+        current().page_done(count)
+
+
+stats = CurrentWaitStats()
+
+
+def probe(page, selector=CARD_SELECTOR):
+    """读取页面当前的卡片数量和网络状态"""
+    script = PROBE_SCRIPT.replace('__SELECTOR__', json.dumps(selector))
+    try:
+        return page.run_js(script) or {}
+    except Exception:
+        # 页面跳转过程中执行脚本可能失败
+        return {}
+
+
+def adaptive_wait(page, label, timeout, baseline=None, selector=CARD_SELECTOR,
+                  idle_ms=500, min_wait=0.3, interval=0.1):
+    """自适应等待：出现新卡片、网络空闲或到达截止时间时立即返回
+
+    baseline 为等待前的 probe() 结果；不传时只要页面上存在匹配元素就返回。
+    timeout 即原来的固定等待时长，返回结束原因：new_cards / network_idle / timeout
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    reason = 'timeout'
+    while True:
+        state = probe(page, selector)
+        elapsed = time.perf_counter() - start
+        if state:
+            if baseline is None:
+                if state.get('count', 0) > 0:
+                    reason = 'new_cards'
+                    break
+            elif (state.get('count', 0) > baseline.get('count', 0)
+                  or state.get('seen', 0) > baseline.get('seen', 0)):
+                reason = 'new_cards'
+                break
+            if (elapsed >= min_wait and state.get('inflight', 1) == 0
+                    and state.get('quiet', 0) >= idle_ms):
+                reason = 'network_idle'
+                break
+        if time.perf_counter() + interval > deadline:
+            break
+        time.sleep(interval)
+    waited = time.perf_counter() - start
+    stats.add(label, waited, timeout, reason)
+    return reason
+
+
+def wait_for_any(page, selectors, timeout, label, interval=0.1):
+    """选择器竞速：在同一截止时间内轮询全部候选选择器，任意一个匹配即返回
+
+    每次轮询只执行一次页面脚本；按 selectors 的顺序取第一个有匹配的选择器。
+    返回 Ready(selector, elapsed, counts)，超时时 selector 为 None
+    """
+    script = RACE_SCRIPT.replace('__SELECTORS__', json.dumps(list(selectors)))
+    start = time.perf_counter()
+    deadline = start + timeout
+    counts = [0] * len(selectors)
+    selector = None
+    while True:
+        try:
+            counts = page.run_js(script) or counts
+        except Exception:
+            # 页面跳转过程中执行脚本可能失败
+            pass
+        matched = next((i for i, count in enumerate(counts) if count), None)
+        if matched is not None:
+            selector = selectors[matched]
+            break
+        if time.perf_counter() + interval > deadline:
+            break
+        time.sleep(interval)
+    elapsed = time.perf_counter() - start
+    stats.add_ready(label, selector, elapsed, timeout)
+    return Ready(selector, elapsed, counts)
+
+
+def wait_for_markers(page, selectors, timeout, label, stop_on=(), interval=0.1):
+    """状态检查：轮询到截止时间，或 stop_on 中的任意一个选择器出现为止，再一起判断全部选择器
+
+    与 wait_for_any 不同，先出现的元素不代表最终状态（例如登录弹窗可能晚于头像渲染），
+    所以只有 stop_on 中的否定标志可以提前结束等待。
+    返回 Ready(selector, elapsed, counts)，selector 为提前结束时匹配到的 stop_on 选择器，否则为 None
+    """
+    script = RACE_SCRIPT.replace('__SELECTORS__', json.dumps(list(selectors)))
+    stop_indexes = [selectors.index(selector) for selector in stop_on]
+    start = time.perf_counter()
+    deadline = start + timeout
+    counts = [0] * len(selectors)
+    selector = None
+    while True:
+        try:
+            counts = page.run_js(script) or counts
+        except Exception:
+            # 页面跳转过程中执行脚本可能失败
+            pass
+        matched = next((i for i in stop_indexes if counts[i]), None)
+        if matched is not None:
+            selector = selectors[matched]
+            break
+        if time.perf_counter() + interval > deadline:
+            break
+        time.sleep(interval)
+    elapsed = time.perf_counter() - start
+    stats.add_ready(label, selector, elapsed, timeout)
+    return Ready(selector, elapsed, counts)
@@ -1,22 +1,47 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import threading
 import sys
 import queue
+from collections import deque
+import re
 import os
 from datetime import datetime
-from extract_search import sign_in as search_sign_in, main as search_main, get_executable_path
-from extract_author import sign_in as author_sign_in, main as author_main
 import logging
+# 采集模块依赖 pandas、DrissionPage 等重量级库，在第一次运行任务时才导入，保证窗口尽快出现
+from app_paths import get_executable_path
+from browser_service import BrowserManager
+from jobs import JobManager, FINISHED
+
+# 日志级别：按关键字判断，过滤时只显示不低于所选级别的行
+LOG_LEVELS = {'全部': 0, '警告': 1, '错误': 2}
+ERROR_MARKERS = ('出错', '失败', '错误', 'Error', 'Traceback', 'Exception')
+WARNING_MARKERS = ('警告', '超时', '重试', '未找到', '未检测到', '未获取到', 'Warning')
+
+def line_level(line):
+    """按关键字判断日志行的级别"""
+    if any(marker in line for marker in ERROR_MARKERS):
+        return 2
+    if any(marker in line for marker in WARNING_MARKERS):
+        return 1
+    return 0
 
 class RedirectText:
-    """重定向输出到GUI文本框"""
-    def __init__(self, text_widget):
+    """重定向输出到GUI文本框
+
+    write() 可在任意线程调用，只负责入队；由 Tk 主线程通过 after 定时批量取出并一次性写入文本框。
+    最多保留 max_lines 行（环形缓冲），超出部分从顶部删除
+    """
+    def __init__(self, text_widget, max_lines=5000, interval=100, level=0):
         self.text_widget = text_widget
         self.queue = queue.Queue()
         self.updating = True
-        self._thread = threading.Thread(target=self.update_text_widget, daemon=True)
-        self._thread.start()
+        self.max_lines = max_lines
+        self.interval = interval
+        self.level = level
+        self.lines = deque(maxlen=max_lines)
+        self._partial = ''
+        self._shown = 0
+        self.text_widget.after(self.interval, self._pump)
 
     def write(self, string):
         if string:  # 只处理非空字符串
@@ -25,18 +50,61 @@ class RedirectText:
     def flush(self):
         pass
 
-    def update_text_widget(self):
-        while self.updating:
+    def _drain(self):
+        """取出队列中已有的全部文本，按行切分（不完整的末行留到下次）"""
+        chunks = []
+        while True:
             try:
-                text = self.queue.get(timeout=0.1)  # 使用超时等待
-                if text:
-                    self.text_widget.insert('end', text)
-                    self.text_widget.see('end')
-                    self.text_widget.update()
+                chunks.append(self.queue.get_nowait())
             except queue.Empty:
-                continue
-            except Exception as e:
-                logging.error(f"更新文本出错: {str(e)}")
+                break
+        if not chunks:
+            return []
+        text = self._partial + ''.join(chunks)
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        # 以回车覆盖的进度行只保留最后一段
+        return [line.rsplit('\r', 1)[-1] for line in lines]
+
+    def _pump(self):
+        """在 Tk 主线程中批量刷新文本框"""
+        if not self.updating:
+            return
+        try:
+            lines = self._drain()
+            if lines:
+                self.lines.extend(lines)
+                visible = [line for line in lines[-self.max_lines:] if line_level(line) >= self.level]
+                if visible:
+                    self._append(visible)
+        except Exception as e:
+            logging.error(f"更新文本出错: {str(e)}")
+        self.text_widget.after(self.interval, self._pump)
+
+    def _append(self, lines):
+        """一次插入多行，并删除超出上限的旧行"""
+        self.text_widget.insert('end', '\n'.join(lines) + '\n')
+        self._shown += len(lines)
+        excess = self._shown - self.max_lines
+        if excess > 0:
+            self.text_widget.delete('1.0', f'{excess + 1}.0')
+            self._shown -= excess
+        self.text_widget.see('end')
+
+    def set_level(self, level):
+        """切换日志级别，并用缓冲区中的行重新渲染文本框"""
+        self.level = level
+        self.text_widget.delete('1.0', 'end')
+        self._shown = 0
+        visible = [line for line in self.lines if line_level(line) >= level]
+        if visible:
+            self._append(visible)
+
+    def clear(self):
+        """清空缓冲区和文本框"""
+        self.lines.clear()
+        self.text_widget.delete('1.0', 'end')
+        self._shown = 0
 
     def stop(self):
         self.updating = False
@@ -45,7 +113,7 @@ class XHSDataAssistant:
     def __init__(self, root):
         self.root = root
         self.root.title("小红书数据助手")
-        self.root.geometry("800x600")
+        self.root.geometry("800x720")
         
         # 创建主框架
         self.main_frame = ttk.Frame(root, padding="10")
@@ -69,8 +137,18 @@ class XHSDataAssistant:
         # 创建日志显示区域
         self.create_log_area()
         
-        # 创建并设置日志重定向
+        # 创建并设置日志重定向：所有任务线程的输出都进入日志区域
         self.redirect = RedirectText(self.log_text)
+        self.old_stdout = sys.stdout
+        sys.stdout = self.redirect
+        
+        # 常驻浏览器：第一次采集时启动，之后的任务复用
+        self.browser = BrowserManager(login_check=self.check_login_status)
+        
+        # 任务队列和进度显示
+        self.jobs = JobManager(max_concurrent=2)
+        self.create_job_area()
+        self.root.after(300, self.refresh_jobs)
         
         # 确保程序关闭时恢复标准输出
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -78,7 +156,7 @@ class XHSDataAssistant:
     def init_search_tab(self):
         """初始化搜索选项卡"""
         # 关键词输入
-        ttk.Label(self.search_frame, text="关键词:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Label(self.search_frame, text="关键词(多个用逗号分隔):").grid(row=0, column=0, sticky=tk.W, pady=5)
         self.keyword_entry = ttk.Entry(self.search_frame, width=40)
         self.keyword_entry.grid(row=0, column=1, sticky=tk.W, pady=5)
         
@@ -88,9 +166,15 @@ class XHSDataAssistant:
         self.pages_entry.grid(row=1, column=1, sticky=tk.W, pady=5)
         self.pages_entry.insert(0, "1")
         
+        # 采集引擎：playwright 在一个事件循环中并发搜索多个关键词
+        ttk.Label(self.search_frame, text="引擎:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.engine_var = tk.StringVar(value='drission')
+        ttk.Combobox(self.search_frame, textvariable=self.engine_var, values=('drission', 'playwright'),
+                     state='readonly', width=12).grid(row=2, column=1, sticky=tk.W, pady=5)
+        
         # 搜索按钮
         self.search_button = ttk.Button(self.search_frame, text="开始采集", command=self.start_search)
-        self.search_button.grid(row=2, column=0, columnspan=2, pady=10)
+        self.search_button.grid(row=3, column=0, columnspan=2, pady=10)
 
     def init_author_tab(self):
         """初始化作者主页选项卡"""
@@ -118,26 +202,42 @@ class XHSDataAssistant:
         self.log_text = scrolledtext.ScrolledText(self.log_frame, height=20)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        # 清除按钮
-        self.clear_button = ttk.Button(self.log_frame, text="清除日志", command=self.clear_log)
-        self.clear_button.grid(row=1, column=0, pady=5)
+        # 清除按钮和日志级别
+        self.log_tools = ttk.Frame(self.log_frame)
+        self.log_tools.grid(row=1, column=0, pady=5)
+        self.clear_button = ttk.Button(self.log_tools, text="清除日志", command=self.clear_log)
+        self.clear_button.grid(row=0, column=0, padx=5)
+        ttk.Label(self.log_tools, text="日志级别:").grid(row=0, column=1)
+        self.log_level = ttk.Combobox(self.log_tools, values=list(LOG_LEVELS), width=6, state='readonly')
+        self.log_level.current(0)
+        self.log_level.grid(row=0, column=2)
+        self.log_level.bind('<<ComboboxSelected>>', self.change_log_level)
 
     def clear_log(self):
         """清除日志"""
-        self.log_text.delete(1.0, tk.END)
+        self.redirect.clear()
+
+    def change_log_level(self, event=None):
+        """切换日志级别"""
+        self.redirect.set_level(LOG_LEVELS[self.log_level.get()])
 
     def on_closing(self):
         """程序关闭时的清理工作"""
         try:
+            if hasattr(self, 'jobs'):
+                self.jobs.cancel_all()
             if hasattr(self, 'redirect'):
                 self.redirect.stop()
+                sys.stdout = self.old_stdout
+            if hasattr(self, 'browser'):
+                self.browser.close()
             self.root.destroy()
         except Exception as e:
             logging.error(f"程序关闭时出错: {str(e)}")
             self.root.destroy()
 
     def start_search(self):
-        """启动搜索爬虫"""
+        """提交搜索采集任务"""
         keyword = self.keyword_entry.get().strip()
         pages = self.pages_entry.get().strip()
         
@@ -153,11 +253,15 @@ class XHSDataAssistant:
             messagebox.showerror("错误", "页数必须是正整数")
             return
             
-        self.search_button.state(['disabled'])
-        threading.Thread(target=self.run_search_crawler, args=(keyword, pages), daemon=True).start()
+        resume = self.resume_var.get()
+        skip_seen = self.skip_seen_var.get()
+        engine = self.engine_var.get()
+        self.jobs.submit(f"搜索 {keyword}",
+                         lambda progress, cancel: self.run_search_crawler(keyword, pages, progress, cancel, resume,
+                                                                          skip_seen, engine))
 
     def start_author(self):
-        """启动作者主页爬虫"""
+        """提交作者主页采集任务"""
         url = self.author_url_entry.get().strip()
         note_count = self.note_count_entry.get().strip()
         
@@ -173,44 +277,129 @@ class XHSDataAssistant:
             messagebox.showerror("错误", "笔记数量必须是正整数")
             return
             
-        self.author_button.state(['disabled'])
-        threading.Thread(target=self.run_author_crawler, args=(url, note_count), daemon=True).start()
+        resume = self.resume_var.get()
+        skip_seen = self.skip_seen_var.get()
+        self.jobs.submit(f"作者 {url.rstrip('/').split('/')[-1].split('?')[0]}",
+                         lambda progress, cancel: self.run_author_crawler(url, note_count, progress, cancel, resume,
+                                                                          skip_seen))
+
+    def check_login_status(self, page):
+        """页面登录状态检查（首次调用时才导入采集模块）"""
+        from extract_search import check_login_status
+        return check_login_status(page)
 
-    def run_search_crawler(self, keyword, pages):
-        """运行搜索爬虫"""
-        old_stdout = sys.stdout  # 在 try 外保存原始输出
+    def run_search_crawler(self, keyword, pages, progress=None, cancel=None, resume=False, skip_seen=False,
+                           engine='drission'):
+        """运行搜索爬虫（在任务线程中执行）"""
+        from extract_search import main as search_main, batch_main as search_batch_main
         try:
-            sys.stdout = self.redirect
-            try:
-                print(f"开始搜索采集 - 关键词: {keyword}, 页数: {pages}")
-                search_main(keyword=keyword, pages=pages)
-                print("搜索采集完成")
-            except Exception as e:
-                print(f"采集出错: {str(e)}")
-                logging.error(f"搜索采集出错: {str(e)}", exc_info=True)
+            # 多个关键词用逗号或分号分隔，批量模式只登录一次并跨关键词去重
+            keywords = [k.strip() for k in re.split(r'[,，;；]', keyword) if k.strip()]
+            print(f"开始搜索采集 - 关键词: {'、'.join(keywords)}, 页数: {pages}, 引擎: {engine}")
+            options = dict(pages=pages, progress=progress, cancel=cancel, lean=self.browser.lean, resume=resume,
+                           skip_seen=skip_seen, account=self.browser.session.account, engine=engine)
+
+            def search(page):
+                if len(keywords) > 1:
+                    search_batch_main(keywords, page=page, **options)
+                else:
+                    search_main(keyword=keywords[0], page=page, **options)
+
+            if engine == 'playwright':
+                # Playwright 引擎自己启动浏览器，不租用常驻浏览器的标签页
+                search(None)
+            else:
+                with self.browser.start().lease() as tab:
+                    search(tab)
+            print("搜索采集完成")
         except Exception as e:
-            logging.error(f"输出重定向出错: {str(e)}", exc_info=True)
-        finally:
-            sys.stdout = old_stdout  # 恢复原始输出
-            self.search_button.state(['!disabled'])
-
-    def run_author_crawler(self, url, note_count):
-        """运行作者主页爬虫"""
-        old_stdout = sys.stdout  # 在 try 外保存原始输出
+            print(f"采集出错: {str(e)}")
+            logging.error(f"搜索采集出错: {str(e)}", exc_info=True)
+            raise
+
+    def run_author_crawler(self, url, note_count, progress=None, cancel=None, resume=False, skip_seen=False):
+        """运行作者主页爬虫（在任务线程中执行）"""
+        from extract_author import main as author_main
         try:
-            sys.stdout = self.redirect
-            try:
-                print(f"开始获取作者数据 - URL: {url}, 笔记数: {note_count}")
-                author_main(author_url=url, note_num=note_count)
-                print("作者数据获取完成")
-            except Exception as e:
-                print(f"获取出错: {str(e)}")
-                logging.error(f"作者数据获取出错: {str(e)}", exc_info=True)
+            print(f"开始获取作者数据 - URL: {url}, 笔记数: {note_count}")
+            with self.browser.start().lease() as tab:
+                author_main(author_url=url, note_num=note_count, page=tab, progress=progress, cancel=cancel,
+                            resume=resume, skip_seen=skip_seen, account=self.browser.session.account)
+            print("作者数据获取完成")
         except Exception as e:
-            logging.error(f"输出重定向出错: {str(e)}", exc_info=True)
-        finally:
-            sys.stdout = old_stdout  # 恢复原始输出
-            self.author_button.state(['!disabled'])
+            print(f"获取出错: {str(e)}")
+            logging.error(f"作者数据获取出错: {str(e)}", exc_info=True)
+            raise
+
+    def create_job_area(self):
+        """创建任务列表：每个任务一行进度条和取消按钮"""
+        self.job_frame = ttk.LabelFrame(self.main_frame, text="任务", padding="5")
+        self.job_frame.grid(row=2, column=0, sticky=(tk.W, tk.E))
+        
+        tools = ttk.Frame(self.job_frame)
+        tools.grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(tools, text="同时运行:").grid(row=0, column=0)
+        self.job_limit = tk.Spinbox(tools, from_=1, to=8, width=4, command=self.change_job_limit)
+        self.job_limit.delete(0, tk.END)
+        self.job_limit.insert(0, str(self.jobs.max_concurrent))
+        self.job_limit.grid(row=0, column=1, padx=5)
+        ttk.Button(tools, text="清除已结束", command=self.clear_finished_jobs).grid(row=0, column=2, padx=5)
+        # 精简模式：新任务的标签页不加载图片、视频和字体，浏览器下次启动时无界面运行
+        self.lean_var = tk.BooleanVar(value=self.browser.lean)
+        ttk.Checkbutton(tools, text="精简模式", variable=self.lean_var,
+                        command=self.toggle_lean).grid(row=0, column=3, padx=5)
+        # 断点续采：从上次中断的检查点继续，而不是从头采集
+        self.resume_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tools, text="断点续采", variable=self.resume_var).grid(row=0, column=4, padx=5)
+        # 跳过已采集：丢弃以前运行中（搜索或作者采集）已经采集过的笔记
+        self.skip_seen_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tools, text="跳过已采集", variable=self.skip_seen_var).grid(row=0, column=5, padx=5)
+        
+        self.job_list = ttk.Frame(self.job_frame)
+        self.job_list.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        self.job_rows = {}
+        # 进度行的网格行号只增不减，清除已结束任务后新行不会与留下的行重叠
+        self.next_job_row = 0
+
+    def change_job_limit(self):
+        """调整同时运行的任务数"""
+        try:
+            self.jobs.set_limit(int(self.job_limit.get()))
+        except ValueError:
+            pass
+
+    def toggle_lean(self):
+        """切换精简模式，对之后开始的任务生效"""
+        self.browser.lean = self.lean_var.get()
+
+    def clear_finished_jobs(self):
+        """移除已结束任务的进度行"""
+        for job in self.jobs.clear_finished():
+            row = self.job_rows.pop(job.id, None)
+            if row is not None:
+                row[0].destroy()
+
+    def refresh_jobs(self):
+        """定时在 Tk 主线程中刷新任务进度"""
+        for job in list(self.jobs.jobs):
+            row = self.job_rows.get(job.id)
+            if row is None:
+                frame = ttk.Frame(self.job_list)
+                frame.grid(row=self.next_job_row, column=0, sticky=tk.W, pady=2)
+                self.next_job_row += 1
+                bar = ttk.Progressbar(frame, length=200, maximum=100)
+                bar.grid(row=0, column=0)
+                label = ttk.Label(frame, width=70)
+                label.grid(row=0, column=1, padx=5)
+                button = ttk.Button(frame, text="取消", command=job.cancel)
+                button.grid(row=0, column=2)
+                row = self.job_rows[job.id] = (frame, bar, label, button)
+            _, bar, label, button = row
+            bar['value'] = job.fraction * 100
+            label['text'] = job.summary()
+            if job.status in FINISHED or job.status == 'cancelling':
+                button.state(['disabled'])
+        self.root.after(300, self.refresh_jobs)
 
 def setup_logging():
     """设置日志"""
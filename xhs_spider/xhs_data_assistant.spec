@@ -12,34 +12,28 @@ a = Analysis(
         # 如果有其他必要的数据文件，可以在这里添加
     ],
     hiddenimports=[
-        'DataRecorder',
+        # 采集模块在第一次运行任务时才导入，这里显式列出保证被打包
+        'extract_search',
+        'extract_author',
         'DrissionPage',
         'pandas',
         'openpyxl',
-        'tqdm',
-        'tkinter',
-        'asyncio',
-        'playwright',
-        'logging',
-        'queue',
-        'threading',
-        'json',
-        'base64',
-        'urllib',
-        'random',
-        'math',
-        'selenium',
-        'selenium.webdriver',
-        'selenium.webdriver.chrome',
-        'selenium.webdriver.chrome.service',
-        'selenium.webdriver.common.by',
-        'selenium.webdriver.support.ui',
-        'selenium.webdriver.support.expected_conditions'
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Playwright 引擎为可选依赖，不随GUI打包；其余为不会用到的大型库
+    excludes=[
+        'playwright',
+        'selenium',
+        'PIL',
+        'matplotlib',
+        'scipy',
+        'IPython',
+        'jupyter',
+        'notebook',
+        'pytest',
+    ],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,